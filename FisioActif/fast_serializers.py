@@ -0,0 +1,179 @@
+"""
+Read-only fast path for list responses.
+
+A FastListSerializer compiles the readable fields of a DRF ModelSerializer once into a
+.values() projection and one converter per field, then builds the output dicts straight
+from the rows, without instantiating models or walking DRF field trees per row:
+
+- model fields and single foreign keys, including nested serializers of plain fields on
+  them, become lookups of the same projection; the converter is the DRF field's own to_representation,
+  left out for field types that represent a database value as the value itself
+- to-many relations (primary keys or nested serializers) are loaded with one extra query
+  per relation for the whole page, in the related model's default ordering then by pk
+- SerializerMethodFields are declared by the subclass in method_fields (computed from
+  lookups of the row) or batch_fields (computed for all the primary keys at once)
+
+Output is identical to the wrapped serializer's, which the parity tests check.
+"""
+from collections import defaultdict
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import FileField as ModelFileField
+from django.db.models.fields.files import FieldFile
+from django.db.models.fields.reverse_related import ForeignObjectRel
+from rest_framework import fields as drf_fields, relations, serializers
+
+# DRF fields whose to_representation returns a database value unchanged
+IDENTITY_FIELDS = (
+    drf_fields.BooleanField, drf_fields.CharField, drf_fields.ChoiceField,
+    drf_fields.IntegerField, drf_fields.ReadOnlyField, relations.PrimaryKeyRelatedField,
+)
+
+VALUE, NESTED, FILE, METHOD, BATCH, MANY = range(6)
+
+
+class _Plan:
+    """Lookups to select for one serializer and the steps that build its dict from a row."""
+
+    def __init__(self, serializer, prefix, fast):
+        self.fast = fast
+        self.pk = prefix + 'pk'
+        self.lookups = [self.pk]
+        self.steps = []
+        self.relations = []
+        model = serializer.Meta.model
+        for field in serializer._readable_fields:
+            self.add_field(field, model, prefix)
+
+    def lookup(self, path):
+        if path not in self.lookups:
+            self.lookups.append(path)
+        return path
+
+    def add_field(self, field, model, prefix):
+        name = field.field_name
+        fast = self.fast
+        if isinstance(field, serializers.SerializerMethodField):
+            if name in fast.method_fields:
+                lookups, func = fast.method_fields[name]
+                self.steps.append((name, METHOD, ([self.lookup(prefix + path) for path in lookups], func)))
+            elif name in fast.batch_fields:
+                self.steps.append((name, BATCH, name))
+            else:
+                raise ImproperlyConfigured(f'{type(fast).__name__} does not know how to compute {name}.')
+            return
+
+        if field.source == '*' or len(field.source_attrs) != 1:
+            raise ImproperlyConfigured(f'{type(fast).__name__} cannot project field {name}.')
+        source = field.source_attrs[0]
+        model_field = model._meta.get_field(source)
+
+        if isinstance(field, (serializers.ListSerializer, relations.ManyRelatedField)):
+            self.steps.append((name, MANY, len(self.relations)))
+            self.relations.append(_Relation(field, model_field, fast))
+        elif isinstance(field, serializers.BaseSerializer):
+            nested = _Plan(field, f'{prefix}{source}__', fast)
+            if nested.relations or any(kind == BATCH for _, kind, _ in nested.steps):
+                raise ImproperlyConfigured(f'{type(fast).__name__} cannot load relations nested in {name}.')
+            for path in nested.lookups:
+                self.lookup(path)
+            self.steps.append((name, NESTED, nested))
+        elif isinstance(model_field, ModelFileField):
+            self.steps.append((name, FILE, (self.lookup(prefix + source), field, model_field)))
+        else:
+            converter = None if isinstance(field, IDENTITY_FIELDS) else field.to_representation
+            self.steps.append((name, VALUE, (self.lookup(prefix + source), converter)))
+
+    def build(self, row, related, batches):
+        data = {}
+        for name, kind, payload in self.steps:
+            if kind == VALUE:
+                lookup, converter = payload
+                value = row[lookup]
+                data[name] = value if value is None or converter is None else converter(value)
+            elif kind == NESTED:
+                data[name] = None if row[payload.pk] is None else payload.build(row, related, batches)
+            elif kind == FILE:
+                lookup, field, model_field = payload
+                value = row[lookup]
+                data[name] = None if value is None else field.to_representation(FieldFile(None, model_field, value))
+            elif kind == METHOD:
+                lookups, func = payload
+                data[name] = func(*(row[lookup] for lookup in lookups))
+            elif kind == BATCH:
+                data[name] = batches[payload][row[self.pk]]
+            else:
+                data[name] = related[payload].get(row[self.pk], [])
+        return data
+
+
+class _Relation:
+    """A to-many field: the primary keys or nested dicts of the related objects, by parent pk."""
+
+    def __init__(self, field, model_field, fast):
+        self.model = model_field.related_model
+        if isinstance(model_field, ForeignObjectRel):
+            self.back = model_field.field.name
+        else:
+            self.back = model_field.related_query_name()
+        child = field.child if isinstance(field, serializers.ListSerializer) else field.child_relation
+        self.plan = _Plan(child, '', fast) if isinstance(child, serializers.BaseSerializer) else None
+        self.ordering = [*self.model._meta.ordering, 'pk']
+
+    def load(self, parent_ids):
+        lookups = self.plan.lookups if self.plan else ['pk']
+        rows = self.model._default_manager.filter(
+            **{f'{self.back}__in': parent_ids}
+        ).order_by(*self.ordering).values_list(self.back, *lookups)
+        grouped = defaultdict(list)
+        if self.plan is None:
+            for parent_id, pk in rows:
+                grouped[parent_id].append(pk)
+            return grouped
+        rows = [(row[0], dict(zip(lookups, row[1:]))) for row in rows]
+        related, batches = self.plan.fast.load_related(self.plan, [values for _, values in rows])
+        for parent_id, values in rows:
+            grouped[parent_id].append(self.plan.build(values, related, batches))
+        return grouped
+
+
+class FastListSerializer:
+    """
+    fields narrows the output like SparseFieldsMixin (see FisioActif.sparse_fields).
+    Subclasses set serializer_class and declare its SerializerMethodFields, either as
+    method_fields = {name: (lookups, func(*values))} or as batch_fields = {name: method name},
+    the method taking the list of primary keys and returning {pk: value}.
+    """
+    serializer_class = None
+    method_fields = {}
+    batch_fields = {}
+
+    def __init__(self, context=None, fields=None):
+        self.context = context or {}
+        kwargs = {'fields': fields} if fields is not None else {}
+        self.plan = _Plan(self.serializer_class(context=self.context, **kwargs), '', self)
+
+    def project(self, queryset, *lookups):
+        """queryset as the rows this serializer reads (plus lookups), keeping its filters and ordering."""
+        return queryset.values(*self.plan.lookups, *(lookup for lookup in lookups if lookup not in self.plan.lookups))
+
+    def serialize(self, rows):
+        """Output dicts for rows of project()."""
+        rows = list(rows)
+        related, batches = self.load_related(self.plan, rows)
+        return [self.plan.build(row, related, batches) for row in rows]
+
+    def data(self, queryset):
+        return self.serialize(self.project(queryset))
+
+    def load_related(self, plan, rows):
+        ids = [row[plan.pk] for row in rows]
+        if not ids:
+            return [{} for _ in plan.relations], defaultdict(dict)
+        related = [relation.load(ids) for relation in plan.relations]
+        batches = {
+            name: getattr(self, method)(ids)
+            for name, method in self.batch_fields.items()
+            if any(kind == BATCH and payload == name for _, kind, payload in plan.steps)
+        }
+        return related, batches
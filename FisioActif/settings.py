@@ -55,6 +55,8 @@ INSTALLED_APPS = [
     'categories',
     'classes',
     'rooms',
+    'outbox',
+    'jobs',
 ]
 
 MIDDLEWARE = [
@@ -112,6 +114,24 @@ DATABASES = {
 }
 
 
+# Cache
+# The availability cache relies on invalidation from model signals, so deployments running
+# several workers must point this at a shared backend (e.g. DatabaseCache or memcached).
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+# Seconds a computed availability day stays cached
+AVAILABILITY_CACHE_TIMEOUT = int(os.getenv('AVAILABILITY_CACHE_TIMEOUT', '300'))
+
+# Read booked time from the quarter-hour occupancy grid instead of the booking rows
+AVAILABILITY_USE_OCCUPANCY_GRID = os.getenv('AVAILABILITY_USE_OCCUPANCY_GRID', 'False') == 'True'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -214,3 +234,13 @@ EMAIL_HOST_USER = 'noreply@yourselfpilates.pt'
 EMAIL_HOST_PASSWORD = 'B43[21v?YL+!'
 DEFAULT_FROM_EMAIL = 'noreply@yourselfpilates.pt'
 
+
+# Reminder emails, in minutes before a booking starts (see reservation.reminders). The
+# day-before reminder is the daily job below (reservation.scheduler), not an offset here
+BOOKING_REMINDER_OFFSETS = [2 * 60]
+# UTC time of day the scheduler (see jobs.runner) sends the day-before reminders
+BOOKING_REMINDER_DAILY_AT = '18:00'
+
+# Run the background jobs (see jobs.runner) from the web processes; a database lease
+# makes only one process of the deployment run them at a time
+SCHEDULER_ENABLED = os.getenv('SCHEDULER_ENABLED', 'False') == 'True'
@@ -0,0 +1,95 @@
+"""
+Sparse fieldsets (?fields=) and opt-in expansion (?expand=).
+
+Serializers list their costly nested serializers and SerializerMethodFields in
+expandable_fields. Without either query parameter a response is unchanged. With one:
+
+- ?fields=id,title returns just those fields (default: every field that is not expandable)
+- ?expand=professional_details adds expandable fields on top
+
+Fields left out are never computed: the serializer only reports the requested fields as
+readable, so FastListSerializer also narrows its .values() projection and skips the
+queries of unrequested relations. Writable fields and validation are unaffected.
+"""
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import serializers
+
+SPARSE_FIELDS_PARAMETERS = [
+    OpenApiParameter(
+        name='fields',
+        type=OpenApiTypes.STR,
+        location=OpenApiParameter.QUERY,
+        description='Comma-separated fields to return. Defaults to every field that is not expandable '
+                    'once fields or expand is given.',
+    ),
+    OpenApiParameter(
+        name='expand',
+        type=OpenApiTypes.STR,
+        location=OpenApiParameter.QUERY,
+        description='Comma-separated expandable fields (nested objects and computed fields) to include.',
+    ),
+]
+
+
+def split_names(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+class SparseFieldsMixin:
+    """Serializer mixin taking fields=<names to represent>, or None for all of them."""
+    expandable_fields = ()
+
+    def __init__(self, *args, fields=None, **kwargs):
+        self.sparse_fields = fields
+        super().__init__(*args, **kwargs)
+
+    @property
+    def _readable_fields(self):
+        for field in super()._readable_fields:
+            if self.sparse_fields is None or field.field_name in self.sparse_fields:
+                yield field
+
+    @classmethod
+    def requested_fields(cls, query_params):
+        """The field names asked for by ?fields= and ?expand=, or None when neither is given."""
+        if 'fields' not in query_params and 'expand' not in query_params:
+            return None
+        readable = [field.field_name for field in cls()._readable_fields]
+        fields = split_names(query_params.get('fields', ''))
+        expand = split_names(query_params.get('expand', ''))
+        errors = {}
+        unknown = [name for name in fields if name not in readable]
+        if unknown:
+            errors['fields'] = [f"Unknown field(s): {', '.join(unknown)}"]
+        unknown = [name for name in expand if name not in cls.expandable_fields]
+        if unknown:
+            errors['expand'] = [f"Not expandable: {', '.join(unknown)}. Expandable: {', '.join(cls.expandable_fields)}"]
+        if errors:
+            raise serializers.ValidationError(errors)
+        if not fields:
+            fields = [name for name in readable if name not in cls.expandable_fields]
+        return frozenset(fields) | frozenset(expand)
+
+
+class SparseFieldsViewMixin:
+    """Viewset mixin passing the requested fields to serializers built with SparseFieldsMixin."""
+
+    def get_requested_fields(self):
+        if not hasattr(self, '_requested_fields'):
+            serializer_class = self.get_serializer_class()
+            request = getattr(self, 'request', None)
+            if request is None or not issubclass(serializer_class, SparseFieldsMixin):
+                self._requested_fields = None
+            else:
+                self._requested_fields = serializer_class.requested_fields(request.query_params)
+        return self._requested_fields
+
+    def wants_field(self, name):
+        fields = self.get_requested_fields()
+        return fields is None or name in fields
+
+    def get_serializer(self, *args, **kwargs):
+        if issubclass(self.get_serializer_class(), SparseFieldsMixin):
+            kwargs.setdefault('fields', self.get_requested_fields())
+        return super().get_serializer(*args, **kwargs)
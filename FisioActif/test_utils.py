@@ -0,0 +1,29 @@
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """
+    TestCase mixin asserting that a block of code stays within a query budget.
+
+    Unlike assertNumQueries, the budget is an upper bound, and the failure lists every
+    query executed so an N+1 regression is obvious from the CI log:
+
+        class BookingListTest(QueryBudgetMixin, TestCase):
+            def test_list(self):
+                with self.assertQueryBudget(3):
+                    self.client.get(url)
+    """
+
+    @contextmanager
+    def assertQueryBudget(self, budget, using=DEFAULT_DB_ALIAS):
+        with CaptureQueriesContext(connections[using]) as context:
+            yield context
+        executed = len(context.captured_queries)
+        if executed > budget:
+            queries = '\n'.join(
+                f"{index}. {query['sql']}" for index, query in enumerate(context.captured_queries, start=1)
+            )
+            self.fail(f"{executed} queries executed, budget is {budget}:\n{queries}")
@@ -52,6 +52,7 @@ urlpatterns = [
     path('api/categories/', include('categories.api_urls')),
     path('api/classes/', include('classes.urls')),
     path('api/rooms/', include('rooms.urls')),
+    path('api/jobs/', include('jobs.urls')),
 
     path('', home, name='home'),
 ]
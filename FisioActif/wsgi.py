@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'FisioActif.settings')
 
 application = get_wsgi_application()
+
+from jobs.runner import start_scheduler  # noqa: E402
+
+start_scheduler()
@@ -3,6 +3,7 @@ from django.contrib.auth import get_user_model
 from .models import Class
 from user.models import User
 from user.serializers import UserClientSerializer
+from FisioActif.fast_serializers import FastListSerializer
 
 User = get_user_model()
 
@@ -65,3 +66,17 @@ class ClassSerializer(serializers.ModelSerializer):
             })
         
         return data
+
+
+def class_actions(status):
+    return {
+        'edit': True,
+        'toggle_status': True,
+        'status_label': 'Active' if status else 'Inactive'
+    }
+
+
+class FastClassSerializer(FastListSerializer):
+    """Read-only ClassSerializer output for list responses."""
+    serializer_class = ClassSerializer
+    method_fields = {'actions': (('status',), class_actions)}
@@ -0,0 +1,33 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+
+from rest_framework.renderers import JSONRenderer
+
+from classes.models import Class
+from classes.serializers import ClassSerializer, FastClassSerializer
+
+
+class FastClassSerializerTest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        professional = User.objects.create_user(email='pro@example.com', password='testpass', full_name='Pro', role='professional')
+        clients = [
+            User.objects.create_user(email=f'client{index}@example.com', password='testpass', full_name=f'Client {index}', role='client')
+            for index in range(3)
+        ]
+        clients[0].professionals.add(professional)
+        for index in range(3):
+            group = Class.objects.create(name=f'Pilates {index}', duration=60, capacity=5, status=bool(index % 2))
+            group.professional.set([professional] if index else [])
+            group.clients.set(clients[index:])
+
+    def test_matches_class_serializer(self):
+        queryset = Class.objects.all()
+        expected = JSONRenderer().render(ClassSerializer(queryset, many=True).data)
+        actual = JSONRenderer().render(FastClassSerializer().data(queryset))
+        self.assertEqual(actual, expected)
+
+    def test_queries_do_not_grow_with_rows(self):
+        # classes, professionals, clients, the clients' professionals
+        with self.assertNumQueries(4):
+            FastClassSerializer().data(Class.objects.all())
@@ -6,17 +6,33 @@ from rest_framework.exceptions import NotFound
 from django.contrib.auth import get_user_model
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
 
+from FisioActif.conditional import ConditionalGetMixin
 from .models import Class
-from .serializers import ClassSerializer
+from .serializers import ClassSerializer, FastClassSerializer
 
 User = get_user_model()
 
 
-class ClassViewSet(viewsets.ModelViewSet):
+class ClassViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """CRUD and status toggle for classes."""
     queryset = Class.objects.all().order_by('-created_at')
     serializer_class = ClassSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    # Professionals, clients and the clients' professionals are part of the representation
+    version_dependencies = (User, Class.professional.through, Class.clients.through, User.professionals.through)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.conditional_response(queryset, lambda: self.fast_list_response(queryset))
+
+    def fast_list_response(self, queryset):
+        # Read-only projection of ClassSerializer, see FisioActif.fast_serializers
+        fast = FastClassSerializer(context=self.get_serializer_context())
+        queryset = fast.project(queryset)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(fast.serialize(page))
+        return Response(fast.serialize(queryset))
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -59,5 +75,5 @@ class ClassViewSet(viewsets.ModelViewSet):
             raise NotFound("Professional not found.")
 
         classes = Class.objects.filter(professional=professional)
-        serializer = self.get_serializer(classes, many=True)
-        return Response(serializer.data)
+        fast = FastClassSerializer(context=self.get_serializer_context())
+        return Response(fast.data(classes))
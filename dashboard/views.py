@@ -1,10 +1,12 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import viewsets, permissions
+from django.db.models import Sum
 
 from reservation.permissions import IsAdminUser
 from django.utils import timezone
-from datetime import timedelta
+from datetime import datetime, time, timedelta
+from decimal import Decimal
 from reservation.models import Booking
 from user.models import User
 from .models import Video
@@ -29,6 +31,8 @@ class AnalyticsView(APIView):
             "confirmed_last_7_days": int,
             "confirmed_last_30_days": int,
             "confirmed_last_3_months": int,
+            "booked_minutes_last_30_days": int,
+            "revenue_last_30_days": "decimal",
             "total_clients": int,
             "total_professionals": int,
             "professional_visitors": {
@@ -69,6 +73,14 @@ class AnalyticsView(APIView):
             data__gte=last_3_months
         ).count()
 
+        # Minutes and revenue of the non-cancelled bookings of the last 30 days, summed from
+        # the stored service totals off the (data, state, total_duration, total_price) index
+        booked_last_30_days = Booking.objects.filter(
+            data__gte=today - timedelta(days=29), data__lte=today
+        ).exclude(state__in=Booking.RELEASED_STATES).aggregate(
+            minutes=Sum('total_duration'), revenue=Sum('total_price')
+        )
+
         # Other totals
         total_clients = User.objects.filter(role='client').count()
         total_professionals = User.objects.filter(
@@ -80,22 +92,34 @@ class AnalyticsView(APIView):
             for n in range((end_date - start_date).days + 1):
                 yield start_date + timedelta(n)
 
+        # Plain datetime bounds (not __date) so the (role, date_joined/joined_at) indexes apply
+        def day_bounds(start_date, end_date):
+            start = timezone.make_aware(datetime.combine(start_date, time.min))
+            end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min))
+            return start, end
+
         # Professional visitors aggregation
         def get_professional_counts(start_date, end_date):
-            qs = User.objects.filter(role='professional', date_joined__date__gte=start_date, date_joined__date__lte=end_date)
+            start, end = day_bounds(start_date, end_date)
+            joined = User.objects.filter(
+                role='professional', date_joined__gte=start, date_joined__lt=end
+            ).values_list('date_joined', flat=True)
             counts = {d: 0 for d in daterange(start_date, end_date)}
-            for obj in qs:
-                join_date = obj.date_joined.date()
+            for date_joined in joined:
+                join_date = timezone.localtime(date_joined).date()
                 if join_date in counts:
                     counts[join_date] += 1
             return [{"date": d.strftime('%Y-%m-%d'), "count": counts[d]} for d in counts]
 
         # Client visitors aggregation
         def get_client_counts(start_date, end_date):
-            qs = User.objects.filter(role='client', joined_at__date__gte=start_date, joined_at__date__lte=end_date)
+            start, end = day_bounds(start_date, end_date)
+            joined = User.objects.filter(
+                role='client', joined_at__gte=start, joined_at__lt=end
+            ).values_list('joined_at', flat=True)
             counts = {d: 0 for d in daterange(start_date, end_date)}
-            for obj in qs:
-                join_date = obj.joined_at.date()
+            for joined_at in joined:
+                join_date = timezone.localtime(joined_at).date()
                 if join_date in counts:
                     counts[join_date] += 1
             return [{"date": d.strftime('%Y-%m-%d'), "count": counts[d]} for d in counts]
@@ -118,6 +142,8 @@ class AnalyticsView(APIView):
             "confirmed_last_7_days": confirmed_last_7_days,
             "confirmed_last_30_days": confirmed_last_30_days,
             "confirmed_last_3_months": confirmed_last_3_months,
+            "booked_minutes_last_30_days": booked_last_30_days['minutes'] or 0,
+            "revenue_last_30_days": f"{booked_last_30_days['revenue'] or Decimal('0'):.2f}",
             "total_clients": total_clients,
             "total_professionals": total_professionals,
             "professional_visitors": professional_visitors,
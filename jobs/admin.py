@@ -0,0 +1,13 @@
+from django.contrib import admin
+from .models import JobStatus, SchedulerLease
+
+
+@admin.register(SchedulerLease)
+class SchedulerLeaseAdmin(admin.ModelAdmin):
+    list_display = ('name', 'holder', 'expires_at')
+
+
+@admin.register(JobStatus)
+class JobStatusAdmin(admin.ModelAdmin):
+    list_display = ('job_id', 'runs', 'failures', 'last_duration', 'last_started_at', 'last_success_at', 'holder')
+    readonly_fields = ('last_started_at', 'last_finished_at', 'last_success_at')
@@ -0,0 +1,23 @@
+from apscheduler.schedulers.blocking import BlockingScheduler
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from jobs.runner import DAILY_JOBS, JOBS, LeaderScheduler
+
+
+class Command(BaseCommand):
+    help = (
+        'Run the background jobs (outbox delivery, order expiry, MB WAY polling, the day-before '
+        'reminders and the offset reminders) '
+        'in the foreground whenever this process wins the scheduler lease; safe to run next to '
+        'web processes started with SCHEDULER_ENABLED=True.'
+    )
+
+    def handle(self, *args, **options):
+        leader = LeaderScheduler(BlockingScheduler(timezone=timezone.utc))
+        jobs = ', '.join(job_id for job_id, _, _ in JOBS + DAILY_JOBS)
+        self.stdout.write(f"Scheduler {leader.holder} electing (jobs: {jobs}, reminders). Press Ctrl+C to stop.")
+        try:
+            leader.start()
+        except (KeyboardInterrupt, SystemExit):
+            leader.stop()
@@ -0,0 +1,51 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class SchedulerLease(models.Model):
+    """
+    A named lease held by at most one scheduler process at a time, until expires_at.
+    The holder renews it well before it expires; any process may take it over after.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    holder = models.CharField(max_length=255, blank=True)
+    expires_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.name} held by {self.holder or 'nobody'} until {self.expires_at}"
+
+    @classmethod
+    def acquire(cls, name, holder, ttl, now=None):
+        """Take or renew the lease for ttl; returns whether holder holds it now."""
+        now = now or timezone.now()
+        cls.objects.get_or_create(name=name)
+        # A single conditional UPDATE, so two processes can never both win it
+        return cls.objects.filter(
+            Q(holder=holder) | Q(expires_at__isnull=True) | Q(expires_at__lte=now), name=name,
+        ).update(holder=holder, expires_at=now + ttl) == 1
+
+    @classmethod
+    def release(cls, name, holder):
+        """Give the lease up, if holder still holds it, so another process takes over at once."""
+        cls.objects.filter(name=name, holder=holder).update(holder='', expires_at=None)
+
+
+class JobStatus(models.Model):
+    """Run statistics of one scheduled job, updated by jobs.runner.run_tracked."""
+    job_id = models.CharField(max_length=100, unique=True)
+    runs = models.PositiveIntegerField(default=0)
+    failures = models.PositiveIntegerField(default=0)
+    total_duration = models.FloatField(default=0, help_text='Seconds spent in all finished runs')
+    last_duration = models.FloatField(blank=True, null=True, help_text='Seconds')
+    last_started_at = models.DateTimeField(blank=True, null=True)
+    last_finished_at = models.DateTimeField(blank=True, null=True)
+    last_success_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+    holder = models.CharField(max_length=255, blank=True, help_text='Scheduler process of the last run')
+
+    class Meta:
+        verbose_name_plural = 'job statuses'
+
+    def __str__(self):
+        return self.job_id
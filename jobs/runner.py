@@ -0,0 +1,225 @@
+"""
+Background jobs run by exactly one process per deployment.
+
+Every web process (Passenger starts each worker on its own, see passenger_wsgi.py) and
+`manage.py run_scheduler` may start a LeaderScheduler; they all compete for the
+SchedulerLease named LEASE_NAME. An election job tries to take or renew the lease every
+third of its ttl. The process holding it adds the periodic JOBS, the DAILY_JOBS and the
+reminder scheduler; the others keep only the election job and take over once the leader has
+stopped renewing for a whole ttl (at once if it released the lease on exit).
+
+Each run goes through run_tracked, which records its duration and outcome in the job's
+JobStatus row (served by jobs.views.JobStatusView). A run only starts while the lease
+this process last renewed is still valid by its own clock, so a leader cut off from the
+database stops starting runs before anyone else can take its place. A new leader runs
+a daily job at once when today's run time has passed without a successful run, so a
+failover around that time does not skip a day.
+"""
+import atexit
+import logging
+import os
+import socket
+import threading
+import time as timer
+from datetime import timedelta
+
+from apscheduler.jobstores.base import JobLookupError
+from apscheduler.schedulers.background import BackgroundScheduler
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from reservation.reminders import ReminderScheduler
+from .models import JobStatus, SchedulerLease
+
+logger = logging.getLogger(__name__)
+
+LEASE_NAME = 'scheduler'
+LEASE_TTL = timedelta(seconds=60)
+ELECTION_JOB = 'election'
+REMINDERS_JOB = 'reminders'
+
+# (job id, dotted path of a function taking no arguments, interval)
+JOBS = (
+    ('outbox', 'outbox.delivery.drain', timedelta(seconds=30)),
+    ('expire_orders', 'subscriptions.tasks.expire_orders', timedelta(minutes=5)),
+    ('mbway_payments', 'subscriptions.tasks.poll_mbway_payments', timedelta(minutes=1)),
+)
+
+# (job id, dotted path of a function taking no arguments, setting holding the 'HH:MM' UTC run time)
+DAILY_JOBS = (
+    ('day_before_reminders', 'reservation.scheduler.send_booking_reminders', 'BOOKING_REMINDER_DAILY_AT'),
+)
+DAILY_JOB_DEFAULT_AT = '18:00'
+
+
+def daily_run_time(setting):
+    hour, minute = getattr(settings, setting, DAILY_JOB_DEFAULT_AT).split(':')
+    return int(hour), int(minute)
+
+
+def missed_daily_run(job_id, hour, minute, now=None):
+    """Whether today's run of a daily job is past without a successful run since."""
+    now = now or timezone.now()
+    due = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if due > now:
+        return False
+    last_success = JobStatus.objects.filter(job_id=job_id).values_list('last_success_at', flat=True).first()
+    return last_success is None or last_success < due
+
+
+def run_tracked(job_id, func, holder=''):
+    """Call func, recording the run in the JobStatus row of job_id; returns its result, or None if it raised."""
+    JobStatus.objects.get_or_create(job_id=job_id)
+    status = JobStatus.objects.filter(job_id=job_id)
+    status.update(runs=F('runs') + 1, last_started_at=timezone.now(), holder=holder)
+    began = timer.perf_counter()
+    try:
+        result = func()
+    except Exception as exc:
+        duration = timer.perf_counter() - began
+        logger.exception(f"Scheduled job {job_id} failed")
+        status.update(
+            failures=F('failures') + 1, total_duration=F('total_duration') + duration, last_duration=duration,
+            last_finished_at=timezone.now(), last_error=f"{type(exc).__name__}: {exc}",
+        )
+        return None
+    duration = timer.perf_counter() - began
+    finished = timezone.now()
+    status.update(
+        total_duration=F('total_duration') + duration, last_duration=duration,
+        last_finished_at=finished, last_success_at=finished, last_error='',
+    )
+    return result
+
+
+class LeaderScheduler:
+    """Runs JOBS and the reminder scheduler on an APScheduler scheduler while it holds the lease."""
+
+    def __init__(self, scheduler=None, holder=None, ttl=LEASE_TTL, jobs=JOBS, daily_jobs=DAILY_JOBS):
+        self.scheduler = scheduler or BackgroundScheduler(timezone=timezone.utc)
+        self.holder = holder or f"{socket.gethostname()}:{os.getpid()}"
+        self.ttl = ttl
+        self.jobs = jobs
+        self.daily_jobs = daily_jobs
+        self.reminders = None
+        self.leader = False
+        self.lease_until = None
+        self.stopped = False
+        self.lock = threading.RLock()
+
+    def start(self):
+        """Start electing; returns at once with a BackgroundScheduler, blocks with a BlockingScheduler."""
+        atexit.register(self.stop)
+        self.scheduler.add_job(
+            self.elect, 'interval', seconds=self.ttl.total_seconds() / 3, id=ELECTION_JOB,
+            next_run_time=timezone.now(), coalesce=True, max_instances=1,
+        )
+        self.scheduler.start()
+
+    def stop(self):
+        if self.scheduler.running:
+            self.scheduler.shutdown(wait=False)
+        with self.lock:
+            # An election already running must not promote this process again
+            self.stopped = True
+            if self.leader:
+                self.demote()
+                SchedulerLease.release(LEASE_NAME, self.holder)
+
+    def leading(self):
+        return self.leader and timezone.now() < self.lease_until
+
+    def elect(self):
+        close_old_connections()
+        now = timezone.now()
+        try:
+            won = SchedulerLease.acquire(LEASE_NAME, self.holder, self.ttl, now=now)
+        except Exception:
+            # Keep what we have: runs stop by themselves once the lease runs out locally
+            logger.exception("Scheduler election failed")
+            return
+        finally:
+            close_old_connections()
+        with self.lock:
+            if self.stopped:
+                if won:
+                    SchedulerLease.release(LEASE_NAME, self.holder)
+                return
+            if won:
+                self.lease_until = now + self.ttl
+                if not self.leader:
+                    self.promote()
+            elif self.leader:
+                self.demote()
+
+    def promote(self):
+        logger.info(f"{self.holder} is now running the scheduled jobs")
+        self.leader = True
+        for job_id, path, interval in self.jobs:
+            self.scheduler.add_job(
+                self.tracked(job_id, import_string(path)), 'interval', seconds=interval.total_seconds(),
+                id=job_id, next_run_time=timezone.now(), coalesce=True, max_instances=1, replace_existing=True,
+            )
+        for job_id, path, setting in self.daily_jobs:
+            hour, minute = daily_run_time(setting)
+            job = self.scheduler.add_job(
+                self.tracked(job_id, import_string(path)), 'cron', hour=hour, minute=minute, timezone=timezone.utc,
+                id=job_id, coalesce=True, max_instances=1, misfire_grace_time=None, replace_existing=True,
+            )
+            if missed_daily_run(job_id, hour, minute):
+                job.modify(next_run_time=timezone.now())
+        self.reminders = ReminderScheduler(self.scheduler, wrap=lambda run: self.tracked(REMINDERS_JOB, run))
+        self.reminders.start()
+
+    def demote(self):
+        logger.info(f"{self.holder} stopped running the scheduled jobs")
+        self.leader = False
+        if self.reminders is not None:
+            self.reminders.stop()
+            self.reminders = None
+        for job in self.scheduler.get_jobs():
+            if job.id == ELECTION_JOB:
+                continue
+            try:
+                job.remove()
+            except JobLookupError:
+                # A date job that just ran and was removed by the scheduler
+                pass
+
+    def tracked(self, job_id, func):
+        """func wrapped to run only while this process leads, recording each run."""
+        def run():
+            with self.lock:
+                if not self.leading():
+                    if self.leader:
+                        logger.warning(f"Lease of {self.holder} ran out before it could be renewed")
+                        self.demote()
+                    return None
+            close_old_connections()
+            try:
+                return run_tracked(job_id, func, self.holder)
+            finally:
+                close_old_connections()
+        return run
+
+
+_started = None
+_start_lock = threading.Lock()
+
+
+def start_scheduler():
+    """
+    Start this process's LeaderScheduler in the background, once, when
+    settings.SCHEDULER_ENABLED is set; returns it, or None when disabled.
+    """
+    global _started
+    if not getattr(settings, 'SCHEDULER_ENABLED', False):
+        return None
+    with _start_lock:
+        if _started is None:
+            _started = LeaderScheduler()
+            _started.start()
+    return _started
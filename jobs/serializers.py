@@ -0,0 +1,35 @@
+from rest_framework import serializers
+
+from .models import JobStatus, SchedulerLease
+
+
+class SchedulerLeaseSerializer(serializers.ModelSerializer):
+    active = serializers.SerializerMethodField()
+
+    class Meta:
+        model = SchedulerLease
+        fields = ['holder', 'expires_at', 'active']
+
+    def get_active(self, obj) -> bool:
+        return bool(obj.holder) and obj.expires_at is not None and obj.expires_at > self.context['now']
+
+
+class JobStatusSerializer(serializers.ModelSerializer):
+    average_duration = serializers.SerializerMethodField()
+
+    class Meta:
+        model = JobStatus
+        fields = [
+            'job_id', 'runs', 'failures', 'last_duration', 'average_duration', 'last_started_at',
+            'last_finished_at', 'last_success_at', 'last_error', 'holder',
+        ]
+
+    def get_average_duration(self, obj) -> float:
+        # Runs still in progress have no duration yet
+        finished = obj.runs - (obj.last_finished_at is None or obj.last_finished_at < obj.last_started_at)
+        return obj.total_duration / finished if finished > 0 else None
+
+
+class SchedulerOverviewSerializer(serializers.Serializer):
+    leader = SchedulerLeaseSerializer(allow_null=True)
+    jobs = JobStatusSerializer(many=True)
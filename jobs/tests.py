@@ -0,0 +1,162 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.cron import CronTrigger
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from jobs import runner
+from jobs.models import JobStatus, SchedulerLease
+from outbox.models import OutboxEmail
+from subscriptions import tasks
+from subscriptions.models import Order, Pack, SubscriptionHistory
+
+
+class FakeIfThenPay:
+    """Answers MB WAY status checks from a {request_id: status code} dict."""
+
+    def __init__(self, statuses):
+        self.statuses = statuses
+
+    def check_mbway_status(self, request_id, amount):
+        status = self.statuses[request_id]
+        return {
+            'success': True, 'status': status, 'message': '',
+            'is_paid': status == '000', 'is_rejected': status in ['020', '122'], 'is_expired': status == '101',
+        }
+
+
+class LeaderElectionTest(TestCase):
+    def test_lease_is_exclusive_until_it_expires(self):
+        now = timezone.now()
+        ttl = timedelta(seconds=60)
+        self.assertTrue(SchedulerLease.acquire('scheduler', 'a', ttl, now=now))
+        self.assertFalse(SchedulerLease.acquire('scheduler', 'b', ttl, now=now + timedelta(seconds=30)))
+        self.assertTrue(SchedulerLease.acquire('scheduler', 'a', ttl, now=now + timedelta(seconds=30)))
+        self.assertFalse(SchedulerLease.acquire('scheduler', 'b', ttl, now=now + timedelta(seconds=60)))
+        self.assertTrue(SchedulerLease.acquire('scheduler', 'b', ttl, now=now + timedelta(seconds=90)))
+
+        SchedulerLease.release('scheduler', 'a')
+        self.assertEqual(SchedulerLease.objects.get().holder, 'b')
+        SchedulerLease.release('scheduler', 'b')
+        self.assertTrue(SchedulerLease.acquire('scheduler', 'a', ttl, now=now + timedelta(seconds=91)))
+
+    def test_only_the_leader_runs_the_jobs(self):
+        first = runner.LeaderScheduler(BackgroundScheduler(timezone=timezone.utc), holder='first')
+        second = runner.LeaderScheduler(BackgroundScheduler(timezone=timezone.utc), holder='second')
+        first.elect()
+        second.elect()
+        self.assertTrue(first.leading())
+        self.assertFalse(second.leader)
+        jobs = {job.id: job for job in first.scheduler.get_jobs()}
+        self.assertTrue({'outbox', 'expire_orders', 'mbway_payments', 'day_before_reminders'} < set(jobs))
+        self.assertEqual(len(jobs), 5, 'plus the reminder scheduler')
+        self.assertIsInstance(jobs['day_before_reminders'].trigger, CronTrigger)
+        self.assertEqual(str(jobs['day_before_reminders'].trigger.fields[5]), '18')
+        self.assertEqual(second.scheduler.get_jobs(), [])
+
+        # The first one stops renewing: its runs stop, then the second one takes over
+        calls = []
+        run = first.tracked('probe', lambda: calls.append(1))
+        run()
+        first.lease_until = timezone.now()
+        run()
+        self.assertEqual(calls, [1])
+        self.assertFalse(first.leader)
+        self.assertEqual(first.scheduler.get_jobs(), [])
+
+        SchedulerLease.objects.update(expires_at=timezone.now())
+        second.elect()
+        first.elect()
+        self.assertTrue(second.leading())
+        self.assertFalse(first.leader)
+        self.assertEqual(JobStatus.objects.get(job_id='probe').holder, 'first')
+
+    def test_missed_daily_run_is_caught_up(self):
+        now = datetime(2030, 1, 10, 19, 0, tzinfo=dt_timezone.utc)
+        self.assertTrue(runner.missed_daily_run('day_before_reminders', 18, 0, now=now))
+        self.assertFalse(runner.missed_daily_run('day_before_reminders', 20, 0, now=now))
+        JobStatus.objects.create(job_id='day_before_reminders', last_success_at=now - timedelta(minutes=30))
+        self.assertFalse(runner.missed_daily_run('day_before_reminders', 18, 0, now=now))
+        self.assertTrue(runner.missed_daily_run('day_before_reminders', 18, 0, now=now + timedelta(days=1)))
+
+    def test_run_tracked_records_success_and_failure(self):
+        self.assertEqual(runner.run_tracked('sweep', lambda: 3, holder='me'), 3)
+        status = JobStatus.objects.get(job_id='sweep')
+        self.assertEqual((status.runs, status.failures, status.holder, status.last_error), (1, 0, 'me', ''))
+        self.assertEqual(status.last_success_at, status.last_finished_at)
+
+        def broken():
+            raise ValueError('no database')
+
+        self.assertIsNone(runner.run_tracked('sweep', broken))
+        status.refresh_from_db()
+        self.assertEqual((status.runs, status.failures), (2, 1))
+        self.assertEqual(status.last_error, 'ValueError: no database')
+        self.assertLess(status.last_success_at, status.last_finished_at)
+
+
+class OrderTasksTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='client@example.com', password='testpass', full_name='Client', role='client',
+        )
+        self.pack = Pack.objects.create(title='10 hours', price=100, total_hours=10)
+
+    def order(self, **fields):
+        return Order.objects.create(user=self.user, pack=self.pack, amount=100, **fields)
+
+    def test_expire_orders(self):
+        now = timezone.now()
+        expired = self.order(payment_method='multibanco', expiry_date=now - timedelta(days=1))
+        valid = self.order(payment_method='multibanco', expiry_date=now + timedelta(days=1))
+        stale_mbway = self.order(payment_method='mbway', request_id='r1')
+        Order.objects.filter(pk=stale_mbway.pk).update(created_at=now - timedelta(hours=1))
+        fresh_mbway = self.order(payment_method='mbway', request_id='r2')
+
+        self.assertEqual(tasks.expire_orders(now), 2)
+        states = dict(Order.objects.values_list('pk', 'payment_status'))
+        self.assertEqual(states[expired.pk], 'Cancelado')
+        self.assertEqual(states[stale_mbway.pk], 'Cancelado')
+        self.assertEqual(states[valid.pk], 'Pendente')
+        self.assertEqual(states[fresh_mbway.pk], 'Pendente')
+
+    def test_poll_mbway_payments(self):
+        self.order(payment_method='mbway', request_id='paid')
+        self.order(payment_method='mbway', request_id='rejected')
+        self.order(payment_method='mbway', request_id='waiting')
+        service = FakeIfThenPay({'paid': '000', 'rejected': '020', 'waiting': '123'})
+
+        self.assertEqual(tasks.poll_mbway_payments(service=service), {'checked': 3, 'paid': 1, 'cancelled': 1})
+        states = dict(Order.objects.values_list('request_id', 'payment_status'))
+        self.assertEqual(states, {'paid': 'Pago', 'rejected': 'Cancelado', 'waiting': 'Pendente'})
+        self.assertEqual(SubscriptionHistory.objects.get().hours_added, 10)
+        self.assertEqual(OutboxEmail.objects.get().recipients, ['client@example.com'])
+
+        # Already settled orders are left alone
+        self.assertEqual(tasks.poll_mbway_payments(service=service), {'checked': 1, 'paid': 0, 'cancelled': 0})
+
+
+class JobStatusViewTest(TestCase):
+    def test_admin_only(self):
+        User = get_user_model()
+        admin = User.objects.create_user(email='admin@example.com', password='testpass', full_name='Admin', role='admin')
+        client = User.objects.create_user(email='client@example.com', password='testpass', full_name='Client', role='client')
+        SchedulerLease.acquire(runner.LEASE_NAME, 'web-1', runner.LEASE_TTL)
+        runner.run_tracked('outbox', lambda: None, holder='web-1')
+        api = APIClient()
+
+        self.assertEqual(api.get(reverse('jobs:status')).status_code, 401)
+        api.force_authenticate(client)
+        self.assertEqual(api.get(reverse('jobs:status')).status_code, 403)
+        api.force_authenticate(admin)
+        resp = api.get(reverse('jobs:status'))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual((resp.data['leader']['holder'], resp.data['leader']['active']), ('web-1', True))
+        self.assertEqual([job['job_id'] for job in resp.data['jobs']], ['outbox'])
+        self.assertEqual(resp.data['jobs'][0]['runs'], 1)
+        self.assertIsNotNone(resp.data['jobs'][0]['last_success_at'])
+        self.assertIsNotNone(resp.data['jobs'][0]['average_duration'])
@@ -0,0 +1,22 @@
+from django.utils import timezone
+from drf_spectacular.utils import extend_schema
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from reservation.permissions import IsAdminUser
+from .models import JobStatus, SchedulerLease
+from .runner import LEASE_NAME
+from .serializers import SchedulerOverviewSerializer
+
+
+class JobStatusView(APIView):
+    """Which process runs the scheduled jobs, and how their runs went."""
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(responses=SchedulerOverviewSerializer)
+    def get(self, request):
+        overview = {
+            'leader': SchedulerLease.objects.filter(name=LEASE_NAME).first(),
+            'jobs': JobStatus.objects.order_by('job_id'),
+        }
+        return Response(SchedulerOverviewSerializer(overview, context={'now': timezone.now()}).data)
@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import OutboxEmail
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ('id', 'subject', 'lane', 'state', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    list_filter = ('state', 'lane')
+    search_fields = ('subject',)
+    readonly_fields = ('created_at', 'sent_at')
@@ -0,0 +1,105 @@
+"""
+Delivery of queued OutboxEmail rows.
+
+A worker claims a batch of due pending emails, most urgent lane first, by pushing their
+next_attempt_at CLAIM_TIMEOUT ahead inside a short transaction (skipping rows another
+worker has locked where the database supports it), then sends them one by one over a
+single open SMTP connection reused for the whole drain. Sent emails are marked sent in
+one UPDATE; failed ones are retried with exponential backoff until MAX_ATTEMPTS, then
+marked failed. A worker that dies mid-batch leaves its claimed emails to be picked up
+again once the claim times out, so delivery is at least once.
+"""
+import logging
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 100
+MAX_ATTEMPTS = 8
+CLAIM_TIMEOUT = timedelta(minutes=10)
+BACKOFF_BASE = timedelta(minutes=1)
+BACKOFF_MAX = timedelta(hours=6)
+
+
+def backoff(attempts):
+    """Wait before the retry following the given number of attempts."""
+    return min(BACKOFF_BASE * 2 ** min(attempts - 1, 16), BACKOFF_MAX)
+
+
+def claim(batch_size=BATCH_SIZE, lanes=None):
+    """Lease up to batch_size due pending emails to this worker, counting the attempt."""
+    now = timezone.now()
+    with transaction.atomic():
+        due = OutboxEmail.objects.filter(
+            state=OutboxEmail.PENDING, next_attempt_at__lte=now,
+        ).order_by('lane', 'next_attempt_at', 'id')
+        if lanes is not None:
+            due = due.filter(lane__in=lanes)
+        if connections[due.db].features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        emails = list(due[:batch_size])
+        OutboxEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+            next_attempt_at=now + CLAIM_TIMEOUT, attempts=F('attempts') + 1,
+        )
+    for email in emails:
+        email.attempts += 1
+    return emails
+
+
+def deliver(emails, connection):
+    """Send claimed emails over connection and record the outcome; returns (sent, retried, failed)."""
+    sent = []
+    retried = failed = 0
+    for email in emails:
+        message = EmailMessage(email.subject, email.body, email.from_email, email.recipients, connection=connection)
+        try:
+            # Opening an already open connection is a no-op; send_messages only closes
+            # connections it opened itself, so this one stays up across the drain
+            connection.open()
+            connection.send_messages([message])
+        except Exception as exc:
+            # The session may be unusable after an SMTP error; start a fresh one
+            connection.close()
+            error = f"{type(exc).__name__}: {exc}"
+            if email.attempts >= MAX_ATTEMPTS:
+                failed += 1
+                OutboxEmail.objects.filter(pk=email.pk).update(state=OutboxEmail.FAILED, last_error=error)
+                logger.error(f"Giving up on outbox email {email.pk} after {email.attempts} attempts: {error}")
+            else:
+                retried += 1
+                OutboxEmail.objects.filter(pk=email.pk).update(
+                    next_attempt_at=timezone.now() + backoff(email.attempts), last_error=error,
+                )
+                logger.warning(f"Outbox email {email.pk} failed (attempt {email.attempts}), will retry: {error}")
+        else:
+            sent.append(email.pk)
+    OutboxEmail.objects.filter(pk__in=sent).update(state=OutboxEmail.SENT, sent_at=timezone.now(), last_error='')
+    return len(sent), retried, failed
+
+
+def drain(batch_size=BATCH_SIZE, lanes=None, connection=None):
+    """
+    Send every email due now, batch after batch over one connection.
+    Returns {'sent': n, 'retried': n, 'failed': n}.
+    """
+    totals = {'sent': 0, 'retried': 0, 'failed': 0}
+    connection = connection or get_connection(fail_silently=False)
+    try:
+        while True:
+            emails = claim(batch_size, lanes)
+            if not emails:
+                break
+            sent, retried, failed = deliver(emails, connection)
+            totals['sent'] += sent
+            totals['retried'] += retried
+            totals['failed'] += failed
+    finally:
+        connection.close()
+    return totals
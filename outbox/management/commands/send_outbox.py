@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from outbox import delivery
+
+
+class Command(BaseCommand):
+    help = (
+        'Send the queued outbox emails that are due, transactional mail before reminders, '
+        'over one SMTP connection. With --loop, keep polling for new ones.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=delivery.BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true', help='Keep running, polling every --interval seconds.')
+        parser.add_argument('--interval', type=float, default=5.0)
+
+    def handle(self, *args, **options):
+        while True:
+            totals = delivery.drain(batch_size=options['batch_size'])
+            if any(totals.values()) or not options['loop']:
+                self.stdout.write(
+                    f"Sent {totals['sent']}, retrying {totals['retried']}, failed {totals['failed']}."
+                )
+            if not options['loop']:
+                return
+            try:
+                time.sleep(options['interval'])
+            except KeyboardInterrupt:
+                return
@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class OutboxEmail(models.Model):
+    """
+    An email waiting to be sent by `manage.py send_outbox`. Enqueue it inside the
+    transaction whose outcome it reports: it only becomes visible to the worker once that
+    transaction commits, and disappears with it on rollback.
+    """
+    # Lanes are drained in ascending order, so transactional mail never waits behind reminders
+    TRANSACTIONAL = 0
+    REMINDER = 1
+    LANE_CHOICES = [
+        (TRANSACTIONAL, 'Transactional'),
+        (REMINDER, 'Reminder'),
+    ]
+
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATE_CHOICES = [
+        (PENDING, 'Pending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    ]
+
+    lane = models.PositiveSmallIntegerField(choices=LANE_CHOICES, default=TRANSACTIONAL)
+    state = models.CharField(max_length=10, choices=STATE_CHOICES, default=PENDING)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    recipients = models.JSONField(help_text='List of addresses')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['state', 'lane', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)}"
+
+    @classmethod
+    def enqueue(cls, subject, message, recipient_list, lane=TRANSACTIONAL, from_email=None):
+        """Queue an email; takes the arguments of django.core.mail.send_mail."""
+        return cls.objects.create(
+            lane=lane,
+            subject=subject[:cls._meta.get_field('subject').max_length],
+            body=message,
+            from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+            recipients=list(recipient_list),
+        )
@@ -0,0 +1,99 @@
+from datetime import date, timedelta
+from io import StringIO
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+
+from outbox import delivery
+from outbox.models import OutboxEmail
+from reservation.serializers import BookingSerializer
+
+
+class FlakyBackend(EmailBackend):
+    """locmem backend refusing every message addressed to a bounce@ address."""
+    instances = 0
+
+    def __init__(self, *args, **kwargs):
+        FlakyBackend.instances += 1
+        super().__init__(*args, **kwargs)
+
+    def send_messages(self, messages):
+        if any(address.startswith('bounce@') for message in messages for address in message.to):
+            raise ConnectionError('refused')
+        return super().send_messages(messages)
+
+
+class OutboxDeliveryTest(TestCase):
+    def test_transactional_lane_goes_first(self):
+        OutboxEmail.enqueue('Reminder', 'Tomorrow', ['a@example.com'], lane=OutboxEmail.REMINDER)
+        OutboxEmail.enqueue('Booked', 'Confirmed', ['b@example.com'])
+        totals = delivery.drain()
+        self.assertEqual(totals, {'sent': 2, 'retried': 0, 'failed': 0})
+        self.assertEqual([message.subject for message in mail.outbox], ['Booked', 'Reminder'])
+        self.assertFalse(OutboxEmail.objects.exclude(state=OutboxEmail.SENT).exists())
+        self.assertEqual(delivery.drain()['sent'], 0)
+
+    @override_settings(EMAIL_BACKEND='outbox.tests.FlakyBackend')
+    def test_failures_back_off_then_give_up(self):
+        OutboxEmail.enqueue('Hello', 'Body', ['ok@example.com'])
+        bounce = OutboxEmail.enqueue('Hello', 'Body', ['bounce@example.com'])
+        self.assertEqual(delivery.drain(), {'sent': 1, 'retried': 1, 'failed': 0})
+        bounce.refresh_from_db()
+        self.assertEqual((bounce.state, bounce.attempts), (OutboxEmail.PENDING, 1))
+        self.assertGreater(bounce.next_attempt_at, timezone.now())
+        self.assertIn('refused', bounce.last_error)
+
+        OutboxEmail.objects.filter(pk=bounce.pk).update(attempts=delivery.MAX_ATTEMPTS - 1, next_attempt_at=timezone.now())
+        self.assertEqual(delivery.drain(), {'sent': 0, 'retried': 0, 'failed': 1})
+        bounce.refresh_from_db()
+        self.assertEqual(bounce.state, OutboxEmail.FAILED)
+
+    def test_backoff_grows_to_a_cap(self):
+        self.assertEqual(delivery.backoff(1), delivery.BACKOFF_BASE)
+        self.assertEqual(delivery.backoff(3), delivery.BACKOFF_BASE * 4)
+        self.assertEqual(delivery.backoff(50), delivery.BACKOFF_MAX)
+
+    def test_command(self):
+        OutboxEmail.enqueue('Booked', 'Confirmed', ['b@example.com'])
+        out = StringIO()
+        call_command('send_outbox', stdout=out)
+        self.assertIn('Sent 1', out.getvalue())
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_booking_mail_is_written_with_the_booking(self):
+        User = get_user_model()
+        professional = User.objects.create_user(email='pro@example.com', password='testpass', full_name='Pro', role='professional')
+        customer = User.objects.create_user(email='client@example.com', password='testpass', full_name='Client', role='client')
+        data = {
+            'professional': professional.id, 'customer': customer.id,
+            'data': (date.today() + timedelta(days=1)).isoformat(), 'start_time': '09:00', 'end_time': '10:00',
+        }
+        serializer = BookingSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            serializer.save()
+            transaction.set_rollback(True)
+        self.assertFalse(OutboxEmail.objects.exists())
+
+        serializer = BookingSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        self.assertEqual(
+            sorted(address for recipients in OutboxEmail.objects.values_list('recipients', flat=True) for address in recipients),
+            ['client@example.com', 'pro@example.com'],
+        )
+        self.assertEqual(len(mail.outbox), 0)
+
+    @override_settings(EMAIL_BACKEND='outbox.tests.FlakyBackend')
+    def test_one_connection_per_drain(self):
+        for index in range(5):
+            OutboxEmail.enqueue('Hello', 'Body', [f'user{index}@example.com'])
+        FlakyBackend.instances = 0
+        self.assertEqual(delivery.drain(batch_size=2)['sent'], 5)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(FlakyBackend.instances, 1)
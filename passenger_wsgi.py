@@ -6,4 +6,8 @@ sys.path.insert(0, '/home/estelatechnologi/FisioActif')
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'FisioActif.settings')
 
 from django.core.wsgi import get_wsgi_application
-application = get_wsgi_application()
\ No newline at end of file
+application = get_wsgi_application()
+
+# Passenger starts every worker process on its own; the scheduler lease picks the one running the jobs
+from jobs.runner import start_scheduler
+start_scheduler()
@@ -1,3 +1,11 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import AvailabilityException
+
+
+@admin.register(AvailabilityException)
+class AvailabilityExceptionAdmin(admin.ModelAdmin):
+    list_display = ('id', 'professional', 'date_from', 'date_to', 'start_time', 'end_time', 'reason')
+    list_filter = ('date_from',)
+    search_fields = ('reason', 'professional__full_name', 'professional__email')
+    raw_id_fields = ('professional',)
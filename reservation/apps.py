@@ -5,4 +5,7 @@ class ReservationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     # Use the label 'bookings' so existing migrations and DB tables remain associated.
     name = 'reservation'
-    label = 'bookings'
\ No newline at end of file
+    label = 'bookings'
+
+    def ready(self):
+        import reservation.signals
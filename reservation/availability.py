@@ -0,0 +1,189 @@
+"""
+Availability engine for professional time slots.
+
+Everything here works on minute offsets from midnight (0..1440) so a day is
+described by a couple of small sorted lists instead of datetime objects:
+
+- the working window (start, end) taken from the professional's compiled weekly
+  schedule (see user.schedule)
+- the busy intervals (bookings, breaks and availability exceptions), merged once
+- the free windows, i.e. the gaps between busy intervals
+
+Slots are then emitted straight from the free windows on the 15 minute grid
+anchored at the professional's start time, which keeps the cost proportional
+to the number of bookings and slots rather than steps x bookings.
+"""
+from datetime import timedelta
+
+from user.schedule import get_weekly_schedule, to_minutes
+
+SLOT_STEP = 15
+
+# 'HH:MM' label for every minute of the day, built once at import time.
+MINUTE_LABELS = tuple(f"{m // 60:02d}:{m % 60:02d}" for m in range(24 * 60 + 1))
+
+
+def daterange(start_date, end_date):
+    """Yield every date from start_date to end_date inclusive."""
+    for n in range((end_date - start_date).days + 1):
+        yield start_date + timedelta(n)
+
+
+def working_hours(professional, date_obj):
+    """
+    Return (start, end, breaks) in minutes for the professional's schedule on date_obj,
+    or None if the professional does not work that day.
+    """
+    return get_weekly_schedule(professional)[date_obj.weekday()]
+
+
+def booking_intervals(rows):
+    """Turn (start_time, end_time) rows into minute intervals, skipping incomplete ones."""
+    intervals = []
+    for start, end in rows:
+        if start and end and end >= start:
+            end_minutes = end.hour * 60 + end.minute
+            if end.second or end.microsecond:
+                end_minutes += 1
+            intervals.append((start.hour * 60 + start.minute, end_minutes))
+    return intervals
+
+
+def exception_intervals(exceptions, day):
+    """
+    Return the minute intervals blocked on day by (date_from, date_to, start_time, end_time)
+    exception rows, or None when one of them blocks the whole day.
+    """
+    intervals = []
+    for date_from, date_to, start_time, end_time in exceptions:
+        if not date_from <= day <= date_to:
+            continue
+        if start_time is None or end_time is None:
+            return None
+        intervals.append((to_minutes(start_time), to_minutes(end_time, round_up=True)))
+    return intervals
+
+
+def merge_intervals(intervals):
+    """Sort and merge overlapping intervals; touching ones stay separate (a zero-length gap between them)."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start < merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def saturated_intervals(intervals, capacity):
+    """Return the sorted parts of the day covered by at least capacity of the intervals at once."""
+    if capacity <= 1:
+        return merge_intervals(intervals)
+    # An interval ending where another starts does not overlap it, so ends sort first
+    intervals = [(start, end) for start, end in intervals if start < end]
+    events = sorted([(start, 1) for start, _ in intervals] + [(end, -1) for _, end in intervals])
+    saturated = []
+    depth = 0
+    for minute, step in events:
+        depth += step
+        if step == 1 and depth == capacity:
+            saturated.append([minute, None])
+        elif step == -1 and depth == capacity - 1:
+            saturated[-1][1] = minute
+    return saturated
+
+
+def free_windows(open_start, open_end, busy):
+    """Return the gaps of [open_start, open_end] that are not covered by the busy intervals."""
+    windows = []
+    cursor = open_start
+    for start, end in merge_intervals(busy):
+        if end < cursor:
+            continue
+        if start > open_end:
+            break
+        if start >= cursor:
+            windows.append((cursor, start))
+        cursor = max(cursor, end)
+    if cursor <= open_end:
+        windows.append((cursor, open_end))
+    return windows
+
+
+def slot_starts(windows, duration, origin, step=SLOT_STEP):
+    """
+    Return the start minute of every slot of `duration` that fits inside a free window,
+    with starts aligned to `origin` + k * `step`.
+    """
+    starts = []
+    last = -1
+    for window_start, window_end in windows:
+        offset = (window_start - origin) % step
+        current = window_start + (step - offset if offset else 0)
+        latest = window_end - duration
+        while current <= latest:
+            if current > last:
+                starts.append(current)
+                last = current
+            current += step
+    return starts
+
+
+def format_slots(starts, duration):
+    """Render slot starts as the [{'start': 'HH:MM', 'end': 'HH:MM'}] payload."""
+    return [
+        {'start': MINUTE_LABELS[start], 'end': MINUTE_LABELS[start + duration]}
+        for start in starts
+    ]
+
+
+def compute_day_slots(hours, bookings, duration):
+    """
+    Return the slot starts for one day.
+    hours is the result of working_hours(), bookings a list of minute intervals.
+    """
+    if hours is None:
+        return []
+    open_start, open_end, breaks = hours
+    windows = free_windows(open_start, open_end, [*breaks, *bookings])
+    return slot_starts(windows, duration, open_start)
+
+
+def within_window(starts, duration, window):
+    """Keep the slots that start and end inside window, a (start, end) pair in minutes."""
+    window_start, window_end = window
+    return [start for start in starts if start >= window_start and start + duration <= window_end]
+
+
+def start_ranges(windows, duration):
+    """Inclusive (first, last) start minutes that fit duration inside each free window."""
+    return [(start, end - duration) for start, end in windows if end - start >= duration]
+
+
+def union_start_ranges(resource_windows, duration):
+    """
+    Merge the start ranges of several interchangeable resources (e.g. rooms): a start is
+    feasible when at least one resource is free for the whole duration.
+    """
+    merged = []
+    for first, last in sorted(r for windows in resource_windows for r in start_ranges(windows, duration)):
+        if merged and first <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], last)
+        else:
+            merged.append([first, last])
+    return merged
+
+
+def intersect_starts(starts, ranges):
+    """Keep the sorted starts falling inside one of the sorted, disjoint inclusive ranges."""
+    kept = []
+    index = 0
+    for start in starts:
+        while index < len(ranges) and ranges[index][1] < start:
+            index += 1
+        if index == len(ranges):
+            break
+        if start >= ranges[index][0]:
+            kept.append(start)
+    return kept
@@ -0,0 +1,163 @@
+"""
+Cache for computed slot starts, keyed by professional, date and total duration.
+
+Entries are never deleted one by one. Instead every key embeds version tokens:
+
+- a per professional-day token, bumped when a booking or exception of that day changes
+- a per professional-weekday token, bumped when that weekday's schedule changes
+- a global token, bumped when a studio-wide exception changes
+
+so invalidating a professional-day makes every cached duration of that day
+unreachable at once. Free room time is cached per day the same way, under a per-day
+rooms token (bumped by any booking change that day) and a rooms token (bumped when
+rooms change). Missing tokens are replaced by fresh random ones, so an
+evicted token can never resurrect an older entry.
+
+The cache lives in the default Django cache. With several workers that backend
+must be shared (database, memcached, ...) for invalidation to reach every process.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+KEY_PREFIX = 'availability'
+HITS_KEY = f'{KEY_PREFIX}:stats:hits'
+MISSES_KEY = f'{KEY_PREFIX}:stats:misses'
+GLOBAL_VERSION_KEY = f'{KEY_PREFIX}:v:global'
+ROOMS_VERSION_KEY = f'{KEY_PREFIX}:v:rooms'
+
+
+def _timeout():
+    return getattr(settings, 'AVAILABILITY_CACHE_TIMEOUT', 300)
+
+
+def _day_version_key(professional_id, day):
+    return f'{KEY_PREFIX}:v:day:{professional_id}:{day.isoformat()}'
+
+
+def _weekday_version_key(professional_id, weekday):
+    return f'{KEY_PREFIX}:v:week:{professional_id}:{weekday}'
+
+
+def _room_day_version_key(day):
+    return f'{KEY_PREFIX}:v:roomday:{day.isoformat()}'
+
+
+def _versions(version_keys):
+    """Fetch version tokens, creating fresh ones for keys that are missing."""
+    versions = cache.get_many(version_keys)
+    missing = [key for key in version_keys if key not in versions]
+    if missing:
+        for key in missing:
+            cache.add(key, uuid.uuid4().hex, None)
+        versions.update(cache.get_many(missing))
+    return versions
+
+
+def _count(key, amount):
+    if amount:
+        cache.add(key, 0, None)
+        try:
+            cache.incr(key, amount)
+        except ValueError:
+            cache.set(key, amount, None)
+
+
+def lookup(pairs, duration):
+    """
+    Look up cached slot starts for (professional_id, date) pairs.
+    Returns (hits, keys): hits maps pair -> starts, keys maps every pair to its cache key
+    so the caller can store() what it had to compute.
+    """
+    version_keys = {GLOBAL_VERSION_KEY}
+    for professional_id, day in pairs:
+        version_keys.add(_day_version_key(professional_id, day))
+        version_keys.add(_weekday_version_key(professional_id, day.weekday()))
+    versions = _versions(list(version_keys))
+
+    keys = {}
+    for professional_id, day in pairs:
+        keys[professional_id, day] = '{}:slots:{}:{}:{}:{}:{}:{}'.format(
+            KEY_PREFIX, professional_id, day.isoformat(), duration,
+            versions.get(_day_version_key(professional_id, day)),
+            versions.get(_weekday_version_key(professional_id, day.weekday())),
+            versions.get(GLOBAL_VERSION_KEY),
+        )
+    cached = cache.get_many(list(keys.values()))
+    hits = {pair: cached[key] for pair, key in keys.items() if key in cached}
+
+    _count(HITS_KEY, len(hits))
+    _count(MISSES_KEY, len(keys) - len(hits))
+    return hits, keys
+
+
+def lookup_rooms(days, duration, room_id=None):
+    """
+    Look up cached room start ranges for days, for any active room or only room_id.
+    Returns (hits, keys) like lookup(), keyed by date.
+    """
+    versions = _versions([ROOMS_VERSION_KEY, *(_room_day_version_key(day) for day in days)])
+    keys = {
+        day: '{}:rooms:{}:{}:{}:{}:{}'.format(
+            KEY_PREFIX, day.isoformat(), duration, 'any' if room_id is None else room_id,
+            versions.get(_room_day_version_key(day)), versions.get(ROOMS_VERSION_KEY),
+        )
+        for day in days
+    }
+    cached = cache.get_many(list(keys.values()))
+    return {day: cached[key] for day, key in keys.items() if key in cached}, keys
+
+
+def store(entries):
+    """Store {cache key: starts} returned by lookup()."""
+    if entries:
+        cache.set_many(entries, _timeout())
+
+
+def invalidate_day(professional_id, day):
+    """Drop every cached duration for one professional-day, and the free room time of that day."""
+    if professional_id and day:
+        cache.set_many({
+            _day_version_key(professional_id, day): uuid.uuid4().hex,
+            _room_day_version_key(day): uuid.uuid4().hex,
+        }, None)
+
+
+def invalidate_rooms():
+    """Drop the cached free time of every room, after rooms are added, changed or removed."""
+    cache.set(ROOMS_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def invalidate_days(professional_id, days):
+    """Drop every cached duration for several days of one professional."""
+    cache.set_many(
+        {_day_version_key(professional_id, day): uuid.uuid4().hex for day in days},
+        None,
+    )
+
+
+def invalidate_all():
+    """Drop every cached day of every professional."""
+    cache.set(GLOBAL_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def invalidate_weekdays(professional_id, weekdays):
+    """Drop every cached day falling on the given weekdays (0 = Monday) for a professional."""
+    cache.set_many(
+        {_weekday_version_key(professional_id, weekday): uuid.uuid4().hex for weekday in weekdays},
+        None,
+    )
+
+
+def stats():
+    """Hit/miss counters since the cache was last cleared."""
+    counters = cache.get_many([HITS_KEY, MISSES_KEY])
+    hits = counters.get(HITS_KEY, 0)
+    misses = counters.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total, 4) if total else None,
+    }
@@ -0,0 +1,77 @@
+"""
+Columnar calendar payload.
+
+Bookings come back as parallel arrays (index i of every array describes the same
+booking) and refer to professionals, customers and classes by id; each of those is
+described once in a lookup table. The payload and the work to build it grow with the
+number of distinct people and classes in the range, not with one nested object per
+booking. Everything is read with a single projected query.
+"""
+
+# (array, queryset lookup) of the per-booking columns
+CALENDAR_COLUMNS = (
+    ('id', 'id'),
+    ('date', 'data'),
+    ('start', 'start_time'),
+    ('end', 'end_time'),
+    ('state', 'state'),
+    ('title', 'title'),
+    ('professional', 'professional_id'),
+    ('customer', 'customer_id'),
+    ('class', 'class_id_id'),
+    ('room', 'room_id'),
+)
+
+# table: (id lookup, {key: lookup}) for the entities bookings refer to
+CALENDAR_TABLES = {
+    'professionals': ('professional_id', {
+        'full_name': 'professional__full_name',
+        'email': 'professional__email',
+        'color_scheme': 'professional__color_scheme',
+    }),
+    'customers': ('customer_id', {
+        'full_name': 'customer__full_name',
+        'email': 'customer__email',
+    }),
+    'classes': ('class_id_id', {
+        'name': 'class_id__name',
+    }),
+}
+
+CALENDAR_LOOKUPS = list(dict.fromkeys(
+    [lookup for _, lookup in CALENDAR_COLUMNS]
+    + [lookup for _, fields in CALENDAR_TABLES.values() for lookup in fields.values()]
+))
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+CONVERTERS = {'date': _isoformat, 'start': _isoformat, 'end': _isoformat}
+
+
+def columnar_calendar(queryset):
+    """{'bookings': {array: [...]}, 'professionals': {id: {...}}, 'customers': ..., 'classes': ...}"""
+    index = {lookup: position for position, lookup in enumerate(CALENDAR_LOOKUPS)}
+    rows = queryset.order_by('data', 'start_time', 'id').values_list(*CALENDAR_LOOKUPS)
+
+    columns = {name: [] for name, _ in CALENDAR_COLUMNS}
+    appends = [
+        (columns[name].append, index[lookup], CONVERTERS.get(name))
+        for name, lookup in CALENDAR_COLUMNS
+    ]
+    tables = {name: {} for name in CALENDAR_TABLES}
+    table_specs = [
+        (tables[name], index[id_lookup], [(key, index[lookup]) for key, lookup in fields.items()])
+        for name, (id_lookup, fields) in CALENDAR_TABLES.items()
+    ]
+    for row in rows:
+        for append, position, convert in appends:
+            value = row[position]
+            append(convert(value) if convert else value)
+        for table, id_position, fields in table_specs:
+            entity_id = row[id_position]
+            if entity_id is not None and entity_id not in table:
+                table[entity_id] = {key: row[position] for key, position in fields}
+    return {'bookings': columns, **tables}
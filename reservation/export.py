@@ -0,0 +1,84 @@
+"""
+Streaming export of reservations as CSV or NDJSON.
+
+Rows are read in keyset chunks over (data, start_time, id) rather than with one big
+query, because the MySQL driver buffers a whole result set client-side even with
+QuerySet.iterator(). Each chunk is fetched as plain tuples and written out before the
+next one is read, so memory stays flat however long the exported range is.
+"""
+import csv
+import json
+from decimal import Decimal
+
+from django.db import connections
+
+from .pagination import keyset_after
+
+EXPORT_CHUNK_SIZE = 2000
+
+# (column, queryset lookup)
+EXPORT_COLUMNS = (
+    ('id', 'id'),
+    ('date', 'data'),
+    ('start_time', 'start_time'),
+    ('end_time', 'end_time'),
+    ('state', 'state'),
+    ('title', 'title'),
+    ('professional_id', 'professional_id'),
+    ('professional', 'professional__full_name'),
+    ('customer_id', 'customer_id'),
+    ('customer', 'customer__full_name'),
+    ('class_id', 'class_id_id'),
+    ('class', 'class_id__name'),
+    ('room_id', 'room_id'),
+    ('room', 'room__name'),
+    ('services', 'services'),
+    ('total_duration', 'total_duration'),
+    ('total_price', 'total_price'),
+    ('coupon', 'coupon'),
+)
+EXPORT_HEADERS = [column for column, _ in EXPORT_COLUMNS]
+_LOOKUPS = [lookup for _, lookup in EXPORT_COLUMNS]
+_ID, _DATA, _START_TIME = (_LOOKUPS.index(lookup) for lookup in ('id', 'data', 'start_time'))
+
+
+def iter_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield the EXPORT_COLUMNS tuples of the dated bookings of queryset in (data, start_time, id) order."""
+    nulls_largest = connections[queryset.db].features.nulls_order_largest
+    queryset = queryset.filter(data__isnull=False).order_by('data', 'start_time', 'id').values_list(*_LOOKUPS)
+    chunk = queryset
+    while True:
+        rows = list(chunk[:chunk_size])
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        last = rows[-1]
+        chunk = queryset.filter(keyset_after(last[_DATA], last[_START_TIME], last[_ID], nulls_largest))
+
+
+def _serialize(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+class _Echo:
+    """File-like object whose write() returns the line, for csv.writer to stream through."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_HEADERS)
+    for row in rows:
+        yield writer.writerow([_serialize(value) for value in row])
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(
+            {column: _serialize(value) for column, value in zip(EXPORT_HEADERS, row)},
+            separators=(',', ':'),
+        ) + '\n'
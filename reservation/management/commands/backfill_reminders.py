@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from reservation.models import Booking, ScheduledReminder
+from reservation.reminders import SCHEDULE_BATCH_SIZE, schedule_bookings
+
+
+class Command(BaseCommand):
+    help = 'Schedule the reminders of every upcoming booking, keeping those already scheduled or queued.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=SCHEDULE_BATCH_SIZE, help='Bookings read per batch.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        # Only bookings that have not started can still have a reminder ahead
+        upcoming = Booking.objects.filter(data__gte=timezone.now().date()).order_by('pk')
+        before = ScheduledReminder.objects.count()
+        last_id = 0
+        bookings = 0
+        while True:
+            ids = list(upcoming.filter(pk__gt=last_id).values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            schedule_bookings(ids)
+            bookings += len(ids)
+            last_id = ids[-1]
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Reminders scheduled for {bookings} upcoming booking(s): "
+            f"{ScheduledReminder.objects.count() - before:+d} scheduled reminder(s)."
+        ))
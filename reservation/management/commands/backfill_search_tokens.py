@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reservation.models import Booking, BookingSearchToken
+from reservation.search import SEARCH_SOURCES, token_rows
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the booking search tokens from existing bookings.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help='Bookings read and rows written per batch.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        rows = Booking.objects.order_by('pk').values_list('pk', *SEARCH_SOURCES).iterator(chunk_size=batch_size)
+        written = 0
+        with transaction.atomic():
+            deleted, _ = BookingSearchToken.objects.all().delete()
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    written += len(BookingSearchToken.objects.bulk_create(token_rows(batch), batch_size=batch_size))
+                    batch = []
+            written += len(BookingSearchToken.objects.bulk_create(token_rows(batch), batch_size=batch_size))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Search tokens rebuilt: {deleted} old tokens removed, {written} written."
+        ))
@@ -0,0 +1,119 @@
+import random
+import time as timer
+from datetime import date, datetime, time, timedelta
+from types import SimpleNamespace
+
+import pytz
+from django.core.management.base import BaseCommand
+
+from reservation import availability
+from user.schedule import DAY_PREFIXES
+
+
+def legacy_slots(professional, date_obj, total_duration, rows):
+    """The previous per-15-minute scan, kept here as the benchmark baseline."""
+    day_prefix = DAY_PREFIXES[date_obj.weekday()]
+    start = getattr(professional, f"{day_prefix}_start")
+    end = getattr(professional, f"{day_prefix}_end")
+    break_from = getattr(professional, f"{day_prefix}_break_from")
+    break_to = getattr(professional, f"{day_prefix}_break_to")
+
+    tz = pytz.UTC
+    dt_start = datetime.combine(date_obj, start).replace(tzinfo=tz)
+    dt_end = datetime.combine(date_obj, end).replace(tzinfo=tz)
+    dt_break_from = datetime.combine(date_obj, break_from, tz) if break_from else None
+    dt_break_to = datetime.combine(date_obj, break_to, tz) if break_to else None
+    busy_times = [
+        (datetime.combine(date_obj, s, tz), datetime.combine(date_obj, e, tz))
+        for s, e in rows if s and e
+    ]
+
+    slots = []
+    slot_length = timedelta(minutes=total_duration)
+    current = dt_start
+    while current + slot_length <= dt_end:
+        slot_end = current + slot_length
+        if dt_break_from and dt_break_to:
+            if current < dt_break_to and slot_end > dt_break_from:
+                current += timedelta(minutes=15)
+                continue
+        overlap = False
+        for busy_start, busy_end in busy_times:
+            if current < busy_end and slot_end > busy_start:
+                overlap = True
+                break
+        if not overlap:
+            slots.append({
+                'start': current.time().strftime('%H:%M'),
+                'end': slot_end.time().strftime('%H:%M')
+            })
+        current += timedelta(minutes=15)
+    return slots
+
+
+def engine_slots(professional, date_obj, total_duration, rows):
+    hours = availability.working_hours(professional, date_obj)
+    busy = availability.booking_intervals(rows)
+    starts = availability.compute_day_slots(hours, busy, total_duration)
+    return availability.format_slots(starts, total_duration)
+
+
+def synthetic_day(rng, bookings, open_start=7 * 60, open_end=22 * 60):
+    """Random short bookings scattered over the working day (overlaps allowed)."""
+    rows = []
+    for _ in range(bookings):
+        start = rng.randrange(open_start, open_end - 5)
+        length = rng.choice((5, 10, 15))
+        end = min(start + length, open_end)
+        rows.append((time(start // 60, start % 60), time(end // 60, end % 60)))
+    return rows
+
+
+class Command(BaseCommand):
+    help = 'Micro-benchmark of the slot availability engine against the legacy 15-minute scan.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bookings', type=int, default=60, help='Bookings per day.')
+        parser.add_argument('--days', type=int, default=200, help='Number of synthetic days.')
+        parser.add_argument('--duration', type=int, default=30, help='Requested slot length in minutes.')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        duration = options['duration']
+        professional = SimpleNamespace(**{
+            f"{prefix}_{field}": value
+            for prefix in DAY_PREFIXES
+            for field, value in (
+                ('enabled', True),
+                ('start', time(7, 0)),
+                ('break_from', time(13, 0)),
+                ('break_to', time(14, 0)),
+                ('end', time(22, 0)),
+            )
+        })
+        first_day = date(2026, 1, 5)
+        days = [
+            (first_day + timedelta(days=i), synthetic_day(rng, options['bookings']))
+            for i in range(options['days'])
+        ]
+
+        results = {}
+        for name, func in (('legacy', legacy_slots), ('engine', engine_slots)):
+            began = timer.perf_counter()
+            results[name] = [func(professional, day, duration, rows) for day, rows in days]
+            elapsed = timer.perf_counter() - began
+            results[f'{name}_time'] = elapsed
+            self.stdout.write(
+                f"{name:>7}: {elapsed * 1000:9.2f} ms total, "
+                f"{elapsed * 1e6 / len(days):9.1f} us/day"
+            )
+
+        if results['legacy'] != results['engine']:
+            self.stderr.write(self.style.ERROR('Slot output differs from the legacy implementation.'))
+            return
+        speedup = results['legacy_time'] / results['engine_time']
+        self.stdout.write(self.style.SUCCESS(
+            f"Identical output for {len(days)} days with {options['bookings']} bookings each; "
+            f"speed-up x{speedup:.1f}"
+        ))
@@ -0,0 +1,131 @@
+import threading
+import time as timer
+import uuid
+from datetime import date, datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, connections
+from rest_framework.exceptions import ValidationError
+
+from outbox.models import OutboxEmail
+from reservation.models import Booking, ProfessionalDayLock, RoomDayLock
+from reservation.serializers import BookingSerializer
+from user.models import User
+
+
+def count_overlaps(bookings):
+    """Number of pairs of active bookings of the same professional-day that overlap."""
+    overlaps = 0
+    by_day = {}
+    for booking in bookings:
+        by_day.setdefault((booking.professional_id, booking.data), []).append(booking)
+    for day_bookings in by_day.values():
+        day_bookings.sort(key=lambda b: b.start_time)
+        for i, booking in enumerate(day_bookings):
+            for other in day_bookings[i + 1:]:
+                if other.start_time >= booking.end_time:
+                    break
+                overlaps += 1
+    return overlaps
+
+
+class Command(BaseCommand):
+    help = (
+        'Hammer BookingSerializer.create from several threads competing for the same slots, '
+        'then report throughput and verify that no two active bookings overlap. '
+        'Writes temporary users, bookings and queued emails to the configured database and removes them afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--attempts', type=int, default=50, help='Booking attempts per thread.')
+        parser.add_argument('--slots', type=int, default=20, help='Distinct 30-minute slots competed for.')
+        parser.add_argument('--days', type=int, default=2, help='Days the slots are spread over.')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            raise CommandError('Threads cannot share an in-memory SQLite database; use a file or server database.')
+
+        suffix = uuid.uuid4().hex[:8]
+        professional = User.objects.create_user(
+            email=f'bench-pro-{suffix}@example.com', password=None, full_name='Bench Professional', role='professional'
+        )
+        customer = User.objects.create_user(
+            email=f'bench-client-{suffix}@example.com', password=None, full_name='Bench Client', role='client'
+        )
+        bench_addresses = {professional.email, customer.email}
+        last_email_id = OutboxEmail.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+        first_day = date.today() + timedelta(days=365)
+        per_day = max(1, options['slots'] // options['days'])
+        slots = []
+        for index in range(options['slots']):
+            day = first_day + timedelta(days=index // per_day)
+            start = datetime.combine(day, time(8, 0)) + timedelta(minutes=30 * (index % per_day))
+            # Half-hour offsets make neighbouring attempts partially overlap, not just collide
+            slots.append((day, start.time(), (start + timedelta(minutes=45)).time()))
+
+        counters = {'created': 0, 'rejected': 0, 'errors': 0}
+        counters_lock = threading.Lock()
+
+        def worker(offset):
+            try:
+                for attempt in range(options['attempts']):
+                    day, start_time, end_time = slots[(offset + attempt) % len(slots)]
+                    serializer = BookingSerializer(data={
+                        'professional': professional.id,
+                        'customer': customer.id,
+                        'data': day.isoformat(),
+                        'start_time': start_time.isoformat(),
+                        'end_time': end_time.isoformat(),
+                    })
+                    outcome = 'created'
+                    try:
+                        serializer.is_valid(raise_exception=True)
+                        serializer.save()
+                    except ValidationError:
+                        outcome = 'rejected'
+                    except DatabaseError:
+                        outcome = 'errors'
+                    with counters_lock:
+                        counters[outcome] += 1
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(options['threads'])]
+        try:
+            began = timer.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = timer.perf_counter() - began
+
+            bookings = list(
+                Booking.objects.filter(professional=professional).exclude(state__in=Booking.RELEASED_STATES)
+            )
+            overlaps = count_overlaps(bookings)
+        finally:
+            # Bookings only take a room their room_equipment names, but drop any room-day they locked
+            room_ids = set(Booking.objects.filter(professional=professional, room__isnull=False).values_list('room', flat=True))
+            Booking.objects.filter(professional=professional).delete()
+            ProfessionalDayLock.objects.filter(professional=professional).delete()
+            if room_ids:
+                RoomDayLock.objects.filter(room__in=room_ids, date__in={day for day, _, _ in slots}).delete()
+            # Booking confirmations are queued in the outbox; never let a drain mail the bench users
+            OutboxEmail.objects.filter(pk__in=[
+                pk for pk, recipients in OutboxEmail.objects.filter(pk__gt=last_email_id).values_list('pk', 'recipients')
+                if bench_addresses.intersection(recipients)
+            ]).delete()
+            professional.delete()
+            customer.delete()
+
+        attempts = sum(counters.values())
+        self.stdout.write(
+            f"{attempts} attempts from {options['threads']} threads in {elapsed:.2f} s "
+            f"({attempts / elapsed:.1f} req/s): {counters['created']} created, "
+            f"{counters['rejected']} rejected as overlapping, {counters['errors']} database errors"
+        )
+        if overlaps:
+            self.stderr.write(self.style.ERROR(f"{overlaps} overlapping booking pairs were written."))
+            return
+        self.stdout.write(self.style.SUCCESS(f"No overlapping bookings among {len(bookings)} created."))
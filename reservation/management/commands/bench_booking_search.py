@@ -0,0 +1,114 @@
+import random
+import time as timer
+import uuid
+from datetime import date, time, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from reservation.models import Booking, BookingSearchToken
+from reservation.search import SEARCH_SOURCES, search_bookings, token_rows, words
+from user.models import User
+
+SYLLABLES = ('ba', 'ce', 'di', 'fo', 'gu', 'la', 'me', 'ni', 'po', 'ru', 'sa', 'te', 'vi', 'zo')
+FIRST_NAMES = ('Ana', 'João', 'Maria', 'Pedro', 'Inês', 'Rui', 'Sofia', 'Tiago', 'Marta', 'Luís')
+LAST_NAMES = ('Silva', 'Santos', 'Ferreira', 'Pereira', 'Oliveira', 'Costa', 'Rodrigues', 'Martins', 'Gonçalves', 'Sousa')
+
+
+def legacy_search(queryset, text):
+    """The LIKE '%word%' scan over every source the tokens cover, as the benchmark baseline."""
+    for word in text.split():
+        condition = Q()
+        for source in SEARCH_SOURCES:
+            condition |= Q(**{f'{source}__icontains': word})
+        queryset = queryset.filter(condition)
+    return queryset
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark ?search= on bookings: the token index against LIKE scans over the same columns. '
+        'Creates synthetic users, bookings and tokens inside a transaction that is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bookings', type=int, default=1000000)
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per query; the best one is reported.')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        vocabulary = sorted({''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(5000)})
+        batch_size = options['batch_size']
+        with transaction.atomic():
+            suffix = uuid.uuid4().hex[:8]
+            User.objects.bulk_create(
+                User(email=f'bench-search-{suffix}-{i}@example.com', role='professional' if i % 10 == 0 else 'client',
+                     full_name=f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(vocabulary).title()}')
+                for i in range(options['users'])
+            )
+            users = list(User.objects.filter(email__startswith=f'bench-search-{suffix}-').values_list('pk', 'role'))
+            professionals = [pk for pk, role in users if role == 'professional']
+            clients = [pk for pk, role in users if role == 'client']
+
+            began = timer.perf_counter()
+            # bulk_create does not return primary keys on MySQL or SQLite
+            before = Booking.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+            first_day = date.today() + timedelta(days=1)
+            for start in range(0, options['bookings'], batch_size):
+                Booking.objects.bulk_create(
+                    Booking(
+                        title=' '.join(rng.sample(vocabulary, 2)).capitalize(),
+                        services=rng.choice(('Massagem', 'Fisioterapia', 'Osteopatia', 'Pilates clínico')),
+                        internal_notes=' '.join(rng.sample(vocabulary, 6)),
+                        professional_id=rng.choice(professionals), customer_id=rng.choice(clients),
+                        data=first_day + timedelta(days=index % 365), start_time=time(8 + index % 12, 0),
+                        end_time=time(8 + index % 12, 45),
+                    )
+                    for index in range(start, min(start + batch_size, options['bookings']))
+                )
+            bookings = Booking.objects.filter(pk__gt=before)
+            tokens = 0
+            last_id = before
+            while True:
+                rows = list(bookings.filter(pk__gt=last_id).order_by('pk').values_list('pk', *SEARCH_SOURCES)[:batch_size])
+                if not rows:
+                    break
+                tokens += len(BookingSearchToken.objects.bulk_create(token_rows(rows), batch_size=batch_size))
+                last_id = rows[-1][0]
+            self.stdout.write(
+                f"Built {options['bookings']} bookings and {tokens} tokens in {timer.perf_counter() - began:.1f} s"
+            )
+
+            sample = bookings.values_list('title', 'internal_notes', 'customer__full_name').first()
+            queries = [
+                words(sample[0])[0],
+                words(sample[1])[-1][:4],
+                'massagem',
+                words(sample[2])[1],
+                f'{words(sample[2])[1]} {words(sample[0])[0]}',
+            ]
+            for text in queries:
+                results = {}
+                for name, func in (('like', legacy_search), ('tokens', search_bookings)):
+                    best_count = best_page = None
+                    for _ in range(options['repeat']):
+                        queryset = func(bookings, text)
+                        began = timer.perf_counter()
+                        count = queryset.count()
+                        counted = timer.perf_counter()
+                        list(queryset.order_by('data', 'start_time', 'id').values_list('pk', flat=True)[:20])
+                        paged = timer.perf_counter()
+                        best_count = min(best_count or counted - began, counted - began)
+                        best_page = min(best_page or paged - counted, paged - counted)
+                    results[name] = (count, best_count, best_page)
+                self.stdout.write(f"{text!r}:")
+                for name, (count, count_time, page_time) in results.items():
+                    self.stdout.write(
+                        f"  {name:>6}: {count:8d} matches, count {count_time * 1000:9.1f} ms, "
+                        f"first page {page_time * 1000:9.1f} ms"
+                    )
+            transaction.set_rollback(True)
@@ -0,0 +1,109 @@
+import time as timer
+import uuid
+from datetime import date, time, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from classes.models import Class
+from classes.serializers import ClassSerializer, FastClassSerializer
+from reservation.models import Booking
+from reservation.serializers import BookingSerializer, FastBookingSerializer
+from rooms.models import Room
+from user.models import User
+from user.serializers import FastUserAdminSerializer, UserAdminSerializer
+
+
+def build_dataset(rows, suffix):
+    """
+    rows bookings, users (professionals and their clients) and classes.
+    Returns (name, serializer, fast serializer, queryset, prefetch lookups for the serializer) per dataset.
+    """
+    # bulk_create does not set primary keys on MySQL or SQLite, so rows are read back by their marker
+    User.objects.bulk_create(
+        User(email=f'bench-pro-{suffix}-{i}@example.com', full_name=f'Professional {i}', role='professional',
+             monday_enabled=True, monday_start=time(9, 0), monday_end=time(18, 0))
+        for i in range(max(1, rows // 10))
+    )
+    professionals = list(User.objects.filter(email__startswith=f'bench-pro-{suffix}-').order_by('id'))
+    User.objects.bulk_create(
+        User(email=f'bench-client-{suffix}-{i}@example.com', full_name=f'Client {i}', role='client')
+        for i in range(rows - len(professionals))
+    )
+    clients = list(User.objects.filter(email__startswith=f'bench-client-{suffix}-').order_by('id'))
+    Through = User.professionals.through
+    Through.objects.bulk_create(
+        Through(from_user=client, to_user=professionals[i % len(professionals)])
+        for i, client in enumerate(clients)
+    )
+    room = Room.objects.create(name=f'Bench room {suffix}')
+    first_day = date.today() + timedelta(days=365)
+    Booking.objects.bulk_create(
+        Booking(
+            title=f'Booking {i}', professional=professionals[i % len(professionals)],
+            customer=clients[i % len(clients)], room=room, data=first_day + timedelta(days=i // 40),
+            start_time=time(8 + i % 10, 0), end_time=time(8 + i % 10, 45), services='Massage',
+        )
+        for i in range(rows)
+    )
+    Class.objects.bulk_create(
+        Class(name=f'Bench class {suffix} {i}', duration=60, capacity=4, status=bool(i % 3))
+        for i in range(rows)
+    )
+    classes = list(Class.objects.filter(name__startswith=f'Bench class {suffix} ').order_by('id'))
+    Class.professional.through.objects.bulk_create(
+        Class.professional.through(class_id=group.pk, user_id=professionals[i % len(professionals)].pk)
+        for i, group in enumerate(classes)
+    )
+    Class.clients.through.objects.bulk_create(
+        Class.clients.through(class_id=group.pk, user_id=clients[(i + offset) % len(clients)].pk)
+        for i, group in enumerate(classes) for offset in range(2)
+    )
+    return (
+        ('bookings', BookingSerializer, FastBookingSerializer,
+         Booking.objects.filter(room=room).order_by('id'), ()),
+        ('users', UserAdminSerializer, FastUserAdminSerializer,
+         User.objects.filter(email__contains=f'-{suffix}-').order_by('id'), ('clients__professionals',)),
+        ('classes', ClassSerializer, FastClassSerializer,
+         Class.objects.filter(name__startswith=f'Bench class {suffix} ').order_by('id'),
+         ('professional', 'clients__professionals')),
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare list serialization throughput of the DRF serializers with their fast read-only '
+        'counterparts and check that both render identical JSON. Creates a synthetic dataset inside '
+        'a transaction that is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Rows of each dataset.')
+
+    def handle(self, *args, **options):
+        context = {'request': APIRequestFactory().get('/')}
+        renderer = JSONRenderer()
+        with transaction.atomic():
+            for name, serializer_class, fast_class, queryset, prefetch in build_dataset(options['rows'], uuid.uuid4().hex[:8]):
+                # The DRF baseline gets the best its serializer can use: joined foreign keys and prefetched relations
+                baseline = queryset.select_related(
+                    *(field.name for field in queryset.model._meta.concrete_fields if field.many_to_one)
+                ).prefetch_related(*prefetch)
+                began = timer.perf_counter()
+                expected = renderer.render(serializer_class(baseline, many=True, context=context).data)
+                drf_time = timer.perf_counter() - began
+
+                began = timer.perf_counter()
+                actual = renderer.render(fast_class(context=context).data(queryset))
+                fast_time = timer.perf_counter() - began
+
+                count = options['rows']
+                self.stdout.write(
+                    f"{name:>8}: drf {count / drf_time:9.0f} rows/s, fast {count / fast_time:9.0f} rows/s, "
+                    f"speed-up x{drf_time / fast_time:.1f}"
+                )
+                if actual != expected:
+                    self.stderr.write(self.style.ERROR(f'{name}: fast output differs from {serializer_class.__name__}.'))
+            transaction.set_rollback(True)
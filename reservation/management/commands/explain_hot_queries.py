@@ -0,0 +1,90 @@
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from reservation.models import AvailabilityException, Booking, OccupancySlot
+from subscriptions.models import Order
+from user.models import User
+
+
+def hot_queries():
+    """(label, queryset) pairs for the query shapes that dominate production load."""
+    today = timezone.now().date()
+    since = timezone.make_aware(datetime.combine(today - timedelta(days=30), time.min))
+    professional = User.objects.filter(role='professional').values_list('id', flat=True).first() or 0
+    customer = User.objects.filter(role='client').values_list('id', flat=True).first() or 0
+    released = Booking.RELEASED_STATES
+    return [
+        ('slot engine: bookings of professional-days',
+         Booking.objects.filter(professional__in=[professional], data__in=[today]).exclude(state__in=released)),
+        ('booking guard: overlapping bookings',
+         Booking.objects.filter(professional_id=professional, data=today,
+                                start_time__lt=time(11, 0), end_time__gt=time(10, 0))),
+        ('reservation list: admin page',
+         Booking.objects.filter(data__gte=today).order_by('data', 'start_time', 'id')[:11]),
+        ('reservation list: professional page',
+         Booking.objects.filter(professional=professional, data__gte=today).order_by('data', 'start_time', 'id')[:11]),
+        ('reservation list: client page',
+         Booking.objects.filter(customer=customer, data__gte=today).order_by('data', 'start_time', 'id')[:11]),
+        ('reminders: confirmed bookings of tomorrow',
+         Booking.objects.filter(state='confirmed', data=today + timedelta(days=1))),
+        ('analytics: confirmed bookings since',
+         Booking.objects.filter(state='confirmed', data__gte=today - timedelta(days=30))),
+        ('analytics: professionals joined since',
+         User.objects.filter(role='professional', date_joined__gte=since)),
+        ('analytics: clients joined since',
+         User.objects.filter(role='client', joined_at__gte=since)),
+        ('availability exceptions overlapping a range',
+         AvailabilityException.objects.filter(professional=professional, date_from__lte=today, date_to__gte=today)),
+        ('occupancy grid: quarter-hours of a day',
+         OccupancySlot.objects.filter(date=today, quarter__gte=40, quarter__lt=44)),
+        ('payments: order by MultiBanco reference',
+         Order.objects.filter(mb_reference='000000000')),
+        ('payments: orders of a user',
+         Order.objects.filter(user=customer).order_by('-created_at')),
+        ('payments: expired pending orders',
+         Order.objects.filter(payment_status='Pendente', expiry_date__lt=timezone.now())),
+    ]
+
+
+def index_names(model):
+    constraints = connection.introspection.get_constraints(connection.cursor(), model._meta.db_table)
+    return sorted(
+        (name for name, info in constraints.items() if info['index'] or info['unique'] or info['primary_key']),
+        key=len,
+        reverse=True,
+    )
+
+
+class Command(BaseCommand):
+    help = 'Run EXPLAIN on the hot queries against the current database and report the index each one uses.'
+
+    def handle(self, *args, **options):
+        indexes = {}
+        missing = 0
+        for label, queryset in hot_queries():
+            model = queryset.model
+            if model not in indexes:
+                indexes[model] = index_names(model)
+            plan = queryset.explain()
+            # Longest names first so an index is not reported through a shorter prefix of its name
+            remaining = plan
+            used = []
+            for name in indexes[model]:
+                if name in remaining:
+                    used.append(name)
+                    remaining = remaining.replace(name, '')
+            if used:
+                self.stdout.write(f"{label}: {', '.join(used)}")
+            else:
+                missing += 1
+                self.stdout.write(self.style.WARNING(f"{label}: no index used"))
+            if options['verbosity'] > 1:
+                self.stdout.write(f"    {plan}")
+
+        if missing:
+            self.stdout.write(self.style.WARNING(f"{missing} hot queries scan without an index."))
+        else:
+            self.stdout.write(self.style.SUCCESS('Every hot query uses an index.'))
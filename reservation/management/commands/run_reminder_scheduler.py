@@ -0,0 +1,22 @@
+from apscheduler.schedulers.blocking import BlockingScheduler
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from reservation.reminders import ReminderScheduler, describe_offset, reminder_offsets
+
+
+class Command(BaseCommand):
+    help = (
+        'Run the reminder scheduler in the foreground: queue each reminder when it falls due '
+        '(settings.BOOKING_REMINDER_OFFSETS before the booking starts) and send it through the outbox.'
+    )
+
+    def handle(self, *args, **options):
+        scheduler = BlockingScheduler(timezone=timezone.utc)
+        ReminderScheduler(scheduler).start()
+        offsets = ', '.join(describe_offset(offset) for offset in reminder_offsets())
+        self.stdout.write(f"Reminder scheduler running (reminding {offsets} ahead). Press Ctrl+C to stop.")
+        try:
+            scheduler.start()
+        except (KeyboardInterrupt, SystemExit):
+            scheduler.shutdown(wait=False)
@@ -1,9 +1,34 @@
-from django.core.management.base import BaseCommand
-from reservation.scheduler import send_booking_reminders
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from reservation.scheduler import REMINDER_CHUNK_SIZE, REMINDER_SENDERS, send_booking_reminders
 
 class Command(BaseCommand):
-    help = 'Send reminder emails for tomorrow’s reservations.'
+    help = 'Send reminder emails for tomorrow’s reservations. Reminders already sent are skipped, so reruns are safe.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Remind the reservations of this day instead (format: YYYY-MM-DD).')
+        parser.add_argument('--workers', type=int, default=REMINDER_SENDERS, help='Concurrent SMTP connections.')
+        parser.add_argument('--chunk-size', type=int, default=REMINDER_CHUNK_SIZE)
+        parser.add_argument(
+            '--digest', action='store_true',
+            help='Send each professional one agenda of the day instead of one email per reservation.',
+        )
 
-    def handle(self, *args, **kwargs):
-        send_booking_reminders()
-        self.stdout.write(self.style.SUCCESS("Reservation reminders sent successfully."))
+    def handle(self, *args, **options):
+        day = None
+        if options['date']:
+            try:
+                day = datetime.strptime(options['date'], "%Y-%m-%d").date()
+            except ValueError:
+                raise CommandError("Invalid date format. Use YYYY-MM-DD.")
+        summary = send_booking_reminders(
+            day, workers=options['workers'], chunk_size=options['chunk_size'], digest=options['digest'],
+        )
+        rate = summary['sent'] / summary['seconds'] if summary['seconds'] else 0
+        message = (
+            f"{summary['bookings']} reservation(s): {summary['sent']} reminder(s) sent, "
+            f"{summary['skipped']} already sent, {summary['failed']} failed "
+            f"in {summary['seconds']:.1f} s ({rate:.0f}/s)."
+        )
+        self.stdout.write(self.style.ERROR(message) if summary['failed'] else self.style.SUCCESS(message))
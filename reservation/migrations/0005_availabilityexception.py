@@ -0,0 +1,41 @@
+# Generated by Django 3.2.25 on 2026-10-17 02:17
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('bookings', '0004_alter_booking_customer'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AvailabilityException',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date_from', models.DateField()),
+                ('date_to', models.DateField()),
+                ('start_time', models.TimeField(blank=True, help_text='Leave empty to block whole days', null=True)),
+                ('end_time', models.TimeField(blank=True, null=True)),
+                ('reason', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('professional', models.ForeignKey(blank=True, help_text='Leave empty for a studio-wide closure', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='availability_exceptions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['date_from', 'start_time'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='availabilityexception',
+            index=models.Index(fields=['professional', 'date_from', 'date_to'], name='bookings_av_profess_2fa449_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='availabilityexception',
+            index=models.Index(fields=['date_from', 'date_to'], name='bookings_av_date_fr_2f442b_idx'),
+        ),
+    ]
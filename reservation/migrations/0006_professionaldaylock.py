@@ -0,0 +1,36 @@
+# Generated by Django 3.2.25 on 2026-10-17 02:18
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('bookings', '0005_availabilityexception'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfessionalDayLock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['professional', 'data', 'start_time'], name='bookings_bo_profess_ef592c_idx'),
+        ),
+        migrations.AddField(
+            model_name='professionaldaylock',
+            name='professional',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterUniqueTogether(
+            name='professionaldaylock',
+            unique_together={('professional', 'date')},
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 3.2.25 on 2026-10-17 02:21
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('bookings', '0006_professionaldaylock'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OccupancySlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('quarter', models.PositiveSmallIntegerField(help_text='Quarter-hour of the day, 0 = 00:00-00:15')),
+                ('professional', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occupancy_slots', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='occupancyslot',
+            index=models.Index(fields=['date', 'quarter'], name='bookings_oc_date_046965_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='occupancyslot',
+            constraint=models.UniqueConstraint(fields=('professional', 'date', 'quarter'), name='unique_occupancy_slot'),
+        ),
+    ]
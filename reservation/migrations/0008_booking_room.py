@@ -0,0 +1,40 @@
+# Generated by Django 3.2.25 on 2026-10-17 02:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0001_initial'),
+        ('bookings', '0007_occupancyslot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomDayLock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='room',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bookings', to='rooms.room'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['room', 'data', 'start_time'], name='bookings_bo_room_id_32b2de_idx'),
+        ),
+        migrations.AddField(
+            model_name='roomdaylock',
+            name='room',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='rooms.room'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='roomdaylock',
+            unique_together={('room', 'date')},
+        ),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations
+
+
+def map_room_equipment(apps, schema_editor):
+    """Link bookings to the room whose name matches their free-text room_equipment."""
+    Booking = apps.get_model('bookings', 'Booking')
+    Room = apps.get_model('rooms', 'Room')
+    rooms = {name.strip().lower(): pk for pk, name in Room.objects.values_list('pk', 'name')}
+    if not rooms:
+        return
+    labels = Booking.objects.filter(
+        room__isnull=True, room_equipment__isnull=False,
+    ).exclude(room_equipment='').values_list('room_equipment', flat=True).distinct()
+    for label in list(labels):
+        room_id = rooms.get(label.strip().lower())
+        if room_id:
+            Booking.objects.filter(room__isnull=True, room_equipment=label).update(room_id=room_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0008_booking_room'),
+        ('rooms', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(map_room_equipment, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-17 02:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0009_map_room_equipment'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['data', 'start_time'], name='bookings_bo_data_8334e7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['customer', 'data', 'start_time'], name='bookings_bo_custome_ff85d4_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.25 on 2026-10-17 02:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0010_booking_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['state', 'data'], name='bookings_bo_state_675b4e_idx'),
+        ),
+    ]
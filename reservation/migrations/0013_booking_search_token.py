@@ -0,0 +1,30 @@
+# Generated by Django 3.2.25 on 2026-10-17 02:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0012_booking_timestamps'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=32)),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='bookings.booking')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='bookingsearchtoken',
+            index=models.Index(fields=['token', 'booking'], name='bookings_bo_token_f08508_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='bookingsearchtoken',
+            constraint=models.UniqueConstraint(fields=('booking', 'token'), name='unique_booking_search_token'),
+        ),
+    ]
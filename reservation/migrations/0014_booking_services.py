@@ -0,0 +1,33 @@
+# Generated by Django 3.2.25 on 2026-10-17 02:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0002_alter_service_collaborators'),
+        ('bookings', '0013_booking_search_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='booked_services',
+            field=models.ManyToManyField(blank=True, related_name='bookings', to='services.Service'),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='total_duration',
+            field=models.PositiveIntegerField(default=0, help_text='Minutes'),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='total_price',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['data', 'state', 'total_duration', 'total_price'], name='bookings_bo_data_f4eae0_idx'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+import re
+
+from django.db import migrations
+
+# Separators seen between service names in the free-text services column
+SEPARATORS = re.compile(r'[,;|/+\n]')
+BATCH_SIZE = 1000
+
+
+def parse_services(label, services):
+    """Service ids named in label, in order, by id, reference or name; unknown pieces are skipped."""
+    ids = []
+    for piece in SEPARATORS.split(label):
+        service_id = services.get(piece.strip().lower())
+        if service_id and service_id not in ids:
+            ids.append(service_id)
+    return ids
+
+
+def map_booking_services(apps, schema_editor):
+    """Link bookings to the services their free-text services label names and store the totals."""
+    Booking = apps.get_model('bookings', 'Booking')
+    Service = apps.get_model('services', 'Service')
+    Through = Booking.booked_services.through
+    services = {}
+    totals = {}
+    for pk, name, reference, duration, price in Service.objects.values_list(
+        'pk', 'name', 'reference', 'duration', 'price'
+    ):
+        services.setdefault(str(pk), pk)
+        services.setdefault(reference.strip().lower(), pk)
+        services.setdefault(name.strip().lower(), pk)
+        totals[pk] = (duration, price)
+    if not services:
+        return
+    labels = Booking.objects.filter(
+        services__isnull=False,
+    ).exclude(services='').values_list('services', flat=True).distinct()
+    for label in list(labels):
+        service_ids = parse_services(label, services)
+        if not service_ids:
+            continue
+        bookings = Booking.objects.filter(services=label)
+        booking_ids = list(bookings.values_list('pk', flat=True))
+        Through.objects.bulk_create(
+            [Through(booking_id=booking_id, service_id=service_id)
+             for booking_id in booking_ids for service_id in service_ids],
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        bookings.update(
+            total_duration=sum(totals[service_id][0] for service_id in service_ids),
+            total_price=sum(totals[service_id][1] for service_id in service_ids),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0014_booking_services'),
+    ]
+
+    operations = [
+        migrations.RunPython(map_booking_services, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 3.2.25 on 2026-10-17 02:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0015_map_booking_services'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingReminder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recipient', models.CharField(choices=[('professional', 'Professional'), ('customer', 'Customer')], max_length=20)),
+                ('sent_at', models.DateTimeField(auto_now_add=True)),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='bookings.booking')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='bookingreminder',
+            constraint=models.UniqueConstraint(fields=('booking', 'recipient'), name='unique_booking_reminder'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 3.2.25 on 2026-10-17 03:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0016_booking_reminder'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduledReminder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('offset', models.PositiveIntegerField(help_text='Minutes before the booking starts')),
+                ('due_at', models.DateTimeField()),
+                ('queued_at', models.DateTimeField(blank=True, help_text='When its emails went to the outbox', null=True)),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scheduled_reminders', to='bookings.booking')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='scheduledreminder',
+            index=models.Index(fields=['queued_at', 'due_at'], name='bookings_sc_queued__eca2ca_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='scheduledreminder',
+            constraint=models.UniqueConstraint(fields=('booking', 'offset'), name='unique_scheduled_reminder'),
+        ),
+    ]
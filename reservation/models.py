@@ -1,8 +1,15 @@
+from decimal import Decimal
+
 from django.db import models
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 from user.models import User
 from classes.models import Class
+from rooms.models import Room
+from services.models import Service
 
 User = get_user_model()
 
@@ -44,8 +51,21 @@ class Booking(models.Model):
         related_name='bookings'
     )
     coupon = models.CharField(max_length=100, blank=True, null=True)
+    # Display label of the booked services; filled from booked_services when not given
     services = models.CharField(max_length=255, blank=True, null=True)
+    booked_services = models.ManyToManyField(Service, blank=True, related_name='bookings')
+    # Sums over booked_services, recomputed by reservation.signals when they change; later
+    # edits to a service's duration or price do not reprice existing bookings
+    total_duration = models.PositiveIntegerField(default=0, help_text='Minutes')
+    total_price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     room_equipment = models.CharField(max_length=255, blank=True, null=True)
+    room = models.ForeignKey(
+        Room,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='bookings'
+    )
     title = models.CharField(max_length=100, blank=True, null=True)
     data = models.DateField(auto_now_add=False, blank=True, null=True)
     start_time = models.TimeField(blank=True, null=True)
@@ -73,3 +93,179 @@ class Booking(models.Model):
         ('cancel', 'CANCEL'),
     ]
     state = models.CharField(max_length=20, choices=STATE_CHOICES, default='confirmed')
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    # States that no longer hold the professional's time
+    RELEASED_STATES = ('cancel',)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['data', 'start_time']),
+            models.Index(fields=['professional', 'data', 'start_time']),
+            models.Index(fields=['customer', 'data', 'start_time']),
+            models.Index(fields=['state', 'data']),
+            models.Index(fields=['room', 'data', 'start_time']),
+            models.Index(fields=['data', 'state', 'total_duration', 'total_price']),
+        ]
+
+    @classmethod
+    def refresh_service_totals(cls, booking_ids):
+        """Recompute total_duration and total_price of the given bookings in one UPDATE."""
+        services = Service.objects.filter(bookings=OuterRef('pk')).order_by().values('bookings')
+        cls.objects.filter(pk__in=booking_ids).update(
+            total_duration=Coalesce(Subquery(services.annotate(total=Sum('duration')).values('total')), 0),
+            total_price=Coalesce(Subquery(services.annotate(total=Sum('price')).values('total')), Decimal('0')),
+            updated_at=timezone.now(),
+        )
+
+
+class ProfessionalDayLock(models.Model):
+    """
+    One row per professional and day, locked with SELECT ... FOR UPDATE while a booking
+    for that day is written so concurrent requests cannot both take the same time.
+    """
+    professional = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    date = models.DateField()
+
+    class Meta:
+        unique_together = ('professional', 'date')
+
+    @classmethod
+    def acquire(cls, professional_id, date):
+        """Lock the professional-day for the rest of the current transaction."""
+        cls.objects.get_or_create(professional_id=professional_id, date=date)
+        return cls.objects.select_for_update().get(professional_id=professional_id, date=date)
+
+
+class RoomDayLock(models.Model):
+    """Same as ProfessionalDayLock, for the room a booking takes."""
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='+')
+    date = models.DateField()
+
+    class Meta:
+        unique_together = ('room', 'date')
+
+    @classmethod
+    def acquire(cls, room_id, date):
+        """Lock the room-day for the rest of the current transaction."""
+        cls.objects.get_or_create(room_id=room_id, date=date)
+        return cls.objects.select_for_update().get(room_id=room_id, date=date)
+
+
+class OccupancySlot(models.Model):
+    """
+    A quarter-hour of a professional's day taken by at least one active booking.
+    Kept in sync from Booking saves (see reservation.occupancy) so availability and
+    reporting questions can be answered in SQL; rebuild with `manage.py backfill_occupancy`.
+    """
+    professional = models.ForeignKey(User, on_delete=models.CASCADE, related_name='occupancy_slots')
+    date = models.DateField()
+    quarter = models.PositiveSmallIntegerField(help_text='Quarter-hour of the day, 0 = 00:00-00:15')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['professional', 'date', 'quarter'], name='unique_occupancy_slot'),
+        ]
+        indexes = [
+            models.Index(fields=['date', 'quarter']),
+        ]
+
+
+class BookingSearchToken(models.Model):
+    """
+    A normalized word of a booking's title, services, internal notes or participant names.
+    Kept in sync from Booking, User and Class saves (see reservation.search) so text search
+    is an index range scan; rebuild with `manage.py backfill_search_tokens`.
+    """
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='search_tokens')
+    token = models.CharField(max_length=32)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['booking', 'token'], name='unique_booking_search_token'),
+        ]
+        indexes = [
+            models.Index(fields=['token', 'booking']),
+        ]
+
+
+class BookingReminder(models.Model):
+    """
+    A reminder already sent for a booking to one of its participants, so reruns of the
+    reminder job (see reservation.scheduler) skip it.
+    """
+    RECIPIENT_CHOICES = [
+        ('professional', 'Professional'),
+        ('customer', 'Customer'),
+    ]
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='reminders')
+    recipient = models.CharField(max_length=20, choices=RECIPIENT_CHOICES)
+    sent_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['booking', 'recipient'], name='unique_booking_reminder'),
+        ]
+
+
+class ScheduledReminder(models.Model):
+    """
+    A reminder due offset minutes before a booking starts, one per configured offset.
+    Kept in sync from Booking saves (see reservation.reminders) so the scheduler only
+    reads the earliest pending due_at; rebuild with `manage.py backfill_reminders`.
+    """
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='scheduled_reminders')
+    offset = models.PositiveIntegerField(help_text='Minutes before the booking starts')
+    due_at = models.DateTimeField()
+    queued_at = models.DateTimeField(blank=True, null=True, help_text='When its emails went to the outbox')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['booking', 'offset'], name='unique_scheduled_reminder'),
+        ]
+        indexes = [
+            models.Index(fields=['queued_at', 'due_at']),
+        ]
+
+
+class AvailabilityException(models.Model):
+    """
+    Time during which a professional (or, without one, the whole studio) is unavailable,
+    overriding the weekly schedule: holidays, closures, time off.
+    """
+    professional = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='availability_exceptions',
+        help_text='Leave empty for a studio-wide closure'
+    )
+    date_from = models.DateField()
+    date_to = models.DateField()
+    start_time = models.TimeField(blank=True, null=True, help_text='Leave empty to block whole days')
+    end_time = models.TimeField(blank=True, null=True)
+    reason = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['date_from', 'start_time']
+        indexes = [
+            models.Index(fields=['professional', 'date_from', 'date_to']),
+            models.Index(fields=['date_from', 'date_to']),
+        ]
+
+    def clean(self):
+        if self.date_from and self.date_to and self.date_to < self.date_from:
+            raise ValidationError({'date_to': 'date_to must be on or after date_from.'})
+        if (self.start_time is None) != (self.end_time is None):
+            raise ValidationError('Provide both start_time and end_time, or neither to block whole days.')
+        if self.start_time and self.end_time and self.end_time <= self.start_time:
+            raise ValidationError({'end_time': 'end_time must be after start_time.'})
+
+    def __str__(self):
+        who = self.professional.full_name if self.professional else 'Studio'
+        return f"{who}: {self.date_from} - {self.date_to}"
@@ -0,0 +1,66 @@
+"""
+Materialized quarter-hour occupancy grid.
+
+Every active booking marks the quarter-hours it touches (a 10:05-10:20 booking takes
+quarters 40 and 41) as OccupancySlot rows. A professional-day is always rebuilt as a
+whole from its bookings, so overlapping or moved bookings never leave stale quarters.
+
+Answers read from the grid are exact whenever bookings, working hours and durations sit
+on the quarter-hour grid, and conservative otherwise.
+"""
+from collections import defaultdict
+
+from .availability import SLOT_STEP
+from .models import Booking, OccupancySlot
+from user.schedule import to_minutes
+
+
+def quarters(start_time, end_time):
+    """Quarter-hour indexes touched by [start_time, end_time)."""
+    start = to_minutes(start_time)
+    end = to_minutes(end_time, round_up=True)
+    if end <= start:
+        return range(0)
+    return range(start // SLOT_STEP, -(-end // SLOT_STEP))
+
+
+def grid_rows(bookings):
+    """OccupancySlot instances for (professional_id, date, start_time, end_time) rows, deduplicated."""
+    taken = set()
+    for professional_id, day, start_time, end_time in bookings:
+        if start_time and end_time:
+            taken.update((professional_id, day, quarter) for quarter in quarters(start_time, end_time))
+    return [
+        OccupancySlot(professional_id=professional_id, date=day, quarter=quarter)
+        for professional_id, day, quarter in sorted(taken)
+    ]
+
+
+def rebuild_days(pairs):
+    """Recompute the grid of the given (professional_id, date) pairs from their active bookings."""
+    pairs = {(professional_id, day) for professional_id, day in pairs if professional_id and day}
+    if not pairs:
+        return
+    by_professional = defaultdict(set)
+    for professional_id, day in pairs:
+        by_professional[professional_id].add(day)
+    for professional_id, days in by_professional.items():
+        OccupancySlot.objects.filter(professional_id=professional_id, date__in=days).delete()
+        bookings = Booking.objects.filter(
+            professional_id=professional_id, data__in=days,
+        ).exclude(state__in=Booking.RELEASED_STATES).values_list('professional_id', 'data', 'start_time', 'end_time')
+        OccupancySlot.objects.bulk_create(grid_rows(bookings))
+
+
+def busy_intervals(pairs):
+    """{(professional_id, date): [(start, end) minutes]}, one interval per occupied quarter-hour."""
+    professional_ids = {professional_id for professional_id, _ in pairs}
+    days = {day for _, day in pairs}
+    by_pair = defaultdict(list)
+    rows = OccupancySlot.objects.filter(
+        professional__in=professional_ids, date__in=days,
+    ).values_list('professional_id', 'date', 'quarter')
+    for professional_id, day, quarter in rows:
+        by_pair[professional_id, day].append((quarter * SLOT_STEP, (quarter + 1) * SLOT_STEP))
+    return dict(by_pair)
+
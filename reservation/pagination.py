@@ -0,0 +1,158 @@
+"""
+Keyset pagination for reservations.
+
+Reservations are listed upcoming first: dated today or later, then past ones, then the
+ones without a date, each phase ordered by (data, start_time, id). Every page is one
+range scan of the (data, start_time) indexes, "WHERE key > cursor ORDER BY key LIMIT n",
+instead of a COUNT(*) and an OFFSET scan, so deep pages cost as much as the first one.
+The cursor only moves forward. Pages may hold Booking instances or the .values() rows of
+a FastListSerializer projection.
+"""
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date, time
+
+from django.db import connections
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+UPCOMING, PAST, UNDATED = range(3)
+
+
+def keyset_after(data, start_time, pk, nulls_largest=False):
+    """
+    Q for the bookings sorting after (data, start_time, pk) in (data, start_time, id) order.
+    nulls_largest tells where the database sorts a NULL start_time (features.nulls_order_largest).
+    """
+    if start_time is None:
+        condition = Q(start_time__isnull=True, pk__gt=pk)
+        if not nulls_largest:
+            condition |= Q(start_time__isnull=False)
+    else:
+        condition = Q(start_time__gt=start_time) | Q(start_time=start_time, pk__gt=pk)
+        if nulls_largest:
+            condition |= Q(start_time__isnull=True)
+    if data is None:
+        return condition
+    return Q(data__gt=data) | (Q(data=data) & condition)
+
+
+class BookingCursorPagination(BasePagination):
+    # Lookups .values() rows must carry for the cursor
+    row_lookups = ('data', 'start_time', 'pk')
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.today = timezone.now().date()
+        self.nulls_largest = connections[queryset.db].features.nulls_order_largest
+        phase, position = self.decode_cursor(request)
+
+        rows = []
+        for current in range(phase, UNDATED + 1):
+            remaining = self.page_size + 1 - len(rows)
+            if remaining <= 0:
+                break
+            rows += list(self.phase_queryset(queryset, current, position if current == phase else None)[:remaining])
+
+        self.next_position = None
+        if len(rows) > self.page_size:
+            rows = rows[:self.page_size]
+            data, start_time, pk = self.position_of(rows[-1])
+            self.next_position = (self.phase_of(data), data, start_time, pk)
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value, taken from the previous page\'s next link.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': f'Number of results per page (at most {self.max_page_size}).',
+                'schema': {'type': 'integer'},
+            },
+        ]
+
+    def get_page_size(self, request):
+        try:
+            requested = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return api_settings.PAGE_SIZE
+        return min(max(requested, 1), self.max_page_size)
+
+    def position_of(self, row):
+        if isinstance(row, dict):
+            return row['data'], row['start_time'], row['pk']
+        return row.data, row.start_time, row.pk
+
+    def phase_of(self, data):
+        if data is None:
+            return UNDATED
+        return UPCOMING if data >= self.today else PAST
+
+    def phase_queryset(self, queryset, phase, position):
+        if phase == UNDATED:
+            queryset = queryset.filter(data__isnull=True)
+        elif phase == UPCOMING:
+            queryset = queryset.filter(data__gte=self.today)
+        else:
+            queryset = queryset.filter(data__lt=self.today)
+        if position is not None:
+            queryset = queryset.filter(keyset_after(*position, nulls_largest=self.nulls_largest))
+        return queryset.order_by('data', 'start_time', 'id')
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        phase, data, start_time, pk = self.next_position
+        token = json.dumps([
+            phase, data and data.isoformat(), start_time and start_time.isoformat(), pk,
+        ], separators=(',', ':'))
+        encoded = urlsafe_b64encode(token.encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return UPCOMING, None
+        try:
+            phase, data, start_time, pk = json.loads(urlsafe_b64decode(encoded.encode()))
+            position = (
+                data and date.fromisoformat(data),
+                start_time and time.fromisoformat(start_time),
+                int(pk),
+            )
+            if phase not in (UPCOMING, PAST, UNDATED):
+                raise ValueError
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        return phase, position
@@ -0,0 +1,196 @@
+"""
+Reminders at fixed offsets before a booking starts (settings.BOOKING_REMINDER_OFFSETS,
+in minutes; 2 hours by default). The day-before reminder is the daily
+reservation.scheduler job (run by jobs.runner, or `manage.py send_reminders`) with its
+BookingReminder ledger: configuring a 24 hour offset as well would remind every booking
+twice.
+
+Every confirmed booking owns one ScheduledReminder row per offset whose due time is
+still ahead, kept in sync from Booking saves through reservation.signals. The
+scheduler never scans bookings: it reads the earliest pending due_at off the
+(queued_at, due_at) index, sleeps until then (or MAX_SLEEP, to notice earlier
+reminders created by other processes), and on waking moves every due reminder into
+the outbox's reminder lane in the same transaction that marks it queued, then drains
+the outbox. Transactional mail still goes first, and outbox retries cover SMTP errors.
+Reminders found more than LATE_GRACE overdue, after the scheduler was down, are dropped
+instead of announcing a start time that has passed.
+
+Bulk queryset.update() calls bypass the signals; run `manage.py backfill_reminders`
+after those.
+"""
+import logging
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+from django.utils import timezone
+
+from outbox import delivery
+from outbox.models import OutboxEmail
+from .models import Booking, ScheduledReminder
+from .scheduler import REMINDER_LOOKUPS, reminder_message
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OFFSETS = (2 * 60,)
+SCHEDULE_BATCH_SIZE = 1000
+QUEUE_BATCH_SIZE = 200
+MAX_SLEEP = timedelta(minutes=1)
+# A reminder this late would announce the wrong time ("starting in 2 hours"); skip it
+LATE_GRACE = timedelta(minutes=30)
+RETENTION = timedelta(days=7)
+
+
+def reminder_offsets():
+    return tuple(getattr(settings, 'BOOKING_REMINDER_OFFSETS', DEFAULT_OFFSETS))
+
+
+def describe_offset(minutes):
+    if minutes % 60:
+        return f"{minutes} minutes"
+    hours = minutes // 60
+    return f"{hours} hour{'s' if hours != 1 else ''}"
+
+
+def schedule_bookings(booking_ids, now=None):
+    """Bring the scheduled reminders of the given bookings in line with their current start."""
+    now = now or timezone.now()
+    offsets = reminder_offsets()
+    booking_ids = list(booking_ids)
+    for start in range(0, len(booking_ids), SCHEDULE_BATCH_SIZE):
+        batch = booking_ids[start:start + SCHEDULE_BATCH_SIZE]
+        wanted = {}
+        for booking_id, day, start_time in Booking.objects.filter(
+            pk__in=batch, state='confirmed', data__isnull=False, start_time__isnull=False,
+        ).values_list('pk', 'data', 'start_time'):
+            starts_at = timezone.make_aware(datetime.combine(day, start_time))
+            for offset in offsets:
+                wanted[booking_id, offset] = starts_at - timedelta(minutes=offset)
+
+        # Reminders of an unchanged start stay, queued or not; any other is replaced
+        kept = set()
+        stale = []
+        for pk, booking_id, offset, due_at in ScheduledReminder.objects.filter(
+            booking_id__in=batch,
+        ).values_list('pk', 'booking_id', 'offset', 'due_at'):
+            if wanted.get((booking_id, offset)) == due_at:
+                kept.add((booking_id, offset))
+            else:
+                stale.append(pk)
+        ScheduledReminder.objects.filter(pk__in=stale).delete()
+        ScheduledReminder.objects.bulk_create([
+            ScheduledReminder(booking_id=booking_id, offset=offset, due_at=due_at)
+            for (booking_id, offset), due_at in wanted.items()
+            if (booking_id, offset) not in kept and due_at > now
+        ])
+
+
+def next_due_at():
+    """Due time of the earliest reminder not queued yet, or None."""
+    return ScheduledReminder.objects.filter(
+        queued_at__isnull=True,
+    ).order_by('due_at').values_list('due_at', flat=True).first()
+
+
+def queue_due_reminders(now=None, batch_size=QUEUE_BATCH_SIZE):
+    """
+    Move every reminder due by now into the outbox; returns the number of emails queued.
+    Reminders overdue by more than LATE_GRACE, or whose booking has already started (after
+    the scheduler was down, say), are marked queued without sending anything, and queued
+    reminders older than RETENTION are deleted.
+    """
+    now = now or timezone.now()
+    offsets = set(reminder_offsets())
+    queued = 0
+    while True:
+        with transaction.atomic():
+            due = ScheduledReminder.objects.filter(
+                queued_at__isnull=True, due_at__lte=now,
+            ).order_by('due_at', 'pk')
+            if connections[due.db].features.has_select_for_update_skip_locked:
+                due = due.select_for_update(skip_locked=True)
+            reminders = list(due.values_list('pk', 'booking_id', 'offset', 'due_at')[:batch_size])
+            if not reminders:
+                break
+            bookings = {
+                row['pk']: row for row in Booking.objects.filter(
+                    pk__in={booking_id for _, booking_id, _, _ in reminders}, state='confirmed',
+                ).values(*REMINDER_LOOKUPS)
+            }
+            for _, booking_id, offset, due_at in reminders:
+                row = bookings.get(booking_id)
+                # Offsets removed from the settings since the reminder was scheduled are dropped too
+                if row is None or row['start_time'] is None or offset not in offsets or due_at < now - LATE_GRACE:
+                    continue
+                if timezone.make_aware(datetime.combine(row['data'], row['start_time'])) <= now:
+                    continue
+                when = describe_offset(offset)
+                for recipient in ('professional', 'customer'):
+                    if not row[f'{recipient}__email']:
+                        continue
+                    message = reminder_message(row, recipient, heading=f'in {when}', when=f'starting in {when}')
+                    OutboxEmail.enqueue(
+                        message.subject, message.body, message.to,
+                        lane=OutboxEmail.REMINDER, from_email=message.from_email,
+                    )
+                    queued += 1
+            ScheduledReminder.objects.filter(pk__in=[pk for pk, _, _, _ in reminders]).update(queued_at=timezone.now())
+    ScheduledReminder.objects.filter(queued_at__isnull=False, due_at__lt=now - RETENTION).delete()
+    return queued
+
+
+class ReminderScheduler:
+    """
+    Keeps one date job on an APScheduler scheduler, set for the next reminder due time.
+    Works with a BackgroundScheduler inside a web process or a BlockingScheduler in
+    `manage.py run_reminder_scheduler`. wrap, if given, is called with the run function
+    and returns the one to call instead (jobs.runner uses it to track and fence runs).
+    """
+
+    def __init__(self, scheduler, max_sleep=MAX_SLEEP, wrap=None):
+        self.scheduler = scheduler
+        self.max_sleep = max_sleep
+        self.wrap = wrap
+        self.stopped = False
+
+    def start(self):
+        self.plan(timezone.now())
+
+    def stop(self):
+        """Plan no further wakes; removing a job already planned is up to the caller."""
+        self.stopped = True
+
+    def plan(self, run_date):
+        if self.stopped:
+            return
+        # A fresh job per wake: the scheduler removes the one that just ran by its id
+        self.scheduler.add_job(self.wake, 'date', run_date=run_date, misfire_grace_time=None)
+
+    def next_wake(self):
+        now = timezone.now()
+        latest = now + self.max_sleep
+        due = next_due_at()
+        return latest if due is None else max(now, min(due, latest))
+
+    def run(self):
+        """Queue the due reminders and send them; returns the number of emails queued."""
+        queued = queue_due_reminders()
+        if queued:
+            totals = delivery.drain()
+            logger.info(f"Queued {queued} reminder email(s); outbox sent {totals['sent']}, "
+                        f"retrying {totals['retried']}, failed {totals['failed']}.")
+        return queued
+
+    def wake(self):
+        close_old_connections()
+        try:
+            (self.wrap(self.run) if self.wrap else self.run)()
+        except Exception:
+            logger.exception("Reminder scheduler run failed")
+        finally:
+            try:
+                self.plan(self.next_wake())
+            except Exception:
+                logger.exception("Could not plan the next reminder run")
+                self.plan(timezone.now() + self.max_sleep)
+            close_old_connections()
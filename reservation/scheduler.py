@@ -1,81 +1,231 @@
-from django.core.mail import send_mail
+"""
+Reminder emails for tomorrow's reservations, sent daily by the leader scheduler
+(jobs.runner, at settings.BOOKING_REMINDER_DAILY_AT) or by `manage.py send_reminders`.
+
+The confirmed bookings of the day are read in primary-key chunks of plain rows (the
+MySQL driver would buffer a single big result set client-side). For each chunk, the
+participants already reminded are looked up in the BookingReminder ledger and skipped,
+the remaining emails are sent by a bounded pool of sender threads that each keep one
+SMTP connection open for the whole run, and the successful sends are recorded in the
+ledger in one INSERT. Rerunning the job therefore only sends what is still missing; a
+crash between sending a chunk and recording it can repeat that chunk's emails.
+
+In digest mode professionals get one agenda of all their reservations of the day
+instead of one email per reservation, built from a single query ordered by
+professional and start time; customers are still reminded individually.
+"""
+import logging
+import threading
+import time as timer
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+from datetime import timedelta
+
 from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
 from django.utils import timezone
-from datetime import timedelta
-import logging
 
 logger = logging.getLogger(__name__)
 
-def send_booking_reminders():
-    """
-    Send reminders for reservations scheduled tomorrow.
-    This will be triggered externally via a cron job.
-    """
-    from .models import Booking  
+REMINDER_CHUNK_SIZE = 500
+REMINDER_SENDERS = 4
 
-    tomorrow = timezone.now().date() + timedelta(days=1)
-    upcoming_reservations = Booking.objects.filter(
-        data=tomorrow,
-        status='confirmed'
-    ).select_related('professional').select_related('customer')
+REMINDER_LOOKUPS = (
+    'pk', 'data', 'start_time', 'end_time', 'title', 'internal_notes',
+    'professional__email', 'professional__full_name', 'customer__email', 'customer__full_name',
+)
 
-    if not upcoming_reservations.exists():
-        logger.info("No upcoming reservations found for tomorrow.")
-        return
+DIGEST_LOOKUPS = (
+    'pk', 'professional_id', 'professional__email', 'professional__full_name',
+    'start_time', 'end_time', 'title', 'customer__full_name', 'class_id__name',
+)
 
-    for booking in upcoming_reservations:
-        try:
-            # Send to professional
-            if booking.professional:
-                send_reminder_email(
-                    recipient_email=booking.professional.email,
-                    recipient_name=booking.professional.full_name,
-                    booking=booking
-                )
-
-            # Send to the customer (if any)
-            if booking.customer:
-                send_reminder_email(
-                    recipient_email=booking.customer.email,
-                    recipient_name=booking.customer.full_name,
-                    booking=booking
-                )
 
-        except Exception as e:
-            logger.error(f"Error sending reminder for reservation {booking.id}: {e}")
+class SenderPool:
+    """Bounded pool of threads sending emails, each over its own reused connection."""
 
-    logger.info(f"Reminders sent for {upcoming_reservations.count()} reservation(s) scheduled for {tomorrow}.")
+    def __init__(self, workers=REMINDER_SENDERS):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='reminder-sender')
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.connections = []
 
+    def connection(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = self.local.connection = get_connection(fail_silently=False)
+            with self.lock:
+                self.connections.append(connection)
+        return connection
+
+    def send(self, message):
+        connection = self.connection()
+        try:
+            # No-op once open; send_messages leaves connections it did not open alone
+            connection.open()
+            connection.send_messages([message])
+        except Exception:
+            # The session may be unusable after an SMTP error; the next send reconnects
+            connection.close()
+            raise
+
+    def submit(self, message):
+        return self.executor.submit(self.send, message)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        for connection in self.connections:
+            connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def iter_reminder_chunks(queryset, chunk_size=REMINDER_CHUNK_SIZE):
+    """Yield lists of REMINDER_LOOKUPS dicts of queryset, chunk by chunk in primary-key order."""
+    queryset = queryset.order_by('pk').values(*REMINDER_LOOKUPS)
+    last_id = 0
+    while True:
+        rows = list(queryset.filter(pk__gt=last_id)[:chunk_size])
+        if rows:
+            yield rows
+        if len(rows) < chunk_size:
+            return
+        last_id = rows[-1]['pk']
+
+
+def reminder_message(row, recipient, heading='Tomorrow', when='scheduled for TOMORROW'):
+    """EmailMessage reminding the row's professional or customer of their reservation."""
+    subject = f"Reminder: Reservation {heading} - {row['data']}"
 
-def send_reminder_email(recipient_email, recipient_name, booking):
-    """Send individual reminder email."""
-    subject = f"Reminder: Reservation Tomorrow - {booking.data}"
-    
     time_text = ''
-    if booking.start_time and booking.end_time:
-        time_text = f" from {booking.start_time} to {booking.end_time}"
+    if row['start_time'] and row['end_time']:
+        time_text = f" from {row['start_time']} to {row['end_time']}"
 
-    message = f"""Hello {recipient_name},
+    message = f"""Hello {row[f'{recipient}__full_name']},
 
-This is a reminder that you have a reservation scheduled for TOMORROW:
+This is a reminder that you have a reservation {when}:
 
-Date: {booking.data}
+Date: {row['data']}
 Time: {time_text or 'N/A'}
-Professional: {booking.professional.full_name if booking.professional else 'N/A'}
-Title: {booking.title or 'N/A'}
-Notes: {booking.internal_notes or 'No additional notes'}
+Professional: {row['professional__full_name'] or 'N/A'}
+Title: {row['title'] or 'N/A'}
+Notes: {row['internal_notes'] or 'No additional notes'}
 
 Please make sure to attend on time.
 
 Best regards,
 Reservation System
 """
+    return EmailMessage(subject, message, settings.DEFAULT_FROM_EMAIL, [row[f'{recipient}__email']])
+
+
+def digest_message(day, rows):
+    """EmailMessage with a professional's agenda of the day, from DIGEST_LOOKUPS rows in time order."""
+    lines = []
+    for row in rows:
+        time_text = 'N/A'
+        if row['start_time'] and row['end_time']:
+            time_text = f"{row['start_time']:%H:%M}-{row['end_time']:%H:%M}"
+        with_whom = row['customer__full_name'] or row['class_id__name'] or 'N/A'
+        lines.append(f"{time_text}  {row['title'] or 'Reservation'} - {with_whom}")
+    agenda = '\n'.join(lines)
+
+    message = f"""Hello {rows[0]['professional__full_name']},
+
+This is a reminder of your {len(rows)} reservation(s) scheduled for TOMORROW, {day}:
 
-    send_mail(
-        subject,
-        message,
-        settings.DEFAULT_FROM_EMAIL,
-        [recipient_email],
-        fail_silently=False,
+{agenda}
+
+Best regards,
+Reservation System
+"""
+    return EmailMessage(
+        f"Your agenda for tomorrow - {day}", message, settings.DEFAULT_FROM_EMAIL, [rows[0]['professional__email']],
+    )
+
+
+def _record(pending, summary):
+    """Wait for {(booking_ids, recipient): future} and record the sent emails in the ledger."""
+    from .models import BookingReminder
+
+    sent = []
+    for (booking_ids, recipient), future in pending.items():
+        try:
+            future.result()
+        except Exception as e:
+            summary['failed'] += 1
+            logger.error(f"Error sending {recipient} reminder for reservation(s) {', '.join(map(str, booking_ids))}: {e}")
+        else:
+            summary['sent'] += 1
+            sent.extend(BookingReminder(booking_id=booking_id, recipient=recipient) for booking_id in booking_ids)
+    BookingReminder.objects.bulk_create(sent, ignore_conflicts=True)
+
+
+def send_professional_digests(day, bookings, senders, summary):
+    """
+    Send one agenda to every professional with a reservation in bookings they have not
+    been reminded of; the agenda lists all of the day's reservations.
+    """
+    from .models import BookingReminder
+
+    reminded = set(BookingReminder.objects.filter(
+        booking__in=bookings, recipient='professional',
+    ).values_list('booking_id', flat=True))
+    rows = bookings.order_by('professional_id', 'start_time', 'pk').values(*DIGEST_LOOKUPS)
+    pending = {}
+    for _, agenda in groupby(rows.iterator(), key=lambda row: row['professional_id']):
+        agenda = list(agenda)
+        booking_ids = tuple(row['pk'] for row in agenda)
+        if not agenda[0]['professional__email']:
+            continue
+        if reminded.issuperset(booking_ids):
+            summary['skipped'] += 1
+            continue
+        pending[booking_ids, 'professional'] = senders.submit(digest_message(day, agenda))
+    _record(pending, summary)
+
+
+def send_booking_reminders(day=None, workers=REMINDER_SENDERS, chunk_size=REMINDER_CHUNK_SIZE, digest=False):
+    """
+    Remind the professional and customer of every confirmed reservation on day (default:
+    tomorrow) who has not been reminded yet; with digest, professionals get one agenda each.
+    Returns {'bookings', 'sent', 'skipped', 'failed', 'seconds'}, counting emails.
+    """
+    from .models import Booking, BookingReminder
+
+    day = day or timezone.now().date() + timedelta(days=1)
+    summary = {'bookings': 0, 'sent': 0, 'skipped': 0, 'failed': 0}
+    began = timer.perf_counter()
+    bookings = Booking.objects.filter(data=day, state='confirmed')
+    recipients = ('customer',) if digest else ('professional', 'customer')
+
+    with SenderPool(workers) as senders:
+        if digest:
+            send_professional_digests(day, bookings, senders, summary)
+        for rows in iter_reminder_chunks(bookings, chunk_size):
+            summary['bookings'] += len(rows)
+            reminded = set(BookingReminder.objects.filter(
+                booking_id__in=[row['pk'] for row in rows],
+            ).values_list('booking_id', 'recipient'))
+
+            pending = {}
+            for row in rows:
+                for recipient in recipients:
+                    if not row[f'{recipient}__email']:
+                        continue
+                    if (row['pk'], recipient) in reminded:
+                        summary['skipped'] += 1
+                        continue
+                    pending[(row['pk'],), recipient] = senders.submit(reminder_message(row, recipient))
+            _record(pending, summary)
+
+    summary['seconds'] = timer.perf_counter() - began
+    logger.info(
+        f"Reminders for {day}: {summary['bookings']} reservation(s), {summary['sent']} sent, "
+        f"{summary['skipped']} already sent, {summary['failed']} failed in {summary['seconds']:.1f} s."
     )
-    logger.info(f"Reminder email sent to {recipient_email} for reservation {booking.id}.")
+    return summary
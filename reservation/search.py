@@ -0,0 +1,99 @@
+"""
+Token search over bookings.
+
+Every booking owns the normalized words (lower case, accents stripped) of its title,
+services, internal notes and the names of its professional, customer and class as
+BookingSearchToken rows. A query matches the bookings holding, for every query word, a
+token starting with it; each word is an index range scan of (token, booking) instead of
+a LIKE '%...%' scan over the bookings table. Words shorter than MIN_TOKEN_LENGTH are
+ignored.
+
+Tokens follow Booking saves and renames of users and classes through
+reservation.signals. Bulk queryset.update() calls bypass them; run
+`manage.py backfill_search_tokens` after those.
+"""
+import re
+import unicodedata
+
+from django.db import connections
+from django.db.models import Q
+from rest_framework.filters import SearchFilter
+
+from .models import Booking, BookingSearchToken
+
+MIN_TOKEN_LENGTH = 2
+MAX_TOKEN_LENGTH = BookingSearchToken._meta.get_field('token').max_length
+REBUILD_BATCH_SIZE = 1000
+
+SEARCH_SOURCES = (
+    'title', 'services', 'internal_notes',
+    'professional__full_name', 'customer__full_name', 'class_id__name',
+)
+
+_WORD = re.compile(r'\w+')
+
+
+def normalize(text):
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+def words(text):
+    """Normalized words of text, in order, truncated to MAX_TOKEN_LENGTH."""
+    return [
+        word[:MAX_TOKEN_LENGTH]
+        for word in _WORD.findall(normalize(text or ''))
+        if len(word) >= MIN_TOKEN_LENGTH
+    ]
+
+
+def token_rows(rows):
+    """BookingSearchToken instances for (booking_id, *SEARCH_SOURCES) rows."""
+    for booking_id, *texts in rows:
+        tokens = {word for text in texts for word in words(text)}
+        for token in sorted(tokens):
+            yield BookingSearchToken(booking_id=booking_id, token=token)
+
+
+def rebuild_tokens(booking_ids):
+    """Recompute the tokens of the given bookings."""
+    booking_ids = list(booking_ids)
+    for start in range(0, len(booking_ids), REBUILD_BATCH_SIZE):
+        batch = booking_ids[start:start + REBUILD_BATCH_SIZE]
+        BookingSearchToken.objects.filter(booking_id__in=batch).delete()
+        rows = Booking.objects.filter(pk__in=batch).values_list('pk', *SEARCH_SOURCES)
+        BookingSearchToken.objects.bulk_create(token_rows(rows), batch_size=REBUILD_BATCH_SIZE)
+
+
+def prefix_condition(word, vendor):
+    if vendor == 'sqlite':
+        # SQLite only uses an index for LIKE with case_sensitive_like on; a range on the
+        # binary collation selects the same tokens
+        return Q(token__gte=word, token__lt=word[:-1] + chr(ord(word[-1]) + 1))
+    if vendor == 'mysql':
+        # startswith compiles to LIKE BINARY, which cannot use the index of a column in a
+        # case-insensitive collation; tokens are casefolded already, so a plain LIKE under
+        # the column collation selects the same tokens through the (token, booking) index
+        return Q(token__istartswith=word)
+    return Q(token__startswith=word)
+
+
+def search_bookings(queryset, text):
+    """queryset narrowed to the bookings matching every word of text."""
+    vendor = connections[queryset.db].vendor
+    for word in dict.fromkeys(words(text)):
+        matches = BookingSearchToken.objects.filter(prefix_condition(word, vendor)).values('booking_id')
+        queryset = queryset.filter(pk__in=matches)
+    return queryset
+
+
+class BookingSearchFilter(SearchFilter):
+    """?search= over the booking search tokens, within the bookings the view already allows."""
+    search_description = (
+        'Words to find in the title, services, internal notes or participant names. '
+        'Each word matches the start of a word, accents and case ignored.'
+    )
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, '')
+        return search_bookings(queryset, text) if text else queryset
@@ -1,11 +1,17 @@
 from rest_framework import serializers
-from .models import Booking
+from . import availability
+from .models import Booking, AvailabilityException, ProfessionalDayLock, RoomDayLock
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.utils import timezone
 from user.models import User
-from django.core.mail import send_mail
-from django.conf import settings
+from django.db import transaction
 from decimal import Decimal
 from classes.models import Class
+from rooms.models import Room
+from services.models import Service
+from outbox.models import OutboxEmail
+from FisioActif.fast_serializers import FastListSerializer
+from FisioActif.sparse_fields import SparseFieldsMixin
 
 
 class UserDataSerializer(serializers.ModelSerializer):
@@ -20,7 +26,9 @@ class CustomerDataSerializer(serializers.ModelSerializer):
         fields = ['id', 'full_name', 'email']
 
 
-class BookingSerializer(serializers.ModelSerializer):
+class BookingSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = ('professional_details', 'customer_details', 'class_details')
+
     # Map to the simplified model fields: professional (FK) and customer (FK)
     professional = serializers.PrimaryKeyRelatedField(
         queryset=User.objects.filter(role__in=['professional', 'teacher']),
@@ -41,14 +49,27 @@ class BookingSerializer(serializers.ModelSerializer):
     professional_details = UserDataSerializer(source='professional', read_only=True)
     customer_details = CustomerDataSerializer(source='customer', read_only=True)
     class_details = serializers.SerializerMethodField(read_only=True)
+    room = serializers.PrimaryKeyRelatedField(
+        queryset=Room.objects.filter(status=True),
+        allow_null=True,
+        required=False,
+    )
+    service_ids = serializers.PrimaryKeyRelatedField(
+        source='booked_services',
+        queryset=Service.objects.all(),
+        many=True,
+        required=False,
+    )
 
     class Meta:
         model = Booking
         fields = [
             'id', 'title', 'professional', 'professional_details', 'customer', 'customer_details', 
-            'class_id', 'class_details', 'coupon', 'services', 'room_equipment', 'data', 'start_time', 
+            'class_id', 'class_details', 'coupon', 'services', 'service_ids', 'total_duration', 'total_price',
+            'room_equipment', 'room', 'data', 'start_time', 
             'end_time', 'internal_notes', 'treatment_record_marking', 'treatment_record_customer_file', 'state'
         ]
+        read_only_fields = ['total_duration', 'total_price']
         extra_kwargs = {
             'status': {'required': False},
             'created_at': {'read_only': True},
@@ -92,13 +113,21 @@ class BookingSerializer(serializers.ModelSerializer):
         return value
 
     def create(self, validated_data):
-        booking = Booking.objects.create(**validated_data)
-        # Deduct 1 hour from professional's remaining_hours (not for admin)
-        if getattr(booking.professional, 'role', None) in ['professional', 'customer']:
-            # booking.professional.remaining_hours = booking.professional.remaining_hours - Decimal('1')
-            booking.professional.save()
+        booked_services = validated_data.pop('booked_services', None)
+        if booked_services and not validated_data.get('services'):
+            validated_data['services'] = self.services_label(booked_services)
+        with transaction.atomic():
+            booking = Booking(**validated_data)
+            self.lock_and_check_overlap(booking)
+            booking.save(force_insert=True)
+            if booked_services is not None:
+                self.set_booked_services(booking, booked_services)
+            # Deduct 1 hour from professional's remaining_hours (not for admin)
+            if getattr(booking.professional, 'role', None) in ['professional', 'customer']:
+                # booking.professional.remaining_hours = booking.professional.remaining_hours - Decimal('1')
+                booking.professional.save()
 
-        self.send_booking_email(booking, 'created')
+            self.send_booking_email(booking, 'created')
         return booking
 
     def update(self, instance, validated_data):
@@ -107,40 +136,134 @@ class BookingSerializer(serializers.ModelSerializer):
             validated_data['customer'] = None
         elif 'customer' in validated_data and validated_data['customer'] is not None:
             validated_data['class_id'] = None
+        booked_services = validated_data.pop('booked_services', None)
+        if booked_services and 'services' not in validated_data:
+            validated_data['services'] = self.services_label(booked_services)
 
-        for attr in ['title', 'professional', 'customer', 'class_id', 'coupon', 'services', 'room_equipment',
+        for attr in ['title', 'professional', 'customer', 'class_id', 'coupon', 'services', 'room_equipment', 'room',
                      'data', 'start_time', 'end_time', 'internal_notes', 'treatment_record_marking',
                      'treatment_record_customer_file', 'state']:
             if attr in validated_data:
                 setattr(instance, attr, validated_data[attr])
-        instance.save()
-        self.send_booking_email(instance, 'updated')
+        with transaction.atomic():
+            self.lock_and_check_overlap(instance)
+            instance.save()
+            if booked_services is not None:
+                self.set_booked_services(instance, booked_services)
+            self.send_booking_email(instance, 'updated')
         return instance
+
+    @staticmethod
+    def services_label(services):
+        """The legacy free-text services value for the given services."""
+        label = ', '.join(service.name for service in services)
+        return label[:Booking._meta.get_field('services').max_length]
+
+    @staticmethod
+    def set_booked_services(booking, services):
+        """Replace the booking's services; the m2m signal recomputes the stored totals."""
+        booking.booked_services.set(services)
+        booking.refresh_from_db(fields=['total_duration', 'total_price', 'updated_at'])
+
+    def lock_and_check_overlap(self, booking):
+        """
+        Lock the booking's professional-day (then room-day) and reject it if it overlaps another
+        active booking of the same professional, or would put more bookings in its room at once
+        than the room's capacity. A booking without a room is linked to the active room named by
+        its room_equipment text (matched like migration 0009 does), if any; otherwise it needs no
+        room. Must run inside the transaction that saves the booking; locks are always taken in
+        that order so writers cannot deadlock.
+        """
+        if booking.state in Booking.RELEASED_STATES:
+            return
+        if not (booking.data and booking.start_time and booking.end_time):
+            return
+        overlapping = Booking.objects.filter(
+            data=booking.data,
+            start_time__lt=booking.end_time,
+            end_time__gt=booking.start_time,
+        ).exclude(state__in=Booking.RELEASED_STATES)
+        if booking.pk:
+            overlapping = overlapping.exclude(pk=booking.pk)
+
+        if booking.professional_id:
+            ProfessionalDayLock.acquire(booking.professional_id, booking.data)
+            if overlapping.filter(professional_id=booking.professional_id).exists():
+                raise serializers.ValidationError(
+                    "The professional already has a reservation between "
+                    f"{booking.start_time:%H:%M} and {booking.end_time:%H:%M} on {booking.data}."
+                )
+        if not booking.room_id and booking.room_equipment and booking.room_equipment.strip():
+            booking.room = Room.objects.filter(status=True, name__iexact=booking.room_equipment.strip()).first()
+        if booking.room_id:
+            RoomDayLock.acquire(booking.room_id, booking.data)
+            capacity = Room.objects.values_list('capacity', flat=True).get(pk=booking.room_id)
+            taken = availability.booking_intervals(
+                overlapping.filter(room_id=booking.room_id).values_list('start_time', 'end_time')
+            )
+            wanted = availability.booking_intervals([(booking.start_time, booking.end_time)])
+            if any(
+                full_start < end and full_end > start
+                for start, end in wanted
+                for full_start, full_end in availability.saturated_intervals(taken, capacity)
+            ):
+                raise serializers.ValidationError(
+                    "The room is already fully reserved between "
+                    f"{booking.start_time:%H:%M} and {booking.end_time:%H:%M} on {booking.data}."
+                )
     
     def send_booking_email(self, booking, action):
-        """Send email notification to client and professional."""
+        """Queue the notification to client and professional in the booking's transaction."""
         subject = f"Reservation {action.capitalize()} Notification"
         time_text = ''
         if booking.start_time and booking.end_time:
             time_text = f" from {booking.start_time} to {booking.end_time}"
         message = f"Your reservation for {booking.data}{time_text} has been {action}."
 
-        # Send email to the professional
+        # Email to the professional
         if getattr(booking, 'professional', None):
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [booking.professional.email],
-                fail_silently=False,
-            )
+            OutboxEmail.enqueue(subject, message, [booking.professional.email])
 
-        # Send email to the customer (if any)
+        # Email to the customer (if any)
         if getattr(booking, 'customer', None):
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [booking.customer.email],
-                fail_silently=False,
-            )
+            OutboxEmail.enqueue(subject, message, [booking.customer.email])
+
+
+def class_details(class_pk, class_name):
+    return {"id": class_pk, "name": class_name} if class_pk else None
+
+
+class FastBookingSerializer(FastListSerializer):
+    """Read-only BookingSerializer output for list responses."""
+    serializer_class = BookingSerializer
+    method_fields = {
+        'class_details': (('class_id', 'class_id__name'), class_details),
+    }
+
+
+class AvailabilityExceptionSerializer(serializers.ModelSerializer):
+    professional = serializers.PrimaryKeyRelatedField(
+        queryset=User.objects.filter(role='professional'),
+        allow_null=True,
+        required=False,
+    )
+    professional_details = UserDataSerializer(source='professional', read_only=True)
+
+    class Meta:
+        model = AvailabilityException
+        fields = [
+            'id', 'professional', 'professional_details', 'date_from', 'date_to',
+            'start_time', 'end_time', 'reason', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'created_at', 'updated_at']
+
+    def validate(self, data):
+        # Run the model checks on the instance as it will be saved
+        fields = ('date_from', 'date_to', 'start_time', 'end_time')
+        attrs = {field: getattr(self.instance, field) for field in fields} if self.instance else {}
+        attrs.update({field: data[field] for field in fields if field in data})
+        try:
+            AvailabilityException(**attrs).clean()
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError(exc.message_dict if hasattr(exc, 'error_dict') else exc.messages)
+        return data
@@ -0,0 +1,164 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, pre_delete, pre_save, post_save, post_delete
+from django.db.models import Q
+from django.dispatch import receiver
+
+from classes.models import Class
+from rooms.models import Room
+from user.models import User
+from user.schedule import DAY_FIELDS, DAY_PREFIXES, SCHEDULE_FIELDS
+from .availability import daterange
+from .models import Booking, AvailabilityException
+from . import availability_cache, occupancy, reminders, search
+
+
+# Bulk queryset.update()/delete() calls bypass these signals and must invalidate explicitly.
+# Availability cache versions are bumped, and reminders scheduled, only once the saving
+# transaction commits: bumped earlier, a concurrent request could read the new version,
+# query without the uncommitted row and cache a stale answer under the fresh key. The
+# occupancy grid and search tokens are rows of their own and commit with the booking.
+
+@receiver(pre_save, sender=Booking)
+def remember_booking_day(sender, instance, **kwargs):
+    """Keep the professional-day the booking occupied before this save."""
+    instance._availability_previous = None
+    if instance.pk:
+        instance._availability_previous = Booking.objects.filter(
+            pk=instance.pk
+        ).values_list('professional_id', 'data').first()
+
+
+@receiver(post_save, sender=Booking)
+def invalidate_booking_day(sender, instance, **kwargs):
+    days = [(instance.professional_id, instance.data)]
+    previous = getattr(instance, '_availability_previous', None)
+    if previous and previous != days[0]:
+        days.append(previous)
+    occupancy.rebuild_days(days)
+    search.rebuild_tokens([instance.pk])
+    for professional_id, day in days:
+        transaction.on_commit(partial(availability_cache.invalidate_day, professional_id, day))
+    transaction.on_commit(partial(reminders.schedule_bookings, [instance.pk]))
+
+
+@receiver(m2m_changed, sender=Booking.booked_services.through)
+def refresh_booking_totals(sender, instance, action, reverse, pk_set, **kwargs):
+    """Keep total_duration and total_price in step with booked_services, from either side."""
+    if action == 'pre_clear' and reverse:
+        instance._cleared_booking_ids = list(instance.bookings.values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        if not reverse:
+            booking_ids = [instance.pk]
+        elif action == 'post_clear':
+            booking_ids = getattr(instance, '_cleared_booking_ids', [])
+        else:
+            booking_ids = list(pk_set)
+        Booking.refresh_service_totals(booking_ids)
+
+
+@receiver(post_delete, sender=Booking)
+def invalidate_deleted_booking_day(sender, instance, **kwargs):
+    occupancy.rebuild_days([(instance.professional_id, instance.data)])
+    transaction.on_commit(partial(availability_cache.invalidate_day, instance.professional_id, instance.data))
+
+
+def _invalidate_exception(professional_id, date_from, date_to):
+    if professional_id is None:
+        transaction.on_commit(availability_cache.invalidate_all)
+    else:
+        transaction.on_commit(partial(availability_cache.invalidate_days, professional_id, list(daterange(date_from, date_to))))
+
+
+@receiver(pre_save, sender=AvailabilityException)
+def remember_exception_range(sender, instance, **kwargs):
+    instance._availability_previous = None
+    if instance.pk:
+        instance._availability_previous = AvailabilityException.objects.filter(
+            pk=instance.pk
+        ).values_list('professional_id', 'date_from', 'date_to').first()
+
+
+@receiver(post_save, sender=AvailabilityException)
+def invalidate_exception_range(sender, instance, **kwargs):
+    _invalidate_exception(instance.professional_id, instance.date_from, instance.date_to)
+    previous = getattr(instance, '_availability_previous', None)
+    if previous and previous != (instance.professional_id, instance.date_from, instance.date_to):
+        _invalidate_exception(*previous)
+
+
+@receiver(post_delete, sender=AvailabilityException)
+def invalidate_deleted_exception_range(sender, instance, **kwargs):
+    _invalidate_exception(instance.professional_id, instance.date_from, instance.date_to)
+
+
+@receiver(pre_save, sender=User)
+def remember_weekly_schedule(sender, instance, update_fields=None, **kwargs):
+    """Keep the weekly schedule stored before this save to find the weekdays that change."""
+    instance._schedule_previous = None
+    if not instance.pk or instance.role != 'professional':
+        return
+    if update_fields is not None and not set(update_fields) & set(SCHEDULE_FIELDS):
+        return
+    instance._schedule_previous = User.objects.filter(pk=instance.pk).values_list(*SCHEDULE_FIELDS).first()
+
+
+@receiver(post_save, sender=User)
+def invalidate_weekly_schedule(sender, instance, **kwargs):
+    previous = getattr(instance, '_schedule_previous', None)
+    if previous is None:
+        return
+    current = tuple(getattr(instance, field) for field in SCHEDULE_FIELDS)
+    changed = [
+        weekday for weekday in range(len(DAY_PREFIXES))
+        if previous[weekday * len(DAY_FIELDS):(weekday + 1) * len(DAY_FIELDS)]
+        != current[weekday * len(DAY_FIELDS):(weekday + 1) * len(DAY_FIELDS)]
+    ]
+    if changed:
+        transaction.on_commit(partial(availability_cache.invalidate_weekdays, instance.pk, changed))
+
+
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+def invalidate_rooms(sender, **kwargs):
+    transaction.on_commit(availability_cache.invalidate_rooms)
+
+
+@receiver(pre_save, sender=User)
+@receiver(pre_save, sender=Class)
+def remember_search_name(sender, instance, update_fields=None, **kwargs):
+    """Keep the name stored before this save; bookings are searchable by it."""
+    name_field = 'full_name' if sender is User else 'name'
+    instance._search_name_previous = None
+    if instance.pk and (update_fields is None or name_field in update_fields):
+        instance._search_name_previous = sender.objects.filter(pk=instance.pk).values_list(name_field, flat=True).first()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Class)
+def rebuild_renamed_search_tokens(sender, instance, **kwargs):
+    previous = getattr(instance, '_search_name_previous', None)
+    if previous is None:
+        return
+    if previous != (instance.full_name if sender is User else instance.name):
+        search.rebuild_tokens(_named_bookings(sender, instance).values_list('pk', flat=True))
+
+
+def _named_bookings(sender, instance):
+    if sender is User:
+        return Booking.objects.filter(Q(professional=instance) | Q(customer=instance))
+    return Booking.objects.filter(class_id=instance)
+
+
+@receiver(pre_delete, sender=User)
+@receiver(pre_delete, sender=Class)
+def remember_named_bookings(sender, instance, **kwargs):
+    """Bookings that keep the deleted name as a token once their foreign key is set to NULL."""
+    instance._search_bookings = list(_named_bookings(sender, instance).values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Class)
+def rebuild_unnamed_search_tokens(sender, instance, **kwargs):
+    search.rebuild_tokens(getattr(instance, '_search_bookings', []))
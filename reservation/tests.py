@@ -1,3 +1,1224 @@
-from django.test import TestCase
+import csv
+import json
+import random
+from importlib import import_module
+from io import StringIO
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.apps import apps
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+from django.db.models import Q
+from django.utils.http import http_date
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from apscheduler.schedulers.background import BackgroundScheduler
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+
+from reservation import availability, availability_cache, occupancy, reminders, scheduler, search
+from reservation.management.commands.bench_availability import legacy_slots, synthetic_day
+from reservation.management.commands.bench_booking_contention import count_overlaps
+from reservation.export import iter_rows
+from reservation.models import (
+    Booking, AvailabilityException, BookingReminder, BookingSearchToken, OccupancySlot, ProfessionalDayLock,
+    ScheduledReminder,
+)
+from reservation.serializers import BookingSerializer, FastBookingSerializer
+from reservation.views import get_available_slots_for_professional, get_available_slots_for_range, get_room_start_ranges
+from classes.models import Class
+from FisioActif.test_utils import QueryBudgetMixin
+from outbox.models import OutboxEmail
+from rooms.models import Room
+from services.models import Service
+from user.schedule import DAY_PREFIXES
+
+
+def set_weekly_schedule(user, start=time(9, 0), end=time(18, 0), break_from=time(13, 0), break_to=time(14, 0)):
+    for prefix in DAY_PREFIXES:
+        setattr(user, f"{prefix}_enabled", True)
+        setattr(user, f"{prefix}_start", start)
+        setattr(user, f"{prefix}_end", end)
+        setattr(user, f"{prefix}_break_from", break_from)
+        setattr(user, f"{prefix}_break_to", break_to)
+    user.save()
+
+
+class AvailabilityEngineTest(TestCase):
+    def test_merge_intervals(self):
+        self.assertEqual(
+            availability.merge_intervals([(30, 60), (0, 10), (50, 90), (90, 100)]),
+            [[0, 10], [30, 90], [90, 100]],
+        )
+
+    def test_free_windows(self):
+        windows = availability.free_windows(540, 1080, [(780, 840), (600, 660), (0, 560)])
+        self.assertEqual(windows, [(560, 600), (660, 780), (840, 1080)])
+
+    def test_matches_legacy_scan(self):
+        rng = random.Random(7)
+        professional = get_user_model()(email='bench@example.com')
+        for prefix in DAY_PREFIXES:
+            setattr(professional, f"{prefix}_enabled", True)
+            setattr(professional, f"{prefix}_start", time(7, 10))
+            setattr(professional, f"{prefix}_end", time(21, 0))
+            setattr(professional, f"{prefix}_break_from", time(12, 30))
+            setattr(professional, f"{prefix}_break_to", time(13, 15))
+        day = date(2026, 3, 2)
+        for bookings in (0, 5, 30, 80):
+            for duration in (5, 30, 45, 120):
+                rows = synthetic_day(rng, bookings)
+                hours = availability.working_hours(professional, day)
+                starts = availability.compute_day_slots(hours, availability.booking_intervals(rows), duration)
+                self.assertEqual(
+                    availability.format_slots(starts, duration),
+                    legacy_slots(professional, day, duration, rows),
+                )
+
+    def test_day_off_has_no_slots(self):
+        professional = get_user_model()(email='off@example.com')
+        self.assertIsNone(availability.working_hours(professional, date(2026, 3, 2)))
+
+
+class AvailableSlotsAPITest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        User = get_user_model()
+        self.user = User.objects.create_user(email='client@example.com', password='testpass', full_name='Client', role='client')
+        self.professional = User.objects.create_user(
+            email='pro@example.com', password='testpass', full_name='Pro', role='professional'
+        )
+        set_weekly_schedule(self.professional)
+        self.service = Service.objects.create(name='Massage', reference='MSG', duration=60)
+        self.day = date.today() + timedelta(days=7)
+        Booking.objects.create(
+            professional=self.professional, customer=self.user, data=self.day,
+            start_time=time(10, 0), end_time=time(11, 0),
+        )
+
+    def test_slots_skip_bookings_and_break(self):
+        slots = get_available_slots_for_professional(self.professional, self.day, 60)
+        starts = [slot['start'] for slot in slots]
+        self.assertEqual(starts[:5], ['09:00', '11:00', '11:15', '11:30', '11:45'])
+        self.assertNotIn('12:15', starts)
+        self.assertIn('14:00', starts)
+        self.assertEqual(slots[-1], {'start': '17:00', 'end': '18:00'})
+
+    def test_available_slots_endpoint(self):
+        self.client.force_authenticate(self.user)
+        resp = self.client.get(reverse('reservation-available-slots'), {
+            'professional_id': self.professional.id,
+            'date': self.day.isoformat(),
+            'service_ids': str(self.service.id),
+        })
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data[0], {'start': '09:00', 'end': '10:00'})
+
+    def test_available_slots_range(self):
+        self.client.force_authenticate(self.user)
+        date_to = self.day + timedelta(days=2)
+        with self.assertNumQueries(4):
+            resp = self.client.get(reverse('reservation-available-slots'), {
+                'professional_id': self.professional.id,
+                'date_from': self.day.isoformat(),
+                'date_to': date_to.isoformat(),
+                'service_ids': str(self.service.id),
+            })
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['duration'], 60)
+        self.assertEqual(len(resp.data['slots']), 3)
+        day_slots = resp.data['slots'][self.day.isoformat()]
+        self.assertEqual(day_slots[:2], ['09:00', '11:00'])
+        self.assertEqual(resp.data['slots'][date_to.isoformat()][:2], ['09:00', '09:15'])
+
+    def test_available_slots_range_too_long(self):
+        self.client.force_authenticate(self.user)
+        resp = self.client.get(reverse('reservation-available-slots'), {
+            'professional_id': self.professional.id,
+            'date_from': self.day.isoformat(),
+            'date_to': (self.day + timedelta(days=120)).isoformat(),
+            'service_ids': str(self.service.id),
+        })
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AvailableProfessionalsAPITest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        User = get_user_model()
+        self.user = User.objects.create_user(email='client@example.com', password='testpass', full_name='Client', role='client')
+        self.busy_pro = User.objects.create_user(email='busy@example.com', password='testpass', full_name='Busy', role='professional')
+        self.free_pro = User.objects.create_user(email='free@example.com', password='testpass', full_name='Free', role='professional')
+        self.other_pro = User.objects.create_user(email='other@example.com', password='testpass', full_name='Other', role='professional')
+        for pro in (self.busy_pro, self.free_pro, self.other_pro):
+            set_weekly_schedule(pro)
+        self.massage = Service.objects.create(name='Massage', reference='MSG', duration=45)
+        self.stretch = Service.objects.create(name='Stretch', reference='STR', duration=15)
+        self.massage.collaborators.add(self.busy_pro, self.free_pro, self.other_pro)
+        self.stretch.collaborators.add(self.busy_pro, self.free_pro)
+        self.day = date.today() + timedelta(days=7)
+        Booking.objects.create(
+            professional=self.busy_pro, customer=self.user, data=self.day,
+            start_time=time(9, 0), end_time=time(12, 0),
+        )
+
+    def test_search_within_time_window(self):
+        self.client.force_authenticate(self.user)
+        with self.assertNumQueries(4):
+            resp = self.client.get(reverse('reservation-available-professionals'), {
+                'service_ids': f'{self.massage.id},{self.stretch.id}',
+                'date': self.day.isoformat(),
+                'time_from': '09:00',
+                'time_to': '12:00',
+            })
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['duration'], 60)
+        professionals = resp.data['professionals']
+        self.assertEqual([p['id'] for p in professionals], [self.free_pro.id])
+        self.assertEqual(professionals[0]['slots'][self.day.isoformat()][-1], '11:00')
+
+    def test_requires_services(self):
+        self.client.force_authenticate(self.user)
+        resp = self.client.get(reverse('reservation-available-professionals'), {'date': self.day.isoformat()})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AvailabilityCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.client_user = User.objects.create_user(email='client@example.com', password='testpass', full_name='Client', role='client')
+        self.professional = User.objects.create_user(email='pro@example.com', password='testpass', full_name='Pro', role='professional')
+        set_weekly_schedule(self.professional)
+        self.day = date.today() + timedelta(days=7)
+        self.other_day = self.day + timedelta(days=1)
+
+    def starts(self, day=None):
+        day = day or self.day
+        return [slot['start'] for slot in get_available_slots_for_professional(self.professional, day, 60)]
+
+    def test_hit_after_miss(self):
+        self.starts()
+        with self.assertNumQueries(0):
+            self.starts()
+        self.assertEqual(availability_cache.stats(), {'hits': 1, 'misses': 1, 'hit_ratio': 0.5})
+
+    def test_booking_changes_invalidate_only_affected_days(self):
+        self.assertIn('09:00', self.starts())
+        self.assertIn('09:00', self.starts(self.other_day))
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = Booking.objects.create(
+                professional=self.professional, customer=self.client_user, data=self.day,
+                start_time=time(9, 0), end_time=time(10, 0),
+            )
+        self.assertNotIn('09:00', self.starts())
+        with self.assertNumQueries(0):
+            self.starts(self.other_day)
+
+        booking.data = self.other_day
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.save()
+        self.assertIn('09:00', self.starts())
+        self.assertNotIn('09:00', self.starts(self.other_day))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.delete()
+        self.assertIn('09:00', self.starts(self.other_day))
+
+    def test_invalidated_only_once_committed(self):
+        self.assertIn('09:00', self.starts())
+        with self.captureOnCommitCallbacks() as callbacks:
+            Booking.objects.create(
+                professional=self.professional, customer=self.client_user, data=self.day,
+                start_time=time(9, 0), end_time=time(10, 0),
+            )
+            # Until the booking commits, other requests keep reading the previous answer
+            with self.assertNumQueries(0):
+                self.assertIn('09:00', self.starts())
+            self.assertFalse(ScheduledReminder.objects.exists())
+        for callback in callbacks:
+            callback()
+        self.assertNotIn('09:00', self.starts())
+        self.assertTrue(ScheduledReminder.objects.exists())
+
+    def test_schedule_change_invalidates_weekday(self):
+        self.assertEqual(self.starts()[0], '09:00')
+        self.starts(self.other_day)
+        setattr(self.professional, f"{DAY_PREFIXES[self.day.weekday()]}_start", time(10, 0))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.professional.save()
+        self.assertEqual(self.starts()[0], '10:00')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.starts(self.other_day)[0], '09:00')
+
+
+class NextAvailableAPITest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        User = get_user_model()
+        self.user = User.objects.create_user(email='client@example.com', password='testpass', full_name='Client', role='client')
+        self.first = User.objects.create_user(email='a@example.com', password='testpass', full_name='Anna', role='professional')
+        self.second = User.objects.create_user(email='b@example.com', password='testpass', full_name='Bruno', role='professional')
+        set_weekly_schedule(self.first, start=time(9, 0), end=time(10, 0), break_from=None, break_to=None)
+        set_weekly_schedule(self.second, start=time(9, 30), end=time(11, 0), break_from=None, break_to=None)
+        self.service = Service.objects.create(name='Massage', reference='MSG', duration=60)
+        self.service.collaborators.add(self.first, self.second)
+        self.day = date.today() + timedelta(days=3)
+        Booking.objects.create(
+            professional=self.first, customer=self.user, data=self.day,
+            start_time=time(9, 0), end_time=time(10, 0),
+        )
+
+    def get(self, **params):
+        self.client.force_authenticate(self.user)
+        params.setdefault('service_ids', str(self.service.id))
+        params.setdefault('start_date', self.day.isoformat())
+        return self.client.get(reverse('reservation-next-available'), params)
+
+    def test_first_slot_with_anyone(self):
+        resp = self.get()
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['results'], [{
+            'date': self.day.isoformat(), 'start': '09:30', 'end': '10:30',
+            'professional_id': self.second.id, 'full_name': 'Bruno',
+        }])
+
+    def test_first_slots_with_professional(self):
+        resp = self.get(professional_id=self.first.id, limit=2, horizon_days=2)
+        next_day = (self.day + timedelta(days=1)).isoformat()
+        self.assertEqual([(r['date'], r['start']) for r in resp.data['results']], [(next_day, '09:00')])
+        resp = self.get(professional_id=self.first.id, limit=2, horizon_days=3)
+        self.assertEqual(len(resp.data['results']), 2)
+
+    def test_stops_after_first_chunk(self):
+        # services, candidates, then the first day's bookings and free room time
+        with self.assertNumQueries(4):
+            self.get(horizon_days=90)
+
+
+class AvailabilityExceptionTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        User = get_user_model()
+        self.admin = User.objects.create_superuser(email='admin@example.com', password='testpass')
+        self.professional = User.objects.create_user(email='pro@example.com', password='testpass', full_name='Pro', role='professional')
+        self.colleague = User.objects.create_user(email='col@example.com', password='testpass', full_name='Col', role='professional')
+        set_weekly_schedule(self.professional)
+        set_weekly_schedule(self.colleague)
+        self.day = date.today() + timedelta(days=7)
+
+    def starts(self, professional, day=None):
+        day = day or self.day
+        return [slot['start'] for slot in get_available_slots_for_professional(professional, day, 60)]
+
+    def test_partial_day_time_off(self):
+        self.assertIn('10:00', self.starts(self.professional))
+        with self.captureOnCommitCallbacks(execute=True):
+            AvailabilityException.objects.create(
+                professional=self.professional, date_from=self.day, date_to=self.day,
+                start_time=time(9, 0), end_time=time(12, 0), reason='Doctor',
+            )
+        starts = self.starts(self.professional)
+        self.assertEqual(starts[0], '12:00')
+        self.assertIn('10:00', self.starts(self.colleague))
+
+    def test_studio_closure_over_range(self):
+        self.starts(self.colleague, self.day + timedelta(days=1))
+        with self.captureOnCommitCallbacks(execute=True):
+            closure = AvailabilityException.objects.create(
+                date_from=self.day, date_to=self.day + timedelta(days=1), reason='Holiday',
+            )
+        self.assertEqual(self.starts(self.professional), [])
+        self.assertEqual(self.starts(self.colleague, self.day + timedelta(days=1)), [])
+        self.assertNotEqual(self.starts(self.colleague, self.day + timedelta(days=2)), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            closure.delete()
+        self.assertNotEqual(self.starts(self.colleague, self.day + timedelta(days=1)), [])
+
+    def test_range_uses_one_query_per_resource(self):
+        AvailabilityException.objects.create(
+            professional=self.professional, date_from=self.day, date_to=self.day, reason='Off',
+        )
+        with self.assertNumQueries(2):
+            starts = get_available_slots_for_range(self.professional, self.day, self.day + timedelta(days=30), 60)
+        self.assertEqual(starts[self.day], [])
+        self.assertNotEqual(starts[self.day + timedelta(days=1)], [])
+
+    def test_admin_api(self):
+        self.client.force_authenticate(self.admin)
+        url = reverse('availability-exception-list')
+        resp = self.client.post(url, {
+            'professional': self.professional.id, 'date_from': self.day, 'date_to': self.day - timedelta(days=1),
+        }, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        resp = self.client.post(url, {
+            'professional': self.professional.id, 'date_from': self.day, 'date_to': self.day, 'reason': 'Off',
+        }, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.starts(self.professional), [])
+
+
+class BookingOverlapGuardTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.professional = User.objects.create_user(email='pro@example.com', password='testpass', full_name='Pro', role='professional')
+        self.customer = User.objects.create_user(email='client@example.com', password='testpass', full_name='Client', role='client')
+        set_weekly_schedule(self.professional)
+        self.day = date.today() + timedelta(days=7)
+        self.booking = self.book(time(10, 0), time(11, 0))
+
+    def book(self, start, end, instance=None):
+        serializer = BookingSerializer(instance, data={
+            'professional': self.professional.id, 'customer': self.customer.id,
+            'data': self.day.isoformat(), 'start_time': start.isoformat(), 'end_time': end.isoformat(),
+        }, partial=instance is not None)
+        serializer.is_valid(raise_exception=True)
+        return serializer.save()
+
+    def test_rejects_overlapping_booking(self):
+        with self.assertRaises(ValidationError):
+            self.book(time(10, 30), time(11, 30))
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_allows_adjacent_booking_and_own_update(self):
+        self.book(time(11, 0), time(12, 0))
+        self.book(time(9, 30), time(10, 30), instance=self.booking)
+        with self.assertRaises(ValidationError):
+            self.book(time(10, 45), time(11, 15), instance=self.booking)
+
+    def test_cancelled_booking_releases_time(self):
+        self.booking.state = 'cancel'
+        self.booking.save()
+        starts = [slot['start'] for slot in get_available_slots_for_professional(self.professional, self.day, 60)]
+        self.assertIn('10:00', starts)
+        self.book(time(10, 0), time(11, 0))
+        self.assertEqual(ProfessionalDayLock.objects.filter(professional=self.professional, date=self.day).count(), 1)
+
+    def test_count_overlaps(self):
+        rows = [
+            Booking(professional_id=1, data=self.day, start_time=time(9, 0), end_time=time(10, 0)),
+            Booking(professional_id=1, data=self.day, start_time=time(9, 30), end_time=time(10, 30)),
+            Booking(professional_id=1, data=self.day, start_time=time(10, 30), end_time=time(11, 0)),
+        ]
+        self.assertEqual(count_overlaps(rows), 1)
+
+
+class OccupancyGridTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        User = get_user_model()
+        self.admin = User.objects.create_superuser(email='admin@example.com', password='testpass')
+        self.professional = User.objects.create_user(email='pro@example.com', password='testpass', full_name='Pro', role='professional')
+        set_weekly_schedule(self.professional)
+        self.day = date.today() + timedelta(days=7)
+        self.booking = Booking.objects.create(
+            professional=self.professional, data=self.day, start_time=time(10, 5), end_time=time(10, 20),
+        )
+
+    def grid(self, day=None):
+        return list(OccupancySlot.objects.filter(
+            professional=self.professional, date=day or self.day,
+        ).order_by('quarter').values_list('quarter', flat=True))
+
+    def test_quarters(self):
+        self.assertEqual(list(occupancy.quarters(time(10, 0), time(10, 30))), [40, 41])
+        self.assertEqual(list(occupancy.quarters(time(10, 5), time(10, 20))), [40, 41])
+        self.assertEqual(list(occupancy.quarters(time(10, 0), time(10, 0))), [])
+
+    def test_grid_follows_booking_changes(self):
+        self.assertEqual(self.grid(), [40, 41])
+        Booking.objects.create(professional=self.professional, data=self.day, start_time=time(10, 15), end_time=time(11, 0))
+        self.assertEqual(self.grid(), [40, 41, 42, 43])
+
+        next_day = self.day + timedelta(days=1)
+        self.booking.data = next_day
+        self.booking.save()
+        self.assertEqual(self.grid(), [41, 42, 43])
+        self.assertEqual(self.grid(next_day), [40, 41])
+
+        self.booking.state = 'cancel'
+        self.booking.save()
+        self.assertEqual(self.grid(next_day), [])
+
+    def test_backfill_command(self):
+        OccupancySlot.objects.all().delete()
+        call_command('backfill_occupancy', stdout=StringIO())
+        self.assertEqual(self.grid(), [40, 41])
+
+    def test_slots_from_grid_match_bookings(self):
+        Booking.objects.create(professional=self.professional, data=self.day, start_time=time(15, 0), end_time=time(16, 30))
+        expected = get_available_slots_for_professional(self.professional, self.day, 60)
+        cache.clear()
+        with self.settings(AVAILABILITY_USE_OCCUPANCY_GRID=True):
+            self.assertEqual(get_available_slots_for_professional(self.professional, self.day, 60), expected)
+
+    def test_occupancy_report(self):
+        self.client.force_authenticate(self.admin)
+        url = reverse('reservation-occupancy')
+        params = {'date_from': self.day.isoformat(), 'date_to': self.day.isoformat()}
+        resp = self.client.get(url, params)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['results'], [
+            {'professional_id': self.professional.id, 'date': self.day.isoformat(), 'booked_minutes': 30},
+        ])
+        resp = self.client.get(url, {**params, 'time_from': '11:00', 'time_to': '12:00'})
+        self.assertEqual(resp.data['results'], [])
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RoomAvailabilityTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.professional = User.objects.create_user(email='pro@example.com', password='testpass', full_name='Pro', role='professional')
+        self.colleague = User.objects.create_user(email='col@example.com', password='testpass', full_name='Col', role='professional')
+        self.customer = User.objects.create_user(email='client@example.com', password='testpass', full_name='Client', role='client')
+        set_weekly_schedule(self.professional)
+        self.room_a = Room.objects.create(name='Room A')
+        self.room_b = Room.objects.create(name='Room B')
+        Room.objects.create(name='Storage', status=False)
+        self.day = date.today() + timedelta(days=7)
+
+    def starts(self, room_id=None):
+        slots = get_available_slots_for_professional(self.professional, self.day, 60, room_id)
+        return [slot['start'] for slot in slots]
+
+    def book_room(self, room, start, end):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Booking.objects.create(professional=self.colleague, room=room, data=self.day, start_time=start, end_time=end)
+
+    def test_union_and_intersection(self):
+        ranges = availability.union_start_ranges([[(540, 600), (660, 720)], [(570, 700)]], 30)
+        self.assertEqual(ranges, [[540, 690]])
+        self.assertEqual(availability.intersect_starts([500, 540, 600, 690, 700], ranges), [540, 600, 690])
+
+    def test_slots_need_a_free_room(self):
+        self.book_room(self.room_a, time(10, 0), time(11, 0))
+        self.assertIn('10:00', self.starts())
+        self.assertNotIn('10:00', self.starts(self.room_a.id))
+        self.book_room(self.room_b, time(10, 30), time(12, 0))
+        starts = self.starts()
+        self.assertIn('09:00', starts)
+        self.assertIn('09:30', starts)
+        self.assertNotIn('09:45', starts)
+        self.assertNotIn('10:00', starts)
+        self.assertIn('11:00', starts)
+        self.assertEqual(self.starts(Room.objects.get(name='Storage').id), [])
+
+    def test_room_changes_invalidate_cache(self):
+        self.book_room(self.room_a, time(10, 0), time(11, 0))
+        self.assertIn('10:00', self.starts())
+        self.room_b.status = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.room_b.save()
+        self.assertNotIn('10:00', self.starts())
+
+    def test_rejects_double_booked_room(self):
+        self.book_room(self.room_a, time(10, 0), time(11, 0))
+        serializer = BookingSerializer(data={
+            'professional': self.professional.id, 'customer': self.customer.id, 'room': self.room_a.id,
+            'data': self.day.isoformat(), 'start_time': '10:30', 'end_time': '11:30',
+        })
+        serializer.is_valid(raise_exception=True)
+        with self.assertRaises(ValidationError):
+            serializer.save()
+
+    def book(self, professional, **fields):
+        serializer = BookingSerializer(data={
+            'professional': professional.id, 'customer': self.customer.id,
+            'data': self.day.isoformat(), 'start_time': '10:00', 'end_time': '11:00', **fields,
+        })
+        serializer.is_valid(raise_exception=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            return serializer.save()
+
+    def test_bookings_without_room_need_none(self):
+        Room.objects.filter(pk=self.room_b.pk).delete()
+        self.book_room(self.room_a, time(10, 0), time(11, 0))
+        self.assertIsNone(self.book(self.professional).room)
+        third = get_user_model().objects.create_user(email='third@example.com', password='testpass', full_name='Third', role='professional')
+        self.assertIsNone(self.book(third, room_equipment='Massage table').room)
+        self.assertEqual(Booking.objects.count(), 3)
+
+    def test_room_equipment_names_the_room(self):
+        self.book_room(self.room_a, time(10, 0), time(11, 0))
+        with self.assertRaises(ValidationError):
+            self.book(self.professional, room_equipment=' room a ')
+        self.assertEqual(self.book(self.professional, room_equipment='ROOM B').room, self.room_b)
+
+    def test_rooms_take_bookings_up_to_their_capacity(self):
+        Room.objects.filter(pk=self.room_a.pk).update(capacity=2)
+        cache.clear()
+
+        def room_starts():
+            ranges = get_room_start_ranges([self.day], 60, self.room_a.id)[self.day]
+            return availability.intersect_starts([540, 600, 630], ranges)
+
+        self.book_room(self.room_a, time(9, 30), time(10, 30))
+        self.assertEqual(room_starts(), [540, 600, 630])
+        self.assertEqual(self.book(self.professional, room=self.room_a.id).room, self.room_a)
+        self.assertEqual(room_starts(), [540, 630])
+        # 10:30 to 11:00 still has a place left once the 09:30 booking has ended
+        third = get_user_model().objects.create_user(email='third@example.com', password='testpass', full_name='Third', role='professional')
+        with self.assertRaises(ValidationError):
+            self.book(third, room=self.room_a.id)
+        self.assertEqual(self.book(third, room=self.room_a.id, start_time='10:30', end_time='11:30').room, self.room_a)
+
+    def test_saturated_intervals(self):
+        self.assertEqual(availability.saturated_intervals([(0, 10), (5, 15), (10, 20)], 2), [[5, 10], [10, 15]])
+        self.assertEqual(availability.saturated_intervals([(0, 10), (10, 20)], 2), [])
+        self.assertEqual(availability.saturated_intervals([(0, 10), (5, 15)], 1), [[0, 15]])
+
+    def test_room_equipment_migration_mapping(self):
+        booking = Booking.objects.create(professional=self.colleague, data=self.day, room_equipment=' room a ')
+        import_module('reservation.migrations.0009_map_room_equipment').map_room_equipment(apps, None)
+        booking.refresh_from_db()
+        self.assertEqual(booking.room, self.room_a)
+
+
+class BookingQueryBudgetTest(QueryBudgetMixin, TestCase):
+    """Listing reservations must cost the same few queries however many rows are returned."""
+
+    def setUp(self):
+        self.client = APIClient()
+        User = get_user_model()
+        self.admin = User.objects.create_superuser(email='admin@example.com', password='testpass')
+        self.professional = User.objects.create_user(email='pro@example.com', password='testpass', full_name='Pro', role='professional')
+        self.day = date.today() + timedelta(days=7)
+        room = Room.objects.create(name='Room A')
+        group = Class.objects.create(name='Pilates', duration=60)
+        for index in range(12):
+            customer = User.objects.create_user(
+                email=f'client{index}@example.com', password='testpass', full_name=f'Client {index}', role='client'
+            )
+            Booking.objects.create(
+                professional=self.professional, room=room, data=self.day,
+                customer=customer if index % 2 else None, class_id=None if index % 2 else group,
+                start_time=time(8 + index % 10, 0), end_time=time(8 + index % 10, 30),
+            )
+        self.booking = Booking.objects.first()
+
+    def test_list(self):
+        for user in (self.admin, self.professional):
+            self.client.force_authenticate(user)
+            # The page, its service ids, and the version stamps of bookings, users and classes
+            with self.assertQueryBudget(5):
+                resp = self.client.get(reverse('reservation-list'))
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(resp.data['results']), 10)
+
+        # A client only sees their own bookings; their 6 leave the page short, so the
+        # past and undated phases are read too, one query each
+        customer = get_user_model().objects.get(email='client1@example.com')
+        Booking.objects.filter(customer__isnull=False).update(customer=customer)
+        self.client.force_authenticate(customer)
+        with self.assertQueryBudget(7):
+            resp = self.client.get(reverse('reservation-list'))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(resp.data['results']), 6)
+
+    def test_retrieve(self):
+        self.client.force_authenticate(self.admin)
+        with self.assertQueryBudget(5):
+            resp = self.client.get(reverse('reservation-detail', args=[self.booking.pk]))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+    def test_filter_reservations(self):
+        self.client.force_authenticate(self.admin)
+        with self.assertQueryBudget(2):
+            resp = self.client.get(reverse('reservation-filter-reservations'), {'day': self.day.isoformat()})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(resp.data['results']), 10)
+        self.assertIsNotNone(resp.data['next'])
+        self.assertTrue(all(row['professional_details']['id'] == self.professional.id for row in resp.data['results']))
+
+
+class BookingCursorPaginationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        User = get_user_model()
+        self.admin = User.objects.create_superuser(email='admin@example.com', password='testpass')
+        self.professional = User.objects.create_user(email='pro@example.com', password='testpass', full_name='Pro', role='professional')
+        today = date.today()
+        rows = [
+            (today - timedelta(days=3), time(9, 0)),
+            (today - timedelta(days=1), None),
+            (today - timedelta(days=1), time(8, 0)),
+            (today, time(10, 0)),
+            (today, time(10, 0)),
+            (today + timedelta(days=2), None),
+            (today + timedelta(days=2), time(9, 0)),
+            (None, time(9, 0)),
+        ]
+        for day, start in rows:
+            Booking.objects.create(professional=self.professional, data=day, start_time=start)
+
+    def walk(self, url, params):
+        ids, pages = [], 0
+        while url:
+            resp = self.client.get(url, params if pages == 0 else None)
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            ids += [row['id'] for row in resp.data['results']]
+            url = resp.data['next']
+            pages += 1
+        return ids, pages
+
+    def test_pages_follow_upcoming_first_order(self):
+        self.client.force_authenticate(self.admin)
+        ids, pages = self.walk(reverse('reservation-list'), {'page_size': 2})
+        today = date.today()
+        upcoming = Booking.objects.filter(data__gte=today).order_by('data', 'start_time', 'id')
+        past = Booking.objects.filter(data__lt=today).order_by('data', 'start_time', 'id')
+        undated = Booking.objects.filter(data__isnull=True).order_by('id')
+        expected = [b.id for b in [*upcoming, *past, *undated]]
+        self.assertEqual(ids, expected)
+        self.assertEqual(pages, 4)
+
+    def test_filter_reservations_is_paginated(self):
+        self.client.force_authenticate(self.professional)
+        ids, pages = self.walk(reverse('reservation-filter-reservations'), {'day': date.today().isoformat(), 'page_size': 1})
+        self.assertEqual(len(ids), 2)
+        self.assertEqual(pages, 2)
+
+    def test_invalid_cursor(self):
+        self.client.force_authenticate(self.admin)
+        resp = self.client.get(reverse('reservation-list'), {'cursor': 'garbage'})
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_ordering_is_rejected(self):
+        self.client.force_authenticate(self.admin)
+        resp = self.client.get(reverse('reservation-list'), {'ordering': '-data'})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('ordering', resp.data)
+
+
+class BookingExportTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        User = get_user_model()
+        self.admin = User.objects.create_superuser(email='admin@example.com', password='testpass')
+        self.professional = User.objects.create_user(email='pro@example.com', password='testpass', full_name='Pro', role='professional')
+        self.other = User.objects.create_user(email='other@example.com', password='testpass', full_name='Other', role='professional')
+        self.customer = User.objects.create_user(email='client@example.com', password='testpass', full_name='Client', role='client')
+        self.day = date(2026, 3, 2)
+        for offset in range(5):
+            Booking.objects.create(
+                professional=self.professional, customer=self.customer, data=self.day + timedelta(days=offset),
+                start_time=time(9, 0), end_time=time(10, 0), services='Massage, "deep"',
+            )
+        Booking.objects.create(professional=self.other, data=self.day, start_time=None)
+        Booking.objects.create(professional=self.professional, data=None)
+
+    def stream(self, user, **params):
+        self.client.force_authenticate(user)
+        resp = self.client.get(reverse('reservation-export'), params)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return b''.join(resp.streaming_content).decode()
+
+    def test_csv_is_scoped_to_the_user(self):
+        content = self.stream(self.professional, date_to=(self.day + timedelta(days=3)).isoformat())
+        rows = list(csv.DictReader(StringIO(content)))
+        self.assertEqual([row['date'] for row in rows], [(self.day + timedelta(days=i)).isoformat() for i in range(4)])
+        self.assertEqual(rows[0]['customer'], 'Client')
+        self.assertEqual(rows[0]['services'], 'Massage, "deep"')
+        self.assertEqual(rows[0]['start_time'], '09:00:00')
+
+    def test_ndjson(self):
+        lines = self.stream(self.admin, output='ndjson').splitlines()
+        self.assertEqual(len(lines), 6)
+        self.assertEqual(json.loads(lines[0])['professional'], 'Other')
+
+    def test_chunks_walk_every_row_once(self):
+        queryset = Booking.objects.all()
+        ids = [row[0] for row in iter_rows(queryset, chunk_size=2)]
+        expected = list(queryset.filter(data__isnull=False).order_by('data', 'start_time', 'id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_rejects_unknown_output(self):
+        self.client.force_authenticate(self.admin)
+        resp = self.client.get(reverse('reservation-export'), {'output': 'xlsx'})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ExplainHotQueriesTest(TestCase):
+    def test_every_hot_query_uses_an_index(self):
+        out = StringIO()
+        call_command('explain_hot_queries', stdout=out)
+        self.assertNotIn('no index used', out.getvalue())
+        self.assertIn('Every hot query uses an index.', out.getvalue())
+
+
+class FastBookingSerializerTest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        professional = User.objects.create_user(email='pro@example.com', password='testpass', full_name='Pro', role='professional')
+        customer = User.objects.create_user(email='client@example.com', password='testpass', full_name='Client', role='client')
+        group = Class.objects.create(name='Pilates', duration=60)
+        room = Room.objects.create(name='Room A')
+        day = date.today() + timedelta(days=3)
+        first = Booking.objects.create(
+            title='Massage', professional=professional, customer=customer, room=room, data=day,
+            start_time=time(9, 0), end_time=time(9, 45), services='Massage', coupon='SPRING',
+            treatment_record_marking=True, treatment_record_customer_file='treatment_files/notes.pdf',
+        )
+        massage = Service.objects.create(name='Massage', reference='MSG', duration=45, price='35.00')
+        stretch = Service.objects.create(name='Stretching', reference='STR', duration=15, price='10.50')
+        first.booked_services.set([stretch, massage])
+        Booking.objects.create(professional=professional, class_id=group, data=day, start_time=time(10, 0), end_time=time(11, 0))
+        Booking.objects.create(professional=professional, state='cancel')
+        request = APIRequestFactory().get('/api/reservations/')
+        self.context = {'request': request}
+
+    def test_matches_booking_serializer(self):
+        queryset = Booking.objects.order_by('id')
+        expected = JSONRenderer().render(BookingSerializer(queryset, many=True, context=self.context).data)
+        actual = JSONRenderer().render(FastBookingSerializer(context=self.context).data(queryset))
+        self.assertEqual(actual, expected)
+
+    def test_single_query_per_relation(self):
+        # The rows, then the service ids of all of them
+        with self.assertNumQueries(2):
+            rows = FastBookingSerializer(context=self.context).data(Booking.objects.all())
+        self.assertEqual(len(rows), 3)
+
+
+class BookingSparseFieldsTest(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        User = get_user_model()
+        self.admin = User.objects.create_superuser(email='admin@example.com', password='testpass')
+        professional = User.objects.create_user(email='pro@example.com', password='testpass', full_name='Pro', role='professional')
+        self.booking = Booking.objects.create(
+            title='Massage', professional=professional, data=date.today() + timedelta(days=1),
+            start_time=time(9, 0), end_time=time(10, 0),
+        )
+        self.client.force_authenticate(self.admin)
+
+    def test_fields(self):
+        resp = self.client.get(reverse('reservation-list'), {'fields': 'id,title'})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['results'], [{'id': self.booking.id, 'title': 'Massage'}])
+
+    def test_expand(self):
+        resp = self.client.get(reverse('reservation-detail', args=[self.booking.pk]), {'expand': 'professional_details'})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['professional_details']['full_name'], 'Pro')
+        self.assertNotIn('customer_details', resp.data)
+        self.assertNotIn('class_details', resp.data)
+        self.assertIn('start_time', resp.data)
+
+    def test_default_is_unchanged(self):
+        resp = self.client.get(reverse('reservation-detail', args=[self.booking.pk]))
+        self.assertIn('professional_details', resp.data)
+        self.assertIn('class_details', resp.data)
+
+    def test_unknown_names(self):
+        resp = self.client.get(reverse('reservation-list'), {'fields': 'id,password', 'expand': 'room'})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', resp.data)
+        self.assertIn('expand', resp.data)
+
+    def test_unrequested_relations_are_not_joined(self):
+        with self.assertQueryBudget(4) as queries:
+            self.client.get(reverse('reservation-detail', args=[self.booking.pk]), {'fields': 'id,title'})
+        self.assertNotIn(get_user_model()._meta.db_table, queries.captured_queries[-1]['sql'])
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        User = get_user_model()
+        self.admin = User.objects.create_superuser(email='admin@example.com', password='testpass')
+        self.professional = User.objects.create_user(email='pro@example.com', password='testpass', full_name='Pro', role='professional')
+        self.booking = Booking.objects.create(
+            professional=self.professional, data=date.today() + timedelta(days=1),
+            start_time=time(9, 0), end_time=time(10, 0),
+        )
+        self.client.force_authenticate(self.admin)
+
+    def revalidate(self, url, etag):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_list_not_modified_until_a_booking_changes(self):
+        url = reverse('reservation-list')
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertNotIn('Last-Modified', first)
+        with self.assertNumQueries(3):
+            resp = self.revalidate(url, first['ETag'])
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(resp['ETag'], first['ETag'])
+
+        self.booking.title = 'Moved'
+        self.booking.save()
+        self.assertEqual(self.revalidate(url, first['ETag']).status_code, status.HTTP_200_OK)
+
+    def test_detail_follows_nested_users(self):
+        url = reverse('reservation-detail', args=[self.booking.pk])
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.revalidate(url, etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        self.professional.full_name = 'Renamed'
+        self.professional.save()
+        self.assertEqual(self.revalidate(url, etag).status_code, status.HTTP_200_OK)
+
+    def test_deletes_and_query_strings_change_the_etag(self):
+        url = reverse('reservation-list')
+        etag = self.client.get(url)['ETag']
+        self.assertNotEqual(self.client.get(url, {'fields': 'id'})['ETag'], etag)
+        self.booking.delete()
+        self.assertEqual(self.revalidate(url, etag).status_code, status.HTTP_200_OK)
+
+    def test_malformed_pk_is_not_found(self):
+        resp = self.client.get(reverse('reservation-detail', args=['abc']))
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_if_modified_since_alone_never_gets_304(self):
+        url = reverse('reservation-list')
+        since = http_date((timezone.now() + timedelta(minutes=1)).timestamp())
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=since).status_code, status.HTTP_200_OK)
+
+    def test_class_clients_change_the_etag(self):
+        group = Class.objects.create(name='Pilates', duration=60)
+        client = get_user_model().objects.create_user(email='client@example.com', password='testpass', full_name='Client', role='client')
+        url = reverse('class-list')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.revalidate(url, etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        group.clients.add(client)
+        self.assertEqual(self.revalidate(url, etag).status_code, status.HTTP_200_OK)
+
+
+class BookingCalendarTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        User = get_user_model()
+        self.admin = User.objects.create_superuser(email='admin@example.com', password='testpass')
+        self.professional = User.objects.create_user(
+            email='pro@example.com', password='testpass', full_name='Pro', role='professional', color_scheme='#ff0000',
+        )
+        self.customer = User.objects.create_user(email='client@example.com', password='testpass', full_name='Client', role='client')
+        self.group = Class.objects.create(name='Pilates', duration=60)
+        self.day = date.today() + timedelta(days=1)
+        for hour in (11, 9, 10):
+            Booking.objects.create(
+                professional=self.professional, data=self.day, start_time=time(hour, 0), end_time=time(hour, 30),
+                customer=self.customer if hour != 10 else None, class_id=self.group if hour == 10 else None,
+            )
+        Booking.objects.create(professional=self.professional, customer=self.customer, data=self.day + timedelta(days=10))
+        self.client.force_authenticate(self.admin)
+
+    def test_columnar_payload(self):
+        # The projected query plus the version stamps of bookings, users and classes
+        with self.assertNumQueries(4):
+            resp = self.client.get(reverse('reservation-calendar'), {
+                'date_from': self.day.isoformat(), 'date_to': (self.day + timedelta(days=6)).isoformat(),
+            })
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        bookings = resp.data['bookings']
+        self.assertEqual(bookings['start'], ['09:00:00', '10:00:00', '11:00:00'])
+        self.assertEqual(bookings['date'], [self.day.isoformat()] * 3)
+        self.assertEqual(bookings['professional'], [self.professional.id] * 3)
+        self.assertEqual(bookings['customer'], [self.customer.id, None, self.customer.id])
+        self.assertEqual(bookings['class'], [None, self.group.id, None])
+        self.assertEqual(resp.data['professionals'], {
+            self.professional.id: {'full_name': 'Pro', 'email': 'pro@example.com', 'color_scheme': '#ff0000'},
+        })
+        self.assertEqual(list(resp.data['customers']), [self.customer.id])
+        self.assertEqual(resp.data['classes'], {self.group.id: {'name': 'Pilates'}})
+
+    def test_filters_and_validation(self):
+        url = reverse('reservation-calendar')
+        resp = self.client.get(url, {'date_from': self.day.isoformat(), 'date_to': self.day.isoformat(), 'state': 'cancel'})
+        self.assertEqual(resp.data['bookings']['id'], [])
+        resp = self.client.get(url, {'date_from': self.day.isoformat()})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        resp = self.client.get(url, {'date_from': self.day.isoformat(), 'date_to': (self.day + timedelta(days=100)).isoformat()})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BookingSearchTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        User = get_user_model()
+        self.admin = User.objects.create_superuser(email='admin@example.com', password='testpass')
+        self.professional = User.objects.create_user(email='pro@example.com', password='testpass', full_name='João Gonçalves', role='professional')
+        self.other = User.objects.create_user(email='other@example.com', password='testpass', full_name='Ana Costa', role='professional')
+        self.customer = User.objects.create_user(email='client@example.com', password='testpass', full_name='Maria Silva', role='client')
+        day = date.today() + timedelta(days=1)
+        self.massage = Booking.objects.create(
+            title='Deep tissue massage', services='Massagem desportiva', professional=self.professional,
+            customer=self.customer, data=day, start_time=time(9, 0), end_time=time(10, 0),
+        )
+        self.physio = Booking.objects.create(
+            title='Physio follow-up', internal_notes='Left knee, post-surgery', professional=self.other,
+            customer=self.customer, data=day, start_time=time(9, 0), end_time=time(10, 0),
+        )
+
+    def search(self, user, text):
+        self.client.force_authenticate(user)
+        resp = self.client.get(reverse('reservation-list'), {'search': text})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return sorted(row['id'] for row in resp.data['results'])
+
+    def test_matches_word_prefixes_of_every_source(self):
+        self.assertEqual(self.search(self.admin, 'mass'), [self.massage.id])
+        self.assertEqual(self.search(self.admin, 'KNEE'), [self.physio.id])
+        self.assertEqual(self.search(self.admin, 'goncalves'), [self.massage.id])
+        self.assertEqual(self.search(self.admin, 'silva'), [self.massage.id, self.physio.id])
+        self.assertEqual(self.search(self.admin, 'silva physio'), [self.physio.id])
+        self.assertEqual(self.search(self.admin, 'yoga'), [])
+
+    def test_mysql_prefixes_use_the_column_collation(self):
+        self.assertEqual(search.prefix_condition('mass', 'mysql'), Q(token__istartswith='mass'))
+        self.assertEqual(search.prefix_condition('mass', 'postgresql'), Q(token__startswith='mass'))
+
+    def test_scoped_to_the_user(self):
+        self.assertEqual(self.search(self.professional, 'silva'), [self.massage.id])
+        self.assertEqual(self.search(self.customer, 'costa'), [self.physio.id])
+
+    def test_tokens_follow_edits_and_renames(self):
+        self.massage.title = 'Shiatsu'
+        self.massage.save()
+        self.assertEqual(self.search(self.admin, 'shiatsu'), [self.massage.id])
+        self.assertEqual(self.search(self.admin, 'tissue'), [])
+        self.customer.full_name = 'Maria Santos'
+        self.customer.save()
+        self.assertEqual(self.search(self.admin, 'santos'), [self.massage.id, self.physio.id])
+        self.assertEqual(self.search(self.admin, 'silva'), [])
+        self.other.delete()
+        self.assertEqual(self.search(self.admin, 'santos'), [self.massage.id])
+
+    def test_backfill(self):
+        BookingSearchToken.objects.all().delete()
+        call_command('backfill_search_tokens', stdout=StringIO())
+        self.assertEqual(self.search(self.admin, 'desportiva'), [self.massage.id])
+
+
+class BookingServicesTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        User = get_user_model()
+        self.admin = User.objects.create_superuser(email='admin@example.com', password='testpass')
+        self.professional = User.objects.create_user(email='pro@example.com', password='testpass', full_name='Pro', role='professional')
+        self.customer = User.objects.create_user(email='client@example.com', password='testpass', full_name='Client', role='client')
+        self.massage = Service.objects.create(name='Massagem', reference='MSG', duration=45, price='35.00')
+        self.stretch = Service.objects.create(name='Alongamento', reference='ALG', duration=15, price='10.50')
+        self.day = date.today() + timedelta(days=1)
+        self.client.force_authenticate(self.admin)
+
+    def test_totals_follow_the_services(self):
+        resp = self.client.post(reverse('reservation-list'), {
+            'professional': self.professional.id, 'customer': self.customer.id, 'data': self.day.isoformat(),
+            'start_time': '09:00', 'end_time': '10:00', 'service_ids': [self.massage.id, self.stretch.id],
+        }, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(sorted(resp.data['service_ids']), sorted([self.massage.id, self.stretch.id]))
+        self.assertEqual((resp.data['total_duration'], resp.data['total_price']), (60, '45.50'))
+        self.assertEqual(resp.data['services'], 'Massagem, Alongamento')
+
+        url = reverse('reservation-detail', args=[resp.data['id']])
+        resp = self.client.patch(url, {'customer': self.customer.id, 'service_ids': [self.stretch.id]}, format='json')
+        self.assertEqual((resp.data['total_duration'], resp.data['total_price']), (15, '10.50'))
+
+        booking = Booking.objects.get(pk=resp.data['id'])
+        self.massage.bookings.add(booking)
+        booking.refresh_from_db()
+        self.assertEqual(booking.total_duration, 60)
+        self.massage.bookings.clear()
+        booking.refresh_from_db()
+        self.assertEqual(booking.total_duration, 15)
+
+        resp = self.client.get(reverse('reservation-list'), {'booked_services': self.stretch.id})
+        self.assertEqual([row['id'] for row in resp.data['results']], [booking.id])
+        resp = self.client.get(reverse('reservation-list'), {'booked_services': self.massage.id})
+        self.assertEqual(resp.data['results'], [])
+
+    def test_analytics_sums_totals(self):
+        for state in ('confirmed', 'paid', 'cancel'):
+            booking = Booking.objects.create(professional=self.professional, customer=self.customer, data=date.today(), state=state)
+            booking.booked_services.set([self.massage, self.stretch])
+        resp = self.client.get(reverse('dashboard:analytics'))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['booked_minutes_last_30_days'], 120)
+        self.assertEqual(resp.data['revenue_last_30_days'], '91.00')
+
+    def test_services_migration_mapping(self):
+        booking = Booking.objects.create(professional=self.professional, data=self.day, services=' massagem ; ALG, Unknown')
+        by_id = Booking.objects.create(professional=self.professional, data=self.day, services=str(self.stretch.id))
+        untouched = Booking.objects.create(professional=self.professional, data=self.day, services='Yoga')
+        import_module('reservation.migrations.0015_map_booking_services').map_booking_services(apps, None)
+        booking.refresh_from_db()
+        self.assertEqual(set(booking.booked_services.all()), {self.massage, self.stretch})
+        self.assertEqual((booking.total_duration, booking.total_price), (60, Decimal('45.50')))
+        self.assertEqual(list(by_id.booked_services.all()), [self.stretch])
+        self.assertFalse(untouched.booked_services.exists())
+
+
+class BouncingBackend(EmailBackend):
+    """locmem backend refusing mail to bounce@ addresses."""
+
+    def send_messages(self, messages):
+        if any(address.startswith('bounce@') for message in messages for address in message.to):
+            raise ConnectionError('refused')
+        return super().send_messages(messages)
+
+
+class BookingReminderTest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.professional = User.objects.create_user(email='pro@example.com', password='testpass', full_name='Pro', role='professional')
+        self.customer = User.objects.create_user(email='client@example.com', password='testpass', full_name='Client', role='client')
+        self.bounce = User.objects.create_user(email='bounce@example.com', password='testpass', full_name='Bounce', role='client')
+        group = Class.objects.create(name='Pilates', duration=60)
+        self.tomorrow = date.today() + timedelta(days=1)
+        for hour, customer in ((9, self.customer), (10, self.bounce)):
+            Booking.objects.create(
+                professional=self.professional, customer=customer, data=self.tomorrow,
+                start_time=time(hour, 0), end_time=time(hour, 45),
+            )
+        Booking.objects.create(professional=self.professional, class_id=group, data=self.tomorrow, start_time=time(11, 0), end_time=time(12, 0))
+        Booking.objects.create(professional=self.professional, customer=self.customer, data=self.tomorrow, state='cancel')
+        Booking.objects.create(professional=self.professional, customer=self.customer, data=self.tomorrow + timedelta(days=1))
+
+    def recipients(self):
+        return sorted(address for message in mail.outbox for address in message.to)
+
+    @override_settings(EMAIL_BACKEND='reservation.tests.BouncingBackend')
+    def test_reruns_only_send_what_is_missing(self):
+        summary = scheduler.send_booking_reminders(workers=2, chunk_size=2)
+        self.assertEqual(
+            {key: summary[key] for key in ('bookings', 'sent', 'skipped', 'failed')},
+            {'bookings': 3, 'sent': 4, 'skipped': 0, 'failed': 1},
+        )
+        self.assertEqual(self.recipients(), ['client@example.com'] + ['pro@example.com'] * 3)
+        self.assertEqual(BookingReminder.objects.count(), 4)
+
+        mail.outbox = []
+        self.bounce.email = 'client2@example.com'
+        self.bounce.save()
+        summary = scheduler.send_booking_reminders(workers=2, chunk_size=2)
+        self.assertEqual((summary['sent'], summary['skipped'], summary['failed']), (1, 4, 0))
+        self.assertEqual(self.recipients(), ['client2@example.com'])
+
+    def test_command(self):
+        out = StringIO()
+        call_command('send_reminders', '--date', self.tomorrow.isoformat(), stdout=out)
+        self.assertIn('5 reminder(s) sent', out.getvalue())
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(mail.outbox[0].subject, f'Reminder: Reservation Tomorrow - {self.tomorrow}')
+
+    def test_digest_sends_professionals_one_agenda(self):
+        with self.assertNumQueries(6):
+            # Ledger lookup, ordered agenda rows and ledger insert for the digests, then the
+            # same three for the customers' chunk
+            summary = scheduler.send_booking_reminders(digest=True)
+        self.assertEqual((summary['sent'], summary['failed']), (3, 0))
+        [agenda] = [message for message in mail.outbox if message.to == ['pro@example.com']]
+        self.assertEqual(agenda.subject, f'Your agenda for tomorrow - {self.tomorrow}')
+        self.assertIn('3 reservation(s)', agenda.body)
+        self.assertLess(agenda.body.index('09:00-09:45'), agenda.body.index('11:00-12:00  Reservation - Pilates'))
+        self.assertEqual(BookingReminder.objects.filter(recipient='professional').count(), 3)
+
+        mail.outbox = []
+        summary = scheduler.send_booking_reminders(digest=True)
+        self.assertEqual((summary['sent'], summary['skipped']), (0, 3))
+        self.assertEqual(mail.outbox, [])
+
+
+@override_settings(BOOKING_REMINDER_OFFSETS=[24 * 60, 2 * 60])
+class ScheduledReminderTest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.professional = User.objects.create_user(email='pro@example.com', password='testpass', full_name='Pro', role='professional')
+        self.customer = User.objects.create_user(email='client@example.com', password='testpass', full_name='Client', role='client')
+        self.day = date.today() + timedelta(days=3)
+        self.booking = self.save(Booking(
+            professional=self.professional, customer=self.customer, data=self.day,
+            start_time=time(10, 0), end_time=time(11, 0),
+        ))
+        self.starts_at = timezone.make_aware(datetime.combine(self.day, time(10, 0)))
+
+    def save(self, booking):
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.save()
+        return booking
+
+    def due_times(self):
+        return dict(ScheduledReminder.objects.values_list('offset', 'due_at'))
+
+    def test_follows_the_booking(self):
+        self.assertEqual(self.due_times(), {
+            1440: self.starts_at - timedelta(hours=24), 120: self.starts_at - timedelta(hours=2),
+        })
+        self.booking.start_time = time(15, 0)
+        self.save(self.booking)
+        self.assertEqual(self.due_times()[120], self.starts_at + timedelta(hours=3))
+        self.booking.state = 'cancel'
+        self.save(self.booking)
+        self.assertEqual(self.due_times(), {})
+
+    def test_queues_due_reminders_once(self):
+        self.assertEqual(reminders.next_due_at(), self.starts_at - timedelta(hours=24))
+        self.assertEqual(reminders.queue_due_reminders(now=self.starts_at - timedelta(hours=25)), 0)
+
+        self.assertEqual(reminders.queue_due_reminders(now=self.starts_at - timedelta(hours=24)), 2)
+        emails = OutboxEmail.objects.order_by('pk')
+        self.assertEqual([email.lane for email in emails], [OutboxEmail.REMINDER] * 2)
+        self.assertEqual(emails[0].subject, f'Reminder: Reservation in 24 hours - {self.day}')
+        self.assertEqual(reminders.next_due_at(), self.starts_at - timedelta(hours=2))
+        self.assertEqual(reminders.queue_due_reminders(now=self.starts_at - timedelta(hours=3)), 0)
+
+        # An edit that keeps the start time does not bring the queued reminder back
+        self.booking.title = 'Massage'
+        self.save(self.booking)
+        self.assertEqual(reminders.queue_due_reminders(now=self.starts_at - timedelta(hours=3)), 0)
+
+    def test_overdue_reminders_are_dropped(self):
+        # Back after a long outage: only the 2 hour reminder is still on time
+        self.assertEqual(reminders.queue_due_reminders(now=self.starts_at - timedelta(minutes=110)), 2)
+        self.assertEqual(OutboxEmail.objects.get(recipients=['client@example.com']).subject,
+                         f'Reminder: Reservation in 2 hours - {self.day}')
+        self.assertIsNone(reminders.next_due_at())
+
+        ScheduledReminder.objects.update(queued_at=None)
+        self.assertEqual(reminders.queue_due_reminders(now=self.starts_at + timedelta(minutes=1)), 0)
+        self.assertFalse(ScheduledReminder.objects.filter(queued_at__isnull=True).exists())
+
+        reminders.queue_due_reminders(now=self.starts_at + timedelta(days=8))
+        self.assertFalse(ScheduledReminder.objects.exists())
+
+    def test_offsets_taken_out_of_the_settings_are_not_sent(self):
+        with self.settings(BOOKING_REMINDER_OFFSETS=[2 * 60]):
+            self.assertEqual(reminders.queue_due_reminders(now=self.starts_at - timedelta(hours=24)), 0)
+        self.assertFalse(ScheduledReminder.objects.filter(queued_at__isnull=True, offset=24 * 60).exists())
+
+    def test_scheduler_sleeps_until_the_next_due_time(self):
+        scheduler = BackgroundScheduler(timezone=timezone.utc)
+        runner = reminders.ReminderScheduler(scheduler, max_sleep=timedelta(days=30))
+        runner.wake()
+        [job] = scheduler.get_jobs()
+        self.assertEqual(job.trigger.run_date, self.starts_at - timedelta(hours=24))
+
+        ScheduledReminder.objects.update(due_at=timezone.now() - timedelta(minutes=1))
+        runner.wake()
+        self.assertEqual(OutboxEmail.objects.filter(state=OutboxEmail.SENT).count(), 4)
+        self.assertEqual(len(mail.outbox), 4)
+        self.assertIsNone(reminders.next_due_at())
+
+    def test_backfill(self):
+        ScheduledReminder.objects.all().delete()
+        call_command('backfill_reminders', stdout=StringIO())
+        self.assertEqual(len(self.due_times()), 2)
@@ -1,9 +1,10 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import BookingViewSet
+from .views import BookingViewSet, AvailabilityExceptionViewSet
 
 router = DefaultRouter()
 router.register(r'reservations', BookingViewSet, basename='reservation')
+router.register(r'availability-exceptions', AvailabilityExceptionViewSet, basename='availability-exception')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -1,6 +1,7 @@
 from rest_framework import viewsets, status, permissions
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
 
@@ -9,93 +10,300 @@ from drf_spectacular.types import OpenApiTypes
 
 
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
 
-from .models import Booking, TIME_SLOTS
+from .models import Booking, AvailabilityException, OccupancySlot, TIME_SLOTS
+from classes.models import Class
+from rooms.models import Room
 from services.models import Service
 from user.models import User
-from .serializers import BookingSerializer
-
-from django.db.models import Case, When, Value, IntegerField
+from user.schedule import SCHEDULE_FIELDS, get_weekly_schedule
+from .serializers import BookingSerializer, AvailabilityExceptionSerializer, FastBookingSerializer
+from .pagination import BookingCursorPagination
+from FisioActif.conditional import ConditionalGetMixin
+from FisioActif.sparse_fields import SPARSE_FIELDS_PARAMETERS, SparseFieldsViewMixin
+from .permissions import IsAdminUser
+from . import availability, availability_cache, occupancy
+from .export import csv_lines, iter_rows, ndjson_lines
+from .calendar_payload import columnar_calendar
+from .search import BookingSearchFilter
+
+from collections import defaultdict
+from itertools import islice
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.db.models import Value, IntegerField, Count, F, FilteredRelation, Q
 from django.utils import timezone
 
 
+MAX_RANGE_DAYS = 62
+NEXT_SLOT_MAX_HORIZON = 90
+NEXT_SLOT_MAX_RESULTS = 20
+NEXT_SLOT_MAX_CHUNK = 8
+
+BUSY_BOOKING = 0
+BUSY_EXCEPTION = 1
+
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def get_slot_starts(professionals, days, total_duration, room_id=None):
+    """
+    Returns {(professional_id, date): [slot start minutes]} for every working day of every
+    professional. Results come from the availability cache where possible; the bookings of
+    all remaining professional-days are fetched with a single query.
+    Slots are then narrowed to the starts where a suitable room is free as well (see
+    get_room_start_ranges).
+    """
+    hours = {}
+    for professional in professionals:
+        schedule = get_weekly_schedule(professional)
+        for day in days:
+            if schedule[day.weekday()] is not None:
+                hours[professional.id, day] = schedule[day.weekday()]
+    if not hours:
+        return {}
+
+    result, keys = availability_cache.lookup(list(hours), total_duration)
+    missing = [pair for pair in hours if pair not in result]
+    if missing:
+        use_grid = getattr(settings, 'AVAILABILITY_USE_OCCUPANCY_GRID', False)
+        grid = occupancy.busy_intervals(missing) if use_grid else {}
+        rows_by_key = defaultdict(list)
+        exceptions_by_professional = defaultdict(list)
+        for professional_id, date_from, start_time, end_time, kind, date_to in get_busy_rows(
+            missing, include_bookings=not use_grid
+        ):
+            if kind == BUSY_BOOKING:
+                rows_by_key[professional_id, date_from].append((start_time, end_time))
+            else:
+                exceptions_by_professional[professional_id].append((date_from, date_to, start_time, end_time))
+
+        studio_exceptions = exceptions_by_professional.get(None, [])
+        computed = {}
+        for pair in missing:
+            professional_id, day = pair
+            blocked = availability.exception_intervals(
+                studio_exceptions + exceptions_by_professional.get(professional_id, []), day
+            )
+            if blocked is None:
+                result[pair] = []
+            else:
+                busy = availability.booking_intervals(rows_by_key.get(pair, ())) + grid.get(pair, []) + blocked
+                result[pair] = availability.compute_day_slots(hours[pair], busy, total_duration)
+            computed[keys[pair]] = result[pair]
+        availability_cache.store(computed)
+
+    room_ranges = get_room_start_ranges(days, total_duration, room_id)
+    return {
+        pair: availability.intersect_starts(starts, room_ranges[pair[1]])
+        for pair, starts in result.items()
+    }
+
+
+def get_room_start_ranges(days, total_duration, room_id=None):
+    """
+    Returns {date: [(first, last) start minutes]} during which at least one active room
+    (or room_id, when given) has a place left for total_duration, i.e. holds fewer
+    overlapping bookings than its capacity. Days missing from the availability
+    cache are computed from a single query over every room. Without any active room and
+    without room_id no room is required, so the whole day is allowed.
+    """
+    result, keys = availability_cache.lookup_rooms(days, total_duration, room_id)
+    missing = [day for day in days if day not in result]
+    if not missing:
+        return result
+
+    rooms = Room.objects.filter(status=True)
+    if room_id is not None:
+        rooms = rooms.filter(id=room_id)
+    rows = rooms.annotate(
+        day_booking=FilteredRelation(
+            'bookings',
+            condition=Q(bookings__data__in=missing) & ~Q(bookings__state__in=Booking.RELEASED_STATES),
+        ),
+    ).order_by().values_list(
+        'id', 'capacity', 'day_booking__data', 'day_booking__start_time', 'day_booking__end_time',
+    )
+
+    busy = {}
+    capacities = {}
+    for current_room_id, capacity, day, start_time, end_time in rows:
+        capacities[current_room_id] = capacity
+        room_days = busy.setdefault(current_room_id, defaultdict(list))
+        if day is not None:
+            room_days[day].append((start_time, end_time))
+
+    computed = {}
+    for day in missing:
+        if not busy and room_id is None:
+            result[day] = [[0, 24 * 60 - total_duration]]
+        else:
+            result[day] = availability.union_start_ranges(
+                [
+                    availability.free_windows(0, 24 * 60, availability.saturated_intervals(
+                        availability.booking_intervals(by_day.get(day, ())), capacities[current_room_id],
+                    ))
+                    for current_room_id, by_day in busy.items()
+                ],
+                total_duration,
+            )
+        computed[keys[day]] = result[day]
+    availability_cache.store(computed)
+    return result
+
+
+def get_busy_rows(pairs, include_bookings=True):
+    """
+    Bookings and availability exceptions relevant to (professional_id, date) pairs, fetched in a
+    single UNION query as (professional_id, date_from, start_time, end_time, kind, date_to) rows.
+    Bookings have date_from == date_to == their day; studio-wide exceptions have no professional.
+    Both sides list model columns before annotations so the compound SELECTs line up.
+    Without include_bookings only the exceptions are fetched (bookings then come from the occupancy grid).
+    """
+    professional_ids = {professional_id for professional_id, _ in pairs}
+    days = {day for _, day in pairs}
+    exceptions = AvailabilityException.objects.filter(
+        Q(professional__in=professional_ids) | Q(professional__isnull=True),
+        date_from__lte=max(days),
+        date_to__gte=min(days),
+    ).annotate(
+        kind=Value(BUSY_EXCEPTION, output_field=IntegerField()),
+        range_end=F('date_to'),
+    ).order_by().values_list('professional_id', 'date_from', 'start_time', 'end_time', 'kind', 'range_end')
+    if not include_bookings:
+        return exceptions
+    bookings = Booking.objects.filter(
+        professional__in=professional_ids, data__in=days,
+    ).exclude(
+        state__in=Booking.RELEASED_STATES,
+    ).annotate(
+        kind=Value(BUSY_BOOKING, output_field=IntegerField()),
+        range_end=F('data'),
+    ).order_by().values_list('professional_id', 'data', 'start_time', 'end_time', 'kind', 'range_end')
+    return bookings.union(exceptions, all=True)
+
+
 # Helper function to calculate available slots
-def get_available_slots_for_professional(professional, date_obj, total_duration):
+def get_available_slots_for_professional(professional, date_obj, total_duration, room_id=None):
     """
     Returns a list of available start/end time pairs for a professional on a given date,
     considering working hours, breaks, and existing bookings. total_duration in minutes (sum of all services).
     """
-    from datetime import datetime, timedelta, time
-    import pytz
-
-    # Map weekday to field prefix
-    weekday = date_obj.weekday()  # Monday=0
-    day_map = [
-        'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday'
-    ]
-    day_prefix = day_map[weekday]
-
-    enabled = getattr(professional, f"{day_prefix}_enabled", False)
-    start = getattr(professional, f"{day_prefix}_start", None)
-    break_from = getattr(professional, f"{day_prefix}_break_from", None)
-    break_to = getattr(professional, f"{day_prefix}_break_to", None)
-    end = getattr(professional, f"{day_prefix}_end", None)
-
-    if not enabled or not start or not end:
-        return []
-
-    # Convert times to datetime for calculations
-    tz = pytz.UTC
-    dt_start = datetime.combine(date_obj, start).replace(tzinfo=tz)
-    dt_end = datetime.combine(date_obj, end).replace(tzinfo=tz)
-    dt_break_from = datetime.combine(date_obj, break_from, tz) if break_from else None
-    dt_break_to = datetime.combine(date_obj, break_to, tz) if break_to else None
-
-    # Get existing bookings for this professional on this date
-    bookings = Booking.objects.filter(professional=professional, data=date_obj)
-    busy_times = []
-    for b in bookings:
-        if b.start_time and b.end_time:
-            busy_times.append((datetime.combine(date_obj, b.start_time, tz), datetime.combine(date_obj, b.end_time, tz)))
-
-    # Generate slots
-    slots = []
-    slot_length = timedelta(minutes=total_duration)
-    current = dt_start
-    while current + slot_length <= dt_end:
-        slot_end = current + slot_length
-        # Skip if overlaps with break
-        if dt_break_from and dt_break_to:
-            if (current < dt_break_to and slot_end > dt_break_from):
-                current += timedelta(minutes=15)
-                continue
-        # Skip if overlaps with existing bookings
-        overlap = False
-        for busy_start, busy_end in busy_times:
-            if (current < busy_end and slot_end > busy_start):
-                overlap = True
-                break
-        if not overlap:
-            slots.append({
-                'start': current.time().strftime('%H:%M'),
-                'end': slot_end.time().strftime('%H:%M')
-            })
-        current += timedelta(minutes=15)  # step by 15 min
-    return slots
-
-
-class BookingViewSet(viewsets.ModelViewSet):
+    starts = get_slot_starts([professional], [date_obj], total_duration, room_id).get((professional.id, date_obj), [])
+    return availability.format_slots(starts, total_duration)
+
+
+def get_available_slots_for_range(professional, date_from, date_to, total_duration, room_id=None):
+    """
+    Returns {date: [slot start minutes]} for every day from date_from to date_to (inclusive).
+    """
+    days = list(availability.daterange(date_from, date_to))
+    starts = get_slot_starts([professional], days, total_duration, room_id)
+    return {day: starts.get((professional.id, day), []) for day in days}
+
+
+def get_free_professionals(professionals, date_from, date_to, total_duration, window=None, room_id=None):
+    """
+    Returns [(professional, {date: [slot start minutes]})] for every professional with at least
+    one free slot in the range, optionally restricted to a (start, end) window in minutes.
+    """
+    professionals = list(professionals)
+    days = list(availability.daterange(date_from, date_to))
+    starts = get_slot_starts(professionals, days, total_duration, room_id)
+
+    result = []
+    for professional in professionals:
+        free = {}
+        for day in days:
+            day_starts = starts.get((professional.id, day))
+            if day_starts and window is not None:
+                day_starts = availability.within_window(day_starts, total_duration, window)
+            if day_starts:
+                free[day] = day_starts
+        if free:
+            result.append((professional, free))
+    return result
+
+
+def iter_next_slots(professionals, start_date, horizon_days, total_duration, not_before=None, room_id=None):
+    """
+    Lazily yield (date, start minute, professional) in chronological order, scanning forward
+    from start_date for at most horizon_days. Days are fetched in growing chunks (1, 2, 4, ...
+    up to NEXT_SLOT_MAX_CHUNK days) so a match early in the horizon costs a single small query.
+    not_before is an optional (date, minute) before which slots are skipped.
+    """
+    professionals = list(professionals)
+    if not professionals:
+        return
+    end_date = start_date + timedelta(days=horizon_days - 1)
+    chunk_start = start_date
+    chunk_size = 1
+    while chunk_start <= end_date:
+        chunk_end = min(chunk_start + timedelta(days=chunk_size - 1), end_date)
+        days = list(availability.daterange(chunk_start, chunk_end))
+        starts = get_slot_starts(professionals, days, total_duration, room_id)
+        for day in days:
+            candidates = []
+            for professional in professionals:
+                for start in starts.get((professional.id, day), ()):
+                    if not_before and (day, start) < not_before:
+                        continue
+                    candidates.append((start, professional.id, professional))
+            for start, _, professional in sorted(candidates, key=lambda item: item[:2]):
+                yield day, start, professional
+        chunk_start = chunk_end + timedelta(days=1)
+        chunk_size = min(chunk_size * 2, NEXT_SLOT_MAX_CHUNK)
+
+
+def get_candidate_professionals(service_ids):
+    """Professionals collaborating on every one of the given services."""
+    unique_ids = set(service_ids)
+    return User.objects.only('id', 'full_name', *SCHEDULE_FIELDS).filter(
+        role='professional', services_collaborated__in=unique_ids
+    ).annotate(
+        matched_services=Count('services_collaborated', distinct=True)
+    ).filter(matched_services=len(unique_ids)).order_by('full_name', 'id')
+
+
+def parse_room_id(room_id_str):
+    """Parse the optional room_id parameter; raises ValueError when it is not an integer."""
+    return int(room_id_str) if room_id_str else None
+
+
+def parse_service_ids(service_ids_str):
+    """Parse a comma-separated list of service IDs."""
+    return [int(sid) for sid in service_ids_str.split(',') if sid.strip()]
+
+
+def get_total_duration(service_ids):
+    """Sum of the service durations in minutes, or None if any ID is unknown."""
+    durations = list(Service.objects.filter(id__in=service_ids).values_list('duration', flat=True))
+    if len(durations) != len(service_ids):
+        return None
+    return sum(durations)
+
+
+class BookingViewSet(ConditionalGetMixin, SparseFieldsViewMixin, viewsets.ModelViewSet):
     serializer_class = BookingSerializer
-    filter_backends = (DjangoFilterBackend, SearchFilter, OrderingFilter)
+    pagination_class = BookingCursorPagination
+    # No OrderingFilter: BookingCursorPagination always pages in its own upcoming-first order
+    filter_backends = (DjangoFilterBackend, BookingSearchFilter)
     filterset_fields = {
         'data': ['exact'],
         'services': ['exact', 'icontains'],
+        'booked_services': ['exact'],
         'professional': ['exact'],
         'room_equipment': ['icontains', 'exact'],
+        'room': ['exact'],
         'class_id': ['exact'],
     }
     permission_classes = [permissions.IsAuthenticated]
+    # Nested into the representation by professional_details, customer_details and class_details
+    version_dependencies = (User, Class)
 
     @extend_schema(
         parameters=[
@@ -103,7 +311,13 @@ class BookingViewSet(viewsets.ModelViewSet):
                 name='services',
                 type=OpenApiTypes.STR,
                 location=OpenApiParameter.QUERY,
-                description='Filter by service name or ID',
+                description='Filter by the free-text services label',
+            ),
+            OpenApiParameter(
+                name='booked_services',
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description='Filter by booked service ID',
             ),
             OpenApiParameter(
                 name='professional',
@@ -123,10 +337,37 @@ class BookingViewSet(viewsets.ModelViewSet):
                 location=OpenApiParameter.QUERY,
                 description='Filter by class ID',
             ),
+            OpenApiParameter(
+                name='ordering',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description=(
+                    'Not supported: reservations are always listed upcoming first, then past ones, '
+                    'then undated ones, each by date, start time and ID. Passing it returns 400.'
+                ),
+            ),
+            *SPARSE_FIELDS_PARAMETERS,
         ]
     )
     def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
+        if 'ordering' in request.query_params:
+            raise ValidationError({'ordering': 'Reservations can only be listed in their upcoming-first order.'})
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.conditional_response(queryset, lambda: self.fast_list_response(queryset))
+
+    @extend_schema(parameters=SPARSE_FIELDS_PARAMETERS)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    def get_version_parts(self):
+        # Pages are split into upcoming and past bookings around today
+        return [timezone.now().date()]
+
+    def fast_list_response(self, queryset):
+        """Paginated list built by FastBookingSerializer from .values() rows."""
+        fast = FastBookingSerializer(context=self.get_serializer_context(), fields=self.get_requested_fields())
+        page = self.paginate_queryset(fast.project(queryset, *self.paginator.row_lookups))
+        return self.get_paginated_response(fast.serialize(page))
 
     def get_queryset(self):
         # During schema generation (swagger_fake_view) self.request may be a dummy
@@ -137,15 +378,15 @@ class BookingViewSet(viewsets.ModelViewSet):
         user = getattr(self.request, 'user', None)
         if user is None or getattr(user, 'is_authenticated', False) is False:
             return Booking.objects.none()
-        now = timezone.now().date()
-
-        base_qs = Booking.objects.annotate(
-            is_past=Case(
-                When(data__lt=now, then=Value(1)),
-                default=Value(0),
-                output_field=IntegerField(),
-            )
-        ).order_by('is_past', 'data', 'start_time')
+        # Upcoming-first ordering is applied per page by BookingCursorPagination
+        related = [
+            relation for field, relation in (
+                ('professional_details', 'professional'),
+                ('customer_details', 'customer'),
+                ('class_details', 'class_id'),
+            ) if self.wants_field(field)
+        ]
+        base_qs = Booking.objects.select_related(*related, 'room').order_by('data', 'start_time', 'id')
 
         if user.role == 'admin':
             return base_qs
@@ -188,7 +429,6 @@ class BookingViewSet(viewsets.ModelViewSet):
             try:
                 professional = AppUser.objects.get(id=professional_id, role='professional')
             except AppUser.DoesNotExist:
-                from rest_framework.exceptions import ValidationError
                 raise ValidationError({'professional': 'Invalid professional ID'})
             serializer.save(professional=professional, customer=user)
         else:
@@ -335,10 +575,9 @@ class BookingViewSet(viewsets.ModelViewSet):
         
         status_param = request.query_params.get('status')
         if status_param:
-            queryset = queryset.filter(status=status_param.lower())
+            queryset = queryset.filter(state=status_param.lower())
         
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.fast_list_response(queryset)
     
     @extend_schema(
         parameters=[
@@ -354,12 +593,30 @@ class BookingViewSet(viewsets.ModelViewSet):
                 location=OpenApiParameter.QUERY,
                 description='Date to get available slots for (format: YYYY-MM-DD)',
             ),
+            OpenApiParameter(
+                name='date_from',
+                type=OpenApiTypes.DATE,
+                location=OpenApiParameter.QUERY,
+                description='First day of a date range, used instead of date (format: YYYY-MM-DD)',
+            ),
+            OpenApiParameter(
+                name='date_to',
+                type=OpenApiTypes.DATE,
+                location=OpenApiParameter.QUERY,
+                description=f'Last day of the date range, at most {MAX_RANGE_DAYS} days after date_from (format: YYYY-MM-DD)',
+            ),
             OpenApiParameter(
                 name='service_ids',
                 type=OpenApiTypes.STR,
                 location=OpenApiParameter.QUERY,
                 description='Comma-separated list of service IDs to sum durations',
             ),
+            OpenApiParameter(
+                name='room_id',
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description='Only offer slots where this room is free (default: any active room)',
+            ),
         ],
         responses={
             200: OpenApiTypes.OBJECT,
@@ -368,35 +625,523 @@ class BookingViewSet(viewsets.ModelViewSet):
     )
     @action(detail=False, methods=['get'])
     def available_slots(self, request):
-        """Get all available slots for a specific professional, date, and total duration of multiple services"""
-        from datetime import datetime, timedelta, time
+        """
+        Get all available slots for a specific professional, date, and total duration of multiple services.
+        With date_from/date_to instead of date, returns the slot start times of every day in the range:
+        {"professional_id": 1, "duration": 60, "slots": {"2025-06-02": ["09:00", "09:15"], ...}}
+        """
         professional_id = request.query_params.get('professional_id')
         date_str = request.query_params.get('date')
+        date_from_str = request.query_params.get('date_from')
+        date_to_str = request.query_params.get('date_to')
         service_ids_str = request.query_params.get('service_ids')
-        if not (professional_id and date_str and service_ids_str):
+        range_mode = bool(date_from_str or date_to_str) and not date_str
+        if not (professional_id and service_ids_str and (date_str or (date_from_str and date_to_str))):
             return Response(
-                {"error": "professional_id, date, and service_ids are required"},
+                {"error": "professional_id, date (or date_from and date_to), and service_ids are required"},
                 status=status.HTTP_400_BAD_REQUEST
             )
         try:
-            professional = User.objects.get(id=professional_id)
-        except User.DoesNotExist:
+            professional = User.objects.only('id', *SCHEDULE_FIELDS).get(id=professional_id)
+        except (User.DoesNotExist, ValueError):
             return Response({"error": "Invalid professional ID"}, status=status.HTTP_400_BAD_REQUEST)
         try:
-            date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
+            room_id = parse_room_id(request.query_params.get('room_id'))
+        except ValueError:
+            return Response({"error": "Invalid room ID"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            if range_mode:
+                date_from = datetime.strptime(date_from_str, "%Y-%m-%d").date()
+                date_to = datetime.strptime(date_to_str, "%Y-%m-%d").date()
+            else:
+                date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
         except Exception:
             return Response({"error": "Invalid date format. Use YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+        if range_mode and not 0 <= (date_to - date_from).days <= MAX_RANGE_DAYS:
+            return Response(
+                {"error": f"date_to must be on or after date_from and at most {MAX_RANGE_DAYS} days later."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            total_duration = get_total_duration(parse_service_ids(service_ids_str))
+            if total_duration is None:
+                return Response({"error": "One or more service IDs are invalid."}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception:
+            return Response({"error": "Invalid service_ids parameter."}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not range_mode:
+            slots = get_available_slots_for_professional(professional, date_obj, total_duration, room_id)
+            return Response(slots)
+
+        starts_by_date = get_available_slots_for_range(professional, date_from, date_to, total_duration, room_id)
+        return Response({
+            'professional_id': professional.id,
+            'duration': total_duration,
+            'slots': {
+                day.isoformat(): [availability.MINUTE_LABELS[start] for start in starts]
+                for day, starts in starts_by_date.items()
+            },
+        })
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name='service_ids',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Comma-separated list of service IDs; professionals must offer all of them',
+            ),
+            OpenApiParameter(
+                name='date',
+                type=OpenApiTypes.DATE,
+                location=OpenApiParameter.QUERY,
+                description='Day to search (format: YYYY-MM-DD)',
+            ),
+            OpenApiParameter(
+                name='date_from',
+                type=OpenApiTypes.DATE,
+                location=OpenApiParameter.QUERY,
+                description='First day of a date range, used instead of date (format: YYYY-MM-DD)',
+            ),
+            OpenApiParameter(
+                name='date_to',
+                type=OpenApiTypes.DATE,
+                location=OpenApiParameter.QUERY,
+                description='Last day of the date range (format: YYYY-MM-DD)',
+            ),
+            OpenApiParameter(
+                name='time_from',
+                type=OpenApiTypes.TIME,
+                location=OpenApiParameter.QUERY,
+                description='Earliest slot start (format: HH:MM)',
+            ),
+            OpenApiParameter(
+                name='time_to',
+                type=OpenApiTypes.TIME,
+                location=OpenApiParameter.QUERY,
+                description='Latest slot end (format: HH:MM)',
+            ),
+            OpenApiParameter(
+                name='room_id',
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description='Only offer slots where this room is free (default: any active room)',
+            ),
+        ],
+        responses={
+            200: OpenApiTypes.OBJECT,
+            400: OpenApiTypes.OBJECT,
+        },
+    )
+    @action(detail=False, methods=['get'])
+    def available_professionals(self, request):
+        """
+        Find every professional offering all the given services who has a free slot in the date
+        (and optional time) window:
+        {"duration": 60, "professionals": [{"id": 1, "full_name": "...", "slots": {"2025-06-02": ["09:00"]}}]}
+        """
+        params = request.query_params
+        service_ids_str = params.get('service_ids')
+        date_str = params.get('date')
+        date_from_str = params.get('date_from', date_str)
+        date_to_str = params.get('date_to', date_str)
+        if not (service_ids_str and date_from_str and date_to_str):
+            return Response(
+                {"error": "service_ids and date (or date_from and date_to) are required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            date_from = datetime.strptime(date_from_str, "%Y-%m-%d").date()
+            date_to = datetime.strptime(date_to_str, "%Y-%m-%d").date()
+        except ValueError:
+            return Response({"error": "Invalid date format. Use YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+        if not 0 <= (date_to - date_from).days <= MAX_RANGE_DAYS:
+            return Response(
+                {"error": f"date_to must be on or after date_from and at most {MAX_RANGE_DAYS} days later."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            time_from = datetime.strptime(params.get('time_from', '00:00'), "%H:%M").time()
+            time_to = datetime.strptime(params.get('time_to', '23:59'), "%H:%M").time()
+        except ValueError:
+            return Response({"error": "Invalid time format. Use HH:MM."}, status=status.HTTP_400_BAD_REQUEST)
+        window = (availability.to_minutes(time_from), availability.to_minutes(time_to))
+        try:
+            room_id = parse_room_id(params.get('room_id'))
+        except ValueError:
+            return Response({"error": "Invalid room ID"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            service_ids = parse_service_ids(service_ids_str)
+            total_duration = get_total_duration(service_ids)
+            if total_duration is None:
+                return Response({"error": "One or more service IDs are invalid."}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception:
+            return Response({"error": "Invalid service_ids parameter."}, status=status.HTTP_400_BAD_REQUEST)
+
+        candidates = get_candidate_professionals(service_ids)
+        free = get_free_professionals(candidates, date_from, date_to, total_duration, window, room_id)
+        return Response({
+            'duration': total_duration,
+            'professionals': [
+                {
+                    'id': professional.id,
+                    'full_name': professional.full_name,
+                    'slots': {
+                        day.isoformat(): [availability.MINUTE_LABELS[start] for start in starts]
+                        for day, starts in days.items()
+                    },
+                }
+                for professional, days in free
+            ],
+        })
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name='service_ids',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Comma-separated list of service IDs to sum durations',
+            ),
+            OpenApiParameter(
+                name='professional_id',
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description='Only search this professional (default: anyone offering all the services)',
+            ),
+            OpenApiParameter(
+                name='start_date',
+                type=OpenApiTypes.DATE,
+                location=OpenApiParameter.QUERY,
+                description='First day to search, defaults to today (format: YYYY-MM-DD)',
+            ),
+            OpenApiParameter(
+                name='horizon_days',
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description=f'Number of days to search, default 30, at most {NEXT_SLOT_MAX_HORIZON}',
+            ),
+            OpenApiParameter(
+                name='limit',
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description=f'Number of slots to return, default 1, at most {NEXT_SLOT_MAX_RESULTS}',
+            ),
+            OpenApiParameter(
+                name='room_id',
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description='Only offer slots where this room is free (default: any active room)',
+            ),
+        ],
+        responses={
+            200: OpenApiTypes.OBJECT,
+            400: OpenApiTypes.OBJECT,
+        },
+    )
+    @action(detail=False, methods=['get'])
+    def next_available(self, request):
+        """
+        Find the first free slot(s) for the given services, with a given professional or anyone:
+        {"duration": 60, "results": [{"date": "2025-06-02", "start": "09:00", "end": "10:00",
+        "professional_id": 1, "full_name": "..."}]}
+        """
+        params = request.query_params
+        service_ids_str = params.get('service_ids')
+        if not service_ids_str:
+            return Response({"error": "service_ids is required"}, status=status.HTTP_400_BAD_REQUEST)
+        now = timezone.now()
+        try:
+            start_date = datetime.strptime(params['start_date'], "%Y-%m-%d").date() if params.get('start_date') else now.date()
+        except ValueError:
+            return Response({"error": "Invalid date format. Use YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            horizon_days = int(params.get('horizon_days', 30))
+            limit = int(params.get('limit', 1))
+        except ValueError:
+            return Response({"error": "horizon_days and limit must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            room_id = parse_room_id(params.get('room_id'))
+        except ValueError:
+            return Response({"error": "Invalid room ID"}, status=status.HTTP_400_BAD_REQUEST)
+        if not (1 <= horizon_days <= NEXT_SLOT_MAX_HORIZON and 1 <= limit <= NEXT_SLOT_MAX_RESULTS):
+            return Response(
+                {"error": f"horizon_days must be 1-{NEXT_SLOT_MAX_HORIZON} and limit 1-{NEXT_SLOT_MAX_RESULTS}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         try:
-            service_ids = [int(sid) for sid in service_ids_str.split(',') if sid.strip()]
-            services = Service.objects.filter(id__in=service_ids)
-            if services.count() != len(service_ids):
+            service_ids = parse_service_ids(service_ids_str)
+            total_duration = get_total_duration(service_ids)
+            if total_duration is None:
                 return Response({"error": "One or more service IDs are invalid."}, status=status.HTTP_400_BAD_REQUEST)
-            total_duration = sum(s.duration for s in services)
         except Exception:
             return Response({"error": "Invalid service_ids parameter."}, status=status.HTTP_400_BAD_REQUEST)
 
-        slots = get_available_slots_for_professional(professional, date_obj, total_duration)
-        return Response(slots)
+        professional_id = params.get('professional_id')
+        if professional_id:
+            try:
+                professionals = [User.objects.only('id', 'full_name', *SCHEDULE_FIELDS).get(id=professional_id)]
+            except (User.DoesNotExist, ValueError):
+                return Response({"error": "Invalid professional ID"}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            professionals = get_candidate_professionals(service_ids)
+
+        # Slots earlier today are already gone
+        not_before = (now.date(), availability.to_minutes(now.time(), round_up=True))
+        matches = islice(
+            iter_next_slots(professionals, start_date, horizon_days, total_duration, not_before, room_id),
+            limit,
+        )
+        return Response({
+            'duration': total_duration,
+            'results': [
+                {
+                    'date': day.isoformat(),
+                    'start': availability.MINUTE_LABELS[start],
+                    'end': availability.MINUTE_LABELS[start + total_duration],
+                    'professional_id': professional.id,
+                    'full_name': professional.full_name,
+                }
+                for day, start, professional in matches
+            ],
+        })
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name='output',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='csv (default) or ndjson',
+            ),
+            OpenApiParameter(
+                name='date_from',
+                type=OpenApiTypes.DATE,
+                location=OpenApiParameter.QUERY,
+                description='First day to export (format: YYYY-MM-DD)',
+            ),
+            OpenApiParameter(
+                name='date_to',
+                type=OpenApiTypes.DATE,
+                location=OpenApiParameter.QUERY,
+                description='Last day to export (format: YYYY-MM-DD)',
+            ),
+        ],
+        responses={
+            (200, 'text/csv'): OpenApiTypes.STR,
+            (200, 'application/x-ndjson'): OpenApiTypes.STR,
+            400: OpenApiTypes.OBJECT,
+        },
+    )
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Stream the dated reservations visible to the user as CSV or NDJSON, one row per line,
+        ordered by date and time. Accepts the same filters as the list endpoint.
+        """
+        params = request.query_params
+        output = params.get('output', 'csv').lower()
+        if output not in EXPORT_CONTENT_TYPES:
+            return Response({"error": "output must be csv or ndjson."}, status=status.HTTP_400_BAD_REQUEST)
+        queryset = self.filter_queryset(self.get_queryset())
+        try:
+            if params.get('date_from'):
+                queryset = queryset.filter(data__gte=datetime.strptime(params['date_from'], "%Y-%m-%d").date())
+            if params.get('date_to'):
+                queryset = queryset.filter(data__lte=datetime.strptime(params['date_to'], "%Y-%m-%d").date())
+        except ValueError:
+            return Response({"error": "Invalid date format. Use YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = iter_rows(queryset)
+        lines = csv_lines(rows) if output == 'csv' else ndjson_lines(rows)
+        response = StreamingHttpResponse(lines, content_type=EXPORT_CONTENT_TYPES[output])
+        response['Content-Disposition'] = f'attachment; filename="reservations.{output}"'
+        return response
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name='date_from',
+                type=OpenApiTypes.DATE,
+                location=OpenApiParameter.QUERY,
+                required=True,
+                description='First day shown (format: YYYY-MM-DD)',
+            ),
+            OpenApiParameter(
+                name='date_to',
+                type=OpenApiTypes.DATE,
+                location=OpenApiParameter.QUERY,
+                required=True,
+                description=f'Last day shown, at most {MAX_RANGE_DAYS} days after date_from (format: YYYY-MM-DD)',
+            ),
+            OpenApiParameter(
+                name='professional_id',
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description='Only show this professional',
+            ),
+            OpenApiParameter(
+                name='state',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Only show reservations in this state',
+                enum=[value for value, _ in Booking.STATE_CHOICES],
+            ),
+        ],
+        responses={200: OpenApiTypes.OBJECT, 400: OpenApiTypes.OBJECT},
+    )
+    @action(detail=False, methods=['get'])
+    def calendar(self, request):
+        """
+        Compact calendar of the reservations visible to the user for a week or month view.
+        Bookings are parallel arrays that refer by id to lookup tables, each person or class
+        described once:
+        {"date_from": "2025-06-02", "date_to": "2025-06-08",
+         "bookings": {"id": [7, 9], "date": ["2025-06-02", "2025-06-02"], "start": ["09:00:00", "10:00:00"],
+                      "end": [...], "state": [...], "title": [...], "professional": [3, 3],
+                      "customer": [12, null], "class": [null, 4], "room": [1, null]},
+         "professionals": {"3": {"full_name": ..., "email": ..., "color_scheme": ...}},
+         "customers": {"12": {"full_name": ..., "email": ...}},
+         "classes": {"4": {"name": ...}}}
+        """
+        params = request.query_params
+        try:
+            date_from = datetime.strptime(params.get('date_from', ''), "%Y-%m-%d").date()
+            date_to = datetime.strptime(params.get('date_to', ''), "%Y-%m-%d").date()
+        except ValueError:
+            return Response(
+                {"error": "date_from and date_to are required (format: YYYY-MM-DD)."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not 0 <= (date_to - date_from).days <= MAX_RANGE_DAYS:
+            return Response(
+                {"error": f"date_to must be on or after date_from and at most {MAX_RANGE_DAYS} days later."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        queryset = self.get_queryset().filter(data__gte=date_from, data__lte=date_to)
+        if params.get('professional_id'):
+            try:
+                queryset = queryset.filter(professional_id=int(params['professional_id']))
+            except ValueError:
+                return Response({"error": "Invalid professional ID"}, status=status.HTTP_400_BAD_REQUEST)
+        if params.get('state'):
+            queryset = queryset.filter(state=params['state'].lower())
+
+        return self.conditional_response(queryset, lambda: Response({
+            'date_from': date_from.isoformat(),
+            'date_to': date_to.isoformat(),
+            **columnar_calendar(queryset),
+        }))
+
+    @extend_schema(responses={200: OpenApiTypes.OBJECT})
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def availability_cache_stats(self, request):
+        """Admin-only hit/miss counters of the availability cache"""
+        return Response(availability_cache.stats())
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name='date_from',
+                type=OpenApiTypes.DATE,
+                location=OpenApiParameter.QUERY,
+                description='First day of the report (format: YYYY-MM-DD)',
+            ),
+            OpenApiParameter(
+                name='date_to',
+                type=OpenApiTypes.DATE,
+                location=OpenApiParameter.QUERY,
+                description='Last day of the report (format: YYYY-MM-DD)',
+            ),
+            OpenApiParameter(
+                name='time_from',
+                type=OpenApiTypes.TIME,
+                location=OpenApiParameter.QUERY,
+                description='Only count booked time from this time of day (format: HH:MM)',
+            ),
+            OpenApiParameter(
+                name='time_to',
+                type=OpenApiTypes.TIME,
+                location=OpenApiParameter.QUERY,
+                description='Only count booked time until this time of day (format: HH:MM)',
+            ),
+            OpenApiParameter(
+                name='professional_id',
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description='Only report this professional',
+            ),
+        ],
+        responses={
+            200: OpenApiTypes.OBJECT,
+            400: OpenApiTypes.OBJECT,
+        },
+    )
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def occupancy(self, request):
+        """
+        Admin-only booked minutes per professional and day, read from the occupancy grid.
+        Professional-days without booked time in the window are omitted:
+        {"date_from": "2025-06-02", "date_to": "2025-06-08",
+         "results": [{"professional_id": 1, "date": "2025-06-02", "booked_minutes": 90}]}
+        """
+        params = request.query_params
+        try:
+            date_from = datetime.strptime(params.get('date_from', ''), "%Y-%m-%d").date()
+            date_to = datetime.strptime(params.get('date_to', ''), "%Y-%m-%d").date()
+        except ValueError:
+            return Response(
+                {"error": "date_from and date_to are required (format: YYYY-MM-DD)."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not 0 <= (date_to - date_from).days <= MAX_RANGE_DAYS:
+            return Response(
+                {"error": f"date_to must be on or after date_from and at most {MAX_RANGE_DAYS} days later."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            time_from = datetime.strptime(params.get('time_from', '00:00'), "%H:%M").time()
+            time_to = datetime.strptime(params.get('time_to', '23:59'), "%H:%M").time()
+        except ValueError:
+            return Response({"error": "Invalid time format. Use HH:MM."}, status=status.HTTP_400_BAD_REQUEST)
+
+        window = occupancy.quarters(time_from, time_to)
+        grid = OccupancySlot.objects.filter(
+            date__gte=date_from, date__lte=date_to,
+            quarter__gte=window.start, quarter__lt=window.stop,
+        )
+        if params.get('professional_id'):
+            try:
+                grid = grid.filter(professional_id=int(params['professional_id']))
+            except ValueError:
+                return Response({"error": "Invalid professional ID"}, status=status.HTTP_400_BAD_REQUEST)
+        rows = grid.values('professional_id', 'date').annotate(quarters=Count('id')).order_by('date', 'professional_id')
+        return Response({
+            'date_from': date_from.isoformat(),
+            'date_to': date_to.isoformat(),
+            'results': [
+                {
+                    'professional_id': row['professional_id'],
+                    'date': row['date'].isoformat(),
+                    'booked_minutes': row['quarters'] * availability.SLOT_STEP,
+                }
+                for row in rows
+            ],
+        })
+
+class AvailabilityExceptionViewSet(viewsets.ModelViewSet):
+    """Admin CRUD for holidays, closures and professional time off."""
+    serializer_class = AvailabilityExceptionSerializer
+    permission_classes = [IsAdminUser]
+    filter_backends = (DjangoFilterBackend,)
+    filterset_fields = {
+        'professional': ['exact', 'isnull'],
+        'date_from': ['lte', 'gte'],
+        'date_to': ['lte', 'gte'],
+    }
+
+    def get_queryset(self):
+        return AvailabilityException.objects.select_related('professional')
 
 # from rest_framework import viewsets, status, permissions
 # from rest_framework.response import Response
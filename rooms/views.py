@@ -3,11 +3,12 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 
+from FisioActif.conditional import ConditionalGetMixin
 from .models import Room
 from .serializers import RoomSerializer
 
 
-class RoomViewSet(viewsets.ModelViewSet):
+class RoomViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """CRUD and status toggle for rooms."""
     queryset = Room.objects.all().order_by('-created_at')
     serializer_class = RoomSerializer
@@ -1,14 +1,16 @@
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from FisioActif.conditional import ConditionalGetMixin
 from .models import Service
 from .serializers import ServiceSerializer
 
 
-class ServiceViewSet(viewsets.ModelViewSet):
+class ServiceViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Service.objects.all().order_by('-created_at')
     serializer_class = ServiceSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    version_dependencies = (Service.collaborators.through,)
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -0,0 +1,25 @@
+# Generated by Django 3.2.25 on 2026-10-17 02:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', 'created_at'], name='subscriptio_user_id_2e22a0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['payment_status', 'expiry_date'], name='subscriptio_payment_b0e07a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['mb_reference'], name='subscriptio_mb_refe_dbdd46_idx'),
+        ),
+    ]
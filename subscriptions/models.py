@@ -71,6 +71,11 @@ class Order(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at']),
+            models.Index(fields=['payment_status', 'expiry_date']),
+            models.Index(fields=['mb_reference']),
+        ]
     
     def save(self, *args, **kwargs):
         if not self.order_id:
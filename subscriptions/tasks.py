@@ -0,0 +1,69 @@
+"""
+Periodic order housekeeping, run by the leader-elected scheduler in jobs.runner.
+
+expire_orders cancels pending orders whose payment reference has expired, and
+poll_mbway_payments asks IfThenPay about recent pending MB WAY requests, so that an
+order still gets settled when the IfThenPay callback never arrives. Both only move
+orders out of 'Pendente' and can safely run again or alongside the callbacks.
+"""
+import logging
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .ifthenpay_service import IfThenPayService
+from .models import Order
+from .views import confirm_order_payment
+
+logger = logging.getLogger(__name__)
+
+# MB WAY requests time out on the customer's phone after 4 minutes
+MBWAY_POLL_WINDOW = timedelta(minutes=10)
+
+
+def expire_orders(now=None):
+    """
+    Cancel pending orders past their expiry date, and MB WAY orders (which carry no
+    expiry date) older than MBWAY_POLL_WINDOW. Returns the number of orders cancelled.
+    """
+    now = now or timezone.now()
+    expired = Order.objects.filter(payment_status='Pendente', expiry_date__lt=now).update(
+        payment_status='Cancelado',
+    )
+    expired += Order.objects.filter(
+        payment_status='Pendente', payment_method='mbway', expiry_date__isnull=True,
+        created_at__lt=now - MBWAY_POLL_WINDOW,
+    ).update(payment_status='Cancelado')
+    if expired:
+        logger.info(f"Cancelled {expired} expired order(s)")
+    return expired
+
+
+def poll_mbway_payments(now=None, service=None):
+    """
+    Check the IfThenPay status of the pending MB WAY orders created within
+    MBWAY_POLL_WINDOW, confirming paid ones and cancelling rejected or expired ones.
+    Returns {'checked': n, 'paid': n, 'cancelled': n}.
+    """
+    now = now or timezone.now()
+    service = service or IfThenPayService()
+    totals = {'checked': 0, 'paid': 0, 'cancelled': 0}
+    pending = Order.objects.filter(
+        payment_status='Pendente', payment_method='mbway', request_id__isnull=False,
+        created_at__gte=now - MBWAY_POLL_WINDOW,
+    ).exclude(request_id='').order_by('created_at')
+    for order in pending:
+        result = service.check_mbway_status(order.request_id, order.amount)
+        if not result.get('success'):
+            logger.warning(f"Could not check MB WAY order {order.order_id}: {result.get('error')}")
+            continue
+        totals['checked'] += 1
+        if result['is_paid']:
+            if confirm_order_payment(order):
+                totals['paid'] += 1
+                logger.info(f"MB WAY payment confirmed by polling for order {order.order_id}")
+        elif result['is_rejected'] or result['is_expired']:
+            totals['cancelled'] += Order.objects.filter(pk=order.pk, payment_status='Pendente').update(
+                payment_status='Cancelado',
+            )
+    return totals
@@ -2,9 +2,10 @@ from rest_framework.viewsets import ModelViewSet
 from rest_framework import permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.db import transaction
 from django.utils import timezone
-from django.core.mail import send_mail
-from django.conf import settings
+from FisioActif.conditional import ConditionalGetMixin
+from outbox.models import OutboxEmail
 from .models import Pack, SubscriptionHistory, Order
 from .serializers import PackSerializer, SubscriptionHistorySerializer, OrderSerializer
 from .permissions import IsAdminOrReadOnly
@@ -13,7 +14,7 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-class PackViewSet(ModelViewSet):
+class PackViewSet(ConditionalGetMixin, ModelViewSet):
     queryset = Pack.objects.all()
     serializer_class = PackSerializer
     permission_classes = [IsAdminOrReadOnly]
@@ -260,16 +261,10 @@ Equipa YourselfPilates
         """
         
         try:
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [user.email],
-                fail_silently=False,
-            )
-            logger.info(f"Payment reference email sent to {user.email}")
+            OutboxEmail.enqueue(subject, message, [user.email])
+            logger.info(f"Payment reference email queued for {user.email}")
         except Exception as e:
-            logger.error(f"Failed to send payment reference email: {str(e)}")
+            logger.error(f"Failed to queue payment reference email: {str(e)}")
     
     def send_mbway_email(self, user, order, phone_number):
         """Send email notification for MB WAY payment"""
@@ -298,16 +293,10 @@ Equipa YourselfPilates
         """
         
         try:
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [user.email],
-                fail_silently=False,
-            )
-            logger.info(f"MB WAY payment email sent to {user.email}")
+            OutboxEmail.enqueue(subject, message, [user.email])
+            logger.info(f"MB WAY payment email queued for {user.email}")
         except Exception as e:
-            logger.error(f"Failed to send MB WAY payment email: {str(e)}")
+            logger.error(f"Failed to queue MB WAY payment email: {str(e)}")
     
     def send_creditcard_email(self, user, order, payment_url):
         """Send email notification for Credit Card payment"""
@@ -335,16 +324,10 @@ Equipa YourselfPilates
         """
         
         try:
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [user.email],
-                fail_silently=False,
-            )
-            logger.info(f"Credit Card payment email sent to {user.email}")
+            OutboxEmail.enqueue(subject, message, [user.email])
+            logger.info(f"Credit Card payment email queued for {user.email}")
         except Exception as e:
-            logger.error(f"Failed to send Credit Card payment email: {str(e)}")
+            logger.error(f"Failed to queue Credit Card payment email: {str(e)}")
 
 
 class OrderViewSet(ModelViewSet):
@@ -473,39 +456,44 @@ def ifthenpay_callback(request):
             logger.error(f"Order not found: order_id={order_id}, reference={reference}")
             return HttpResponse('Order not found', status=404)
         
-        # Check if already paid
-        if order.payment_status == 'Pago':
+        if not confirm_order_payment(order):
             logger.info(f"Order {order.order_id} already paid")
             return HttpResponse('OK', status=200)
         
-        # Update order status
+        logger.info(f"Payment confirmed for order {order.order_id}")
+        return HttpResponse('OK', status=200)
+        
+    except Exception as e:
+        logger.error(f"Error processing IfThenPay callback: {str(e)}")
+        return HttpResponse('Internal server error', status=500)
+
+
+def confirm_order_payment(order):
+    """
+    Mark a pending order paid, record the subscription and queue the confirmation
+    email. The IfThenPay callback and the MB WAY poller (subscriptions.tasks) can both
+    confirm the same order, so the order row is locked and False is returned when it
+    turns out to be paid already.
+    """
+    with transaction.atomic():
+        order = Order.objects.select_for_update().get(pk=order.pk)
+        if order.payment_status == 'Pago':
+            return False
+
         order.payment_status = 'Pago'
         order.paid_at = timezone.now()
         order.save()
-        
-        # Add hours to user account
+
+        # The subscription fields of User are gone; the history row records the hours bought
         user = order.user
-        # user.remaining_hours += order.pack.total_hours
-        user.subscribed_pack = order.pack
-        user.subscription_date = timezone.now()
-        user.save()
-        
-        # Create subscription history
         SubscriptionHistory.objects.create(
             user=user,
             pack=order.pack,
             hours_added=order.pack.total_hours
         )
-        
-        # Send confirmation email
+
         send_payment_confirmation_email(user, order)
-        
-        logger.info(f"Payment confirmed for order {order.order_id}")
-        return HttpResponse('OK', status=200)
-        
-    except Exception as e:
-        logger.error(f"Error processing IfThenPay callback: {str(e)}")
-        return HttpResponse('Internal server error', status=500)
+    return True
 
 
 def send_payment_confirmation_email(user, order):
@@ -519,7 +507,6 @@ def send_payment_confirmation_email(user, order):
             Plano: {order.pack.title}
             Valor: €{float(order.amount):.2f}
             Horas adicionadas: {order.pack.total_hours}
-            Horas disponíveis: {float(user.remaining_hours)}
 
             Pode agora utilizar as suas horas para reservar aulas.
 
@@ -530,16 +517,10 @@ def send_payment_confirmation_email(user, order):
             """
     
     try:
-        send_mail(
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL,
-            [user.email],
-            fail_silently=False,
-        )
-        logger.info(f"Payment confirmation email sent to {user.email}")
+        OutboxEmail.enqueue(subject, message, [user.email])
+        logger.info(f"Payment confirmation email queued for {user.email}")
     except Exception as e:
-        logger.error(f"Failed to send confirmation email: {str(e)}")
+        logger.error(f"Failed to queue confirmation email: {str(e)}")
 
 
 # Credit Card callback endpoints
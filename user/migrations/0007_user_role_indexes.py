@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-17 02:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0006_auto_20260210_1134'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', 'date_joined'], name='user_user_role_20305f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', 'joined_at'], name='user_user_role_97e0ff_idx'),
+        ),
+    ]
@@ -48,6 +48,7 @@ class User(AbstractBaseUser, PermissionsMixin):
     email = models.EmailField(max_length=255, unique=True)
     bio = models.TextField(blank=True, null=True)
     date_joined = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     full_name = models.CharField(max_length=255)
     is_active = models.BooleanField(default=True)
     role = models.CharField(
@@ -154,6 +155,12 @@ class User(AbstractBaseUser, PermissionsMixin):
     objects = UserManager()
     USERNAME_FIELD = 'email'
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['role', 'date_joined']),
+            models.Index(fields=['role', 'joined_at']),
+        ]
+
     # Subscription fields
     # subscribed_pack = models.ForeignKey(
     #     'subscriptions.Pack',
@@ -0,0 +1,80 @@
+"""
+Compiled weekly schedules.
+
+Working hours are stored in 35 columns on User (monday_enabled ... sunday_end).
+They are compiled once into an immutable 7-tuple indexed by weekday (Monday=0):
+None for a day off, otherwise (start, end, breaks) in minutes since midnight,
+where breaks is a tuple of (from, to) intervals.
+
+Compiled schedules are cached in-process in a bounded LRU keyed by the 35 schedule
+values themselves, so an edited user is picked up by every worker on its next read
+without any cross-process invalidation, users sharing the same hours share one entry,
+and the cache stays at SCHEDULE_CACHE_SIZE entries however many users are looked up.
+"""
+from functools import lru_cache
+from operator import attrgetter
+
+DAY_PREFIXES = (
+    'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday'
+)
+DAY_FIELDS = ('enabled', 'start', 'break_from', 'break_to', 'end')
+SCHEDULE_FIELDS = tuple(
+    f"{prefix}_{field}" for prefix in DAY_PREFIXES for field in DAY_FIELDS
+)
+
+SCHEDULE_CACHE_SIZE = 1024
+
+_read_schedule_fields = attrgetter(*SCHEDULE_FIELDS)
+
+
+def to_minutes(value, round_up=False):
+    """Convert a time to minutes since midnight (seconds are rounded down unless round_up)."""
+    minutes = value.hour * 60 + value.minute
+    if round_up and (value.second or value.microsecond):
+        minutes += 1
+    return minutes
+
+
+def _label(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def compile_schedule(values):
+    """Compile the 35 raw schedule values (in SCHEDULE_FIELDS order) into a weekly schedule."""
+    days = []
+    for offset in range(0, len(SCHEDULE_FIELDS), len(DAY_FIELDS)):
+        enabled, start, break_from, break_to, end = values[offset:offset + len(DAY_FIELDS)]
+        if not enabled or not start or not end:
+            days.append(None)
+            continue
+        breaks = ()
+        if break_from and break_to:
+            breaks = ((to_minutes(break_from), to_minutes(break_to, round_up=True)),)
+        days.append((to_minutes(start), to_minutes(end), breaks))
+    return tuple(days)
+
+
+_compile_cached = lru_cache(maxsize=SCHEDULE_CACHE_SIZE)(compile_schedule)
+
+
+def get_weekly_schedule(user):
+    """Return the compiled weekly schedule of a user, reusing the cached one while unchanged."""
+    return _compile_cached(_read_schedule_fields(user))
+
+
+def compact_schedule(schedule):
+    """
+    Render a compiled schedule as 7 entries (Monday first), each null for a day off or
+    [start, end] / [start, end, break_from, break_to] as 'HH:MM' strings.
+    """
+    week = []
+    for day in schedule:
+        if day is None:
+            week.append(None)
+            continue
+        start, end, breaks = day
+        entry = [_label(start), _label(end)]
+        for break_from, break_to in breaks:
+            entry += [_label(break_from), _label(break_to)]
+        week.append(entry)
+    return week
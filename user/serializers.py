@@ -1,3 +1,5 @@
+from FisioActif.fast_serializers import FastListSerializer
+from FisioActif.sparse_fields import SparseFieldsMixin
 from services.models import Service
 from .models import User
 from django.contrib.auth import (
@@ -27,6 +29,17 @@ def get_services_by_category_for_user(user):
             result[str(cat_id)].append(service.id)
     return result
 
+
+def get_services_by_category_for_users(user_ids):
+    """get_services_by_category_for_user for many users in one query: {user_id: {category_id: [service_id, ...]}}."""
+    result = {user_id: {} for user_id in user_ids}
+    rows = Service.objects.filter(
+        collaborators__in=user_ids, collaborators__role='professional', category__isnull=False,
+    ).order_by('id').values_list('collaborators', 'category_id', 'id')
+    for user_id, cat_id, service_id in rows:
+        result[user_id].setdefault(str(cat_id), []).append(service_id)
+    return result
+
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     @classmethod
     def get_token(cls, user):
@@ -277,7 +290,9 @@ class FlexiblePKRelatedField(serializers.PrimaryKeyRelatedField):
         return super().to_internal_value(data)
 
 
-class UserAdminSerializer(serializers.ModelSerializer):
+class UserAdminSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = ('customers', 'services_by_category')
+
     services_by_category = serializers.SerializerMethodField(read_only=True)
     def get_services_by_category(self, obj):
         return get_services_by_category_for_user(obj)
@@ -418,3 +433,12 @@ class UserAdminSerializer(serializers.ModelSerializer):
         return user
     
 
+
+
+class FastUserAdminSerializer(FastListSerializer):
+    """Read-only UserAdminSerializer output for list responses."""
+    serializer_class = UserAdminSerializer
+    batch_fields = {'services_by_category': 'get_services_by_category'}
+
+    def get_services_by_category(self, user_ids):
+        return get_services_by_category_for_users(user_ids)
@@ -1,3 +1,127 @@
+from datetime import time
+from decimal import Decimal
+
 from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework import status
+
+from categories.models import Category
+from services.models import Service
+from user import schedule
+from user.schedule import compile_schedule, get_weekly_schedule, SCHEDULE_FIELDS
+from user.serializers import FastUserAdminSerializer, UserAdminSerializer
+
+
+class WeeklyScheduleTest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.professional = User.objects.create_user(
+            email='pro@example.com', password='testpass', full_name='Pro', role='professional',
+            monday_enabled=True, monday_start=time(9, 0), monday_end=time(18, 0),
+            monday_break_from=time(13, 0), monday_break_to=time(14, 0),
+            tuesday_enabled=True, tuesday_start=time(8, 30), tuesday_end=time(12, 0),
+            wednesday_enabled=False, wednesday_start=time(9, 0), wednesday_end=time(18, 0),
+        )
+
+    def test_compile(self):
+        schedule = get_weekly_schedule(self.professional)
+        self.assertEqual(len(schedule), 7)
+        self.assertEqual(schedule[0], (540, 1080, ((780, 840),)))
+        self.assertEqual(schedule[1], (510, 720, ()))
+        self.assertIsNone(schedule[2])
+        self.assertIsNone(schedule[6])
+        self.assertEqual(compile_schedule((None,) * len(SCHEDULE_FIELDS)), (None,) * 7)
+
+    def test_recompiled_when_row_changes(self):
+        first = get_weekly_schedule(self.professional)
+        self.assertIs(get_weekly_schedule(self.professional), first)
+        reloaded = get_user_model().objects.get(pk=self.professional.pk)
+        reloaded.monday_start = time(10, 0)
+        reloaded.save()
+        self.assertEqual(get_weekly_schedule(reloaded)[0][0], 600)
+
+    def test_cache_is_bounded_and_shared(self):
+        twin = get_user_model().objects.get(pk=self.professional.pk)
+        twin.pk = None
+        self.assertIs(get_weekly_schedule(twin), get_weekly_schedule(self.professional))
+        info = schedule._compile_cached.cache_info()
+        self.assertEqual(info.maxsize, schedule.SCHEDULE_CACHE_SIZE)
+        self.assertLessEqual(info.currsize, info.maxsize)
+
+    def test_compact_timeslots(self):
+        admin = get_user_model().objects.create_superuser(email='admin@example.com', password='testpass')
+        client = APIClient()
+        client.force_authenticate(admin)
+        resp = client.get(reverse('user:admin-users-timeslots'), {
+            'professional_id': self.professional.id, 'compact': 'true',
+        })
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['week'][:3], [['09:00', '18:00', '13:00', '14:00'], ['08:30', '12:00'], None])
+
+
+class FastUserAdminSerializerTest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.admin = User.objects.create_superuser(email='admin@example.com', password='testpass')
+        professionals = [
+            User.objects.create_user(
+                email=f'pro{index}@example.com', password='testpass', full_name=f'Pro {index}', role='professional',
+                photo='profile_photos/pro.png' if index else None, commission_executing_percent=Decimal('12.5'),
+                monday_enabled=True, monday_start=time(9, 0), monday_end=time(18, 0),
+            )
+            for index in range(2)
+        ]
+        for index in range(3):
+            client = User.objects.create_user(
+                email=f'client{index}@example.com', password='testpass', full_name=f'Client {index}', role='client',
+            )
+            client.professionals.set(professionals[:index])
+        massage, physio = Category.objects.create(name='Massage'), Category.objects.create(name='Physio')
+        for index, category in enumerate((massage, physio, massage, None)):
+            service = Service.objects.create(name=f'Service {index}', reference=f'S{index}', category=category, duration=30)
+            service.collaborators.set(professionals[index % 2:])
+        self.request = APIRequestFactory().get('/api/user/admin-users/')
+
+    def test_matches_user_admin_serializer(self):
+        queryset = get_user_model().objects.order_by('-date_joined', '-id')
+        context = {'request': self.request}
+        expected = JSONRenderer().render(UserAdminSerializer(queryset, many=True, context=context).data)
+        actual = JSONRenderer().render(FastUserAdminSerializer(context=context).data(queryset))
+        self.assertEqual(actual, expected)
+
+    def test_list_queries(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        # count, page, customers, their professionals, services by category
+        with self.assertNumQueries(5):
+            resp = client.get(reverse('user:admin-users-list'))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['count'], 6)
+
+
+class UserSparseFieldsTest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.admin = User.objects.create_superuser(email='admin@example.com', password='testpass')
+        professional = User.objects.create_user(email='pro@example.com', password='testpass', full_name='Pro', role='professional')
+        client = User.objects.create_user(email='client@example.com', password='testpass', full_name='Client', role='client')
+        client.professionals.add(professional)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_name_list_skips_relations(self):
+        # count and page only: no customers, no services
+        with self.assertNumQueries(2):
+            resp = self.client.get(reverse('user:admin-users-list'), {'role': 'professional', 'fields': 'id,full_name'})
+        self.assertEqual(resp.data['results'], [{'id': resp.data['results'][0]['id'], 'full_name': 'Pro'}])
 
-# Create your tests here.
+    def test_expand_customers(self):
+        resp = self.client.get(reverse('user:admin-users-list'), {'role': 'professional', 'expand': 'customers'})
+        row = resp.data['results'][0]
+        self.assertEqual([customer['full_name'] for customer in row['customers']], ['Client'])
+        self.assertNotIn('services_by_category', row)
+        self.assertIn('monday_start', row)
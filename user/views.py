@@ -8,9 +8,11 @@ from rest_framework import generics, viewsets, status, permissions
 from rest_framework.exceptions import NotFound
 
 from user.models import User
+from user.schedule import SCHEDULE_FIELDS, compact_schedule, get_weekly_schedule
 from .permissions import IsAdmin
-from user.serializers import UserSerializer, UserAdminSerializer, TimeslotSerializer, UserClientSerializer
+from user.serializers import UserSerializer, UserAdminSerializer, TimeslotSerializer, UserClientSerializer, FastUserAdminSerializer
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
+from FisioActif.sparse_fields import SPARSE_FIELDS_PARAMETERS, SparseFieldsViewMixin
 
 
 class CustomTokenObtainView(ObtainAuthToken):
@@ -60,7 +62,7 @@ class ManageUserView(generics.RetrieveUpdateAPIView):
         return Response({"detail": "Your account has been deleted."}, status=status.HTTP_204_NO_CONTENT)
 
 
-class UserAdminViewSet(viewsets.ModelViewSet):
+class UserAdminViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserAdminSerializer
     def get_permissions(self):
@@ -86,14 +88,21 @@ class UserAdminViewSet(viewsets.ModelViewSet):
                 location=OpenApiParameter.QUERY,
                 description='Filter users by role',
             ),
+            *SPARSE_FIELDS_PARAMETERS,
         ]
     )
     def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        role = request.query_params.get('role')
-        if role:
-            queryset = queryset.filter(role=role)
-        return super().list(request, *args, **kwargs)
+        # Read-only projection of UserAdminSerializer; role filtering happens in get_queryset
+        fast = FastUserAdminSerializer(context=self.get_serializer_context(), fields=self.get_requested_fields())
+        queryset = fast.project(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(fast.serialize(page))
+        return Response(fast.serialize(queryset))
+
+    @extend_schema(parameters=SPARSE_FIELDS_PARAMETERS)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
     def get_queryset(self):
         queryset = self.queryset
@@ -129,6 +138,13 @@ class UserAdminViewSet(viewsets.ModelViewSet):
                 type=OpenApiTypes.INT,
                 location=OpenApiParameter.QUERY,
                 description='ID of the professional to get timeslots for'
+            ),
+            OpenApiParameter(
+                name='compact',
+                type=OpenApiTypes.BOOL,
+                location=OpenApiParameter.QUERY,
+                description='Return the week as 7 entries (Monday first): null for a day off, '
+                            'otherwise [start, end] or [start, end, break_from, break_to]'
             )
         ],
         responses={status.HTTP_200_OK: TimeslotSerializer},
@@ -142,10 +158,21 @@ class UserAdminViewSet(viewsets.ModelViewSet):
             return Response({"detail": "professional_id is required."}, status=400)
 
         try:
-            professional = User.objects.get(id=professional_id, role='professional')
+            professional = User.objects.only(
+                'id', 'full_name', 'email', 'role', *SCHEDULE_FIELDS
+            ).get(id=professional_id, role='professional')
         except User.DoesNotExist:
             raise NotFound("Professional not found.")
 
+        if request.query_params.get('compact') in ('1', 'true', 'True'):
+            return Response({
+                'id': professional.id,
+                'full_name': professional.full_name,
+                'email': professional.email,
+                'role': professional.role,
+                'week': compact_schedule(get_weekly_schedule(professional)),
+            })
+
         serializer = TimeslotSerializer(professional)
         return Response(serializer.data)
 